@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
+import json
+import logging
+from app.services.metrics import measure
 from app.services.rag_service import RAGService
+from app.services.registry import get_rag_service
 
 router = APIRouter()
-rag_service = RAGService()
+logger = logging.getLogger(__name__)
 
 class Message(BaseModel):
     role: str
@@ -30,9 +35,14 @@ class ChatResponse(BaseModel):
     session_id: str
     timestamp: str
     tokens_used: Optional[int] = None
+    cached: bool = False
+    timings: Optional[Dict[str, float]] = None  # Per-stage latency in milliseconds
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """
     Main chat endpoint - sends user message and returns AI response with sources
     """
@@ -48,27 +58,86 @@ async def chat(request: ChatRequest):
             session_id=request.session_id
         )
         
-        return ChatResponse(
-            response=result["response"],
-            sources=result["sources"],
-            session_id=result["session_id"],
-            timestamp=datetime.utcnow().isoformat(),
-            tokens_used=result.get("tokens_used")
-        )
+        # Serialize here rather than in FastAPI so that it is measured
+        with measure("serialization"):
+            body = ChatResponse(
+                response=result["response"],
+                sources=result["sources"],
+                session_id=result["session_id"],
+                timestamp=datetime.utcnow().isoformat(),
+                tokens_used=result.get("tokens_used"),
+                cached=result.get("cached", False),
+                timings=result.get("timings")
+            ).model_dump_json()
+        return Response(content=body, media_type="application/json")
     except ValueError as e:
         # Surface configuration issues (like missing API key) with a clearer status code
         raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}") from e
 
+def _format_sse(event: str, data: Dict) -> str:
+    """Format a Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+    
+    Emits a "sources" event once retrieval is done, "token" events as the
+    answer is generated, then a final "done" event with token usage.
+    """
+    if not request.message or not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    events = rag_service.stream_response(
+        query=request.message,
+        conversation_history=request.conversation_history,
+        session_id=request.session_id
+    )
+    
+    # Pull the first event before committing to a streaming response so that
+    # configuration and retrieval errors still map to proper status codes
+    try:
+        first_event = await events.__anext__()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}") from e
+    
+    async def event_stream() -> AsyncIterator[str]:
+        yield _format_sse(first_event["event"], first_event["data"])
+        try:
+            async for event in events:
+                data = event["data"]
+                if event["event"] == "done":
+                    data = {**data, "timestamp": datetime.utcnow().isoformat()}
+                yield _format_sse(event["event"], data)
+        except Exception as e:
+            logger.error(f"Error while streaming response: {e}")
+            yield _format_sse("error", {"detail": f"Error generating response: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 class ClearSessionRequest(BaseModel):
     session_id: str
 
 @router.post("/clear")
-async def clear_session(request: ClearSessionRequest):
+async def clear_session(
+    request: ClearSessionRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """Clear conversation history for a session"""
     try:
-        rag_service.clear_session(request.session_id)
+        await rag_service.clear_session(request.session_id)
         return {"status": "success", "message": "Session cleared"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing session: {str(e)}") from e
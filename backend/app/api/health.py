@@ -1,15 +1,20 @@
 from fastapi import APIRouter, BackgroundTasks
+from fastapi.responses import JSONResponse
 from datetime import datetime
 from app.config import settings
+from app.services.health import HealthMonitor
+from app.services.registry import registry
 import subprocess
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+monitor = HealthMonitor(registry, ttl_seconds=settings.HEALTH_CACHE_SECONDS)
+
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness, touches no dependency)"""
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -17,16 +22,42 @@ async def health_check():
         "version": settings.APP_VERSION
     }
 
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process answers"""
+    return {"status": "alive", "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/ready")
+async def readiness():
+    """Readiness probe: 200 once the worker is warmed up and its dependencies answer, 503 otherwise"""
+    report = await monitor.check()
+    return JSONResponse(
+        status_code=200 if report["ready"] else 503,
+        content={
+            "status": "ready" if report["ready"] else "not_ready",
+            "rag": report["rag"],
+            "checks": report["checks"],
+            "checked_at": report["checked_at"]
+        }
+    )
+
 @router.get("/status")
 async def system_status():
     """Detailed system status"""
+    report = await monitor.check()
+    checks = report["checks"]
+    operational = report["ready"] and checks["llm"]["status"] == "configured"
     return {
-        "status": "operational",
+        "status": "operational" if operational else "degraded",
         "services": {
             "api": "running",
-            "rag": "ready",
-            "database": "connected"
+            "rag": report["rag"],
+            "database": checks.get("database", {}).get("status", "unknown"),
+            "embeddings": checks.get("embeddings", {}).get("status", "unknown"),
+            "llm": checks.get("llm", {}).get("status", "unknown")
         },
+        "checks": checks,
+        "checked_at": report["checked_at"],
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from app.services.rag_service import RAGService
+from app.services.registry import get_rag_service
+
+router = APIRouter()
+
+class InteractionRequest(BaseModel):
+    medications: List[str] = Field(..., min_length=2, max_length=50, description="Drugs of the prescription")
+    explain: bool = Field(False, description="Have the LLM explain the interactions found")
+
+class InteractionFinding(BaseModel):
+    drug: str
+    partner: str
+    description: str
+    level: str
+    title: str
+    url: str
+    source_type: str
+
+class InteractionPair(BaseModel):
+    drugs: List[str]
+    findings: List[InteractionFinding]
+
+class InteractionResponse(BaseModel):
+    medications: List[str]
+    interactions: List[InteractionPair]
+    # Medications matching no drug or partner of the index: not checked, not "no interaction"
+    unrecognized: List[str] = []
+    checked_pairs: int
+    explanation: Optional[str] = None
+    tokens_used: Optional[int] = None
+    timings: Optional[Dict[str, float]] = None  # Per-stage latency in milliseconds
+
+@router.post("/", response_model=InteractionResponse)
+async def check_interactions(
+    request: InteractionRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Check every pair of a medication list against the interactions indexed
+    from the Vidal and Meddispar monographs
+    """
+    if any(not name or not name.strip() for name in request.medications):
+        raise HTTPException(status_code=400, detail="Medication names cannot be empty")
+    
+    try:
+        result = await rag_service.check_interactions(request.medications, explain=request.explain)
+        return InteractionResponse(medications=request.medications, **result)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Interaction check error: {str(e)}") from e
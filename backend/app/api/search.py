@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from app.services.rag_service import RAGService
+from app.services.registry import get_rag_service
+from app.services.sections import GENERAL_SECTION, SECTION_NAMES
+
+SECTION_PATTERN = "^(" + "|".join(SECTION_NAMES + (GENERAL_SECTION,)) + ")$"
 
 router = APIRouter()
-rag_service = RAGService()
 
 class SearchResult(BaseModel):
     title: str
     content: str
     url: str
     source_type: str
+    section: Optional[str] = None  # Monograph section of the chunk ("posologie", "interactions", ...)
     relevance_score: float
 
 class SearchResponse(BaseModel):
@@ -18,11 +22,25 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total_results: int
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=50, description="Search queries, e.g. the lines of a prescription")
+    source_type: Optional[str] = Field(None, description="Filter by source: 'vidal' or 'meddispar'")
+    limit: int = Field(5, ge=1, le=50, description="Maximum number of results per query")
+    mode: Optional[str] = Field(None, pattern="^(hybrid|vector|lexical)$", description="Retrieval mode, defaults to SEARCH_MODE")
+    section: Optional[str] = Field(None, pattern=SECTION_PATTERN, description="Only search this monograph section")
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]
+    total_queries: int
+
 @router.get("/", response_model=SearchResponse)
 async def search_documents(
     q: str = Query(..., description="Search query"),
     source_type: Optional[str] = Query(None, description="Filter by source: 'vidal' or 'meddispar'"),
-    limit: int = Query(10, ge=1, le=50, description="Maximum number of results")
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
+    mode: Optional[str] = Query(None, pattern="^(hybrid|vector|lexical)$", description="Retrieval mode, defaults to SEARCH_MODE"),
+    section: Optional[str] = Query(None, pattern=SECTION_PATTERN, description="Only search this monograph section (e.g. 'posologie')"),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Search in the knowledge base (Vidal + Meddispar)
@@ -35,7 +53,9 @@ async def search_documents(
         results = await rag_service.search_documents(
             query=q,
             source_type=source_type,
-            limit=limit
+            limit=limit,
+            mode=mode,
+            section=section
         )
         
         return SearchResponse(
@@ -48,8 +68,41 @@ async def search_documents(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}") from e
 
+@router.post("/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(
+    request: BatchSearchRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Run several searches in one round-trip (one embedding call and one
+    vector query for the whole batch), results in query order
+    """
+    if any(not q or not q.strip() for q in request.queries):
+        raise HTTPException(status_code=400, detail="Queries cannot be empty")
+    
+    try:
+        batches = await rag_service.search_documents_batch(
+            queries=request.queries,
+            source_type=request.source_type,
+            limit=request.limit,
+            mode=request.mode,
+            section=request.section
+        )
+        
+        return BatchSearchResponse(
+            results=[
+                SearchResponse(query=q, results=results, total_results=len(results))
+                for q, results in zip(request.queries, batches)
+            ],
+            total_queries=len(request.queries)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search error: {str(e)}") from e
+
 @router.get("/stats")
-async def get_database_stats():
+async def get_database_stats(rag_service: RAGService = Depends(get_rag_service)):
     """Get statistics about the indexed documents"""
     try:
         stats = await rag_service.get_stats()
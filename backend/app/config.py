@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # Application
@@ -13,6 +14,17 @@ class Settings(BaseSettings):
     # Database
     CHROMA_DB_PATH: str = "./data/chroma_db"
     SCRAPING_CACHE_PATH: str = "./data/cache"
+    EMBEDDING_CACHE_PATH: str = "./data/cache/embeddings.sqlite3"
+    LEXICAL_INDEX_PATH: str = "./data/lexical_index.json.gz"
+    INTERACTION_INDEX_PATH: str = "./data/interaction_index.json"  # Drug pairs from "Interactions" sections
+    SNAPSHOT_PATH: Optional[str] = None  # Vector store snapshot imported at startup when the store is empty
+    SNAPSHOT_BATCH_SIZE: int = 2000  # Chunks per snapshot part (and per collection read/write)
+    
+    # Observability
+    METRICS_ENABLED: bool = True  # Prometheus endpoint at /metrics
+    SERVER_TIMING_ENABLED: bool = False  # Per-stage Server-Timing response headers
+    HEALTH_CACHE_SECONDS: float = 5.0  # Readiness probe results reused for this long
+    HEALTH_PROBE_TIMEOUT: float = 3.0  # Timeout of the embedding API reachability check
     
     # CORS
     ALLOWED_ORIGINS: str = "https://pharmabot-vidal-assistant.netlify.app,http://localhost:5173,http://localhost:5174,http://localhost:3000"
@@ -26,15 +38,84 @@ class Settings(BaseSettings):
     USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     REQUEST_DELAY: int = 2
     MAX_RETRIES: int = 3
+    SCRAPING_CONCURRENCY: int = 4
+    SCRAPING_RATE_PER_HOST: Optional[float] = None  # requests/s per host, defaults to 1 / REQUEST_DELAY
+    SCRAPING_BURST: int = 1
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
     
     # RAG Configuration
+    EMBEDDING_BACKEND: str = "openai"  # "openai" or "local" (sentence-transformers, no API key needed)
     EMBEDDING_MODEL: str = "text-embedding-3-large"
+    LOCAL_EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    LOCAL_EMBEDDING_DEVICE: str = "cpu"
+    LOCAL_EMBEDDING_BATCH_SIZE: int = 32
     LLM_MODEL: str = "gpt-4o"  # GPT-4o - Octobre 2025
     LLM_TEMPERATURE: float = 0.3
     MAX_TOKENS: int = 4000
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNKING_MODE: str = "sections"  # "sections" (chunks stay within monograph sections) or "recursive"
     TOP_K_RESULTS: int = 5
+    CONTEXT_ASSEMBLY_ENABLED: bool = True  # Merge/deduplicate retrieved chunks before prompting
+    CONTEXT_MAX_TOKENS: int = 3000  # Budget of the retrieved context in the prompt
+    CONTEXT_DEDUP_THRESHOLD: float = 0.85  # Word 3-gram Jaccard similarity of near-duplicates
+    VECTOR_STORE_THREADS: int = 8  # Thread pool for blocking Chroma calls
+    
+    # Vector collections: HNSW parameters apply to collections created afterwards
+    HNSW_SPACE: str = "l2"  # "l2", "cosine" or "ip" (one space for all shards, their scores are merged)
+    HNSW_M: int = 16
+    HNSW_CONSTRUCTION_EF: int = 100
+    HNSW_SEARCH_EF: int = 10
+    HNSW_SHARD_OVERRIDES: Dict[str, Dict[str, int]] = {}  # Per shard, e.g. {"meddispar": {"search_ef": 50}}
+    SHARDING: str = "none"  # "none", "source" (collection per source_type) or "source_category"
+    SHARD_QUERY_THREADS: int = 4  # Parallel shard queries of a search
+    SHARD_REFRESH_SECONDS: float = 5.0  # Shards created by other processes are picked up within this delay
+    SEARCH_MODE: str = "hybrid"  # "hybrid" (BM25 + vectors), "vector" or "lexical"
+    HYBRID_CANDIDATES: int = 20  # Hits taken from each ranking before fusion
+    TITLE_MATCH_CUTOFF: float = 0.88  # difflib ratio for misspelled drug names
+    SECTION_BOOST: float = 0.2  # Score bonus of chunks from the section a question names (0 disables)
+    CHAT_TITLE_FAST_PATH: bool = False  # Answer explicit "fiche X" chat messages with the document itself
+    
+    # Cross-encoder re-ranking (requires sentence-transformers)
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"  # Multilingual, handles French
+    RERANK_CANDIDATES: int = 30  # Chunks retrieved before keeping the best TOP_K_RESULTS
+    RERANK_BATCH_SIZE: int = 32
+    RERANK_DEVICE: str = "cpu"
+    
+    # Ingestion
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_CONCURRENCY: int = 4
+    INGEST_MAX_RETRIES: int = 5
+    
+    # Embedding cache
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 10000
+    
+    # Conversation sessions
+    SESSION_BACKEND: str = "memory"  # "memory" (per process) or "sqlite" (shared by workers)
+    SESSION_DB_PATH: str = "./data/sessions.sqlite3"
+    SESSION_MAX_SESSIONS: int = 1000
+    SESSION_TTL_SECONDS: int = 24 * 3600  # Idle time before a session is dropped
+    SESSION_MAX_MESSAGES: int = 100
+    
+    # Conversation memory sent to the LLM
+    MEMORY_MODE: str = "window"  # "window" (last turns within a token budget) or "buffer" (full history)
+    MEMORY_MAX_TURNS: int = 5
+    MEMORY_TOKEN_BUDGET: int = 1500
+    MEMORY_SUMMARY_ENABLED: bool = False  # Rolling summary of turns older than the window
+    MEMORY_SUMMARY_MODEL: str = "gpt-4o-mini"
+    
+    # Follow-up question rephrasing before retrieval
+    CONDENSE_MODE: str = "auto"  # "auto" (skip questions naming a document, no reference back), "always" or "never"
+    CONDENSE_LLM_MODEL: Optional[str] = "gpt-4o-mini"  # None to use LLM_MODEL
+    
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES: int = 512
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
     
     class Config:
         env_file = ".env"
@@ -2,7 +2,10 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.api import chat, search, health
+from prometheus_client import REGISTRY
+from app.api import chat, search, health, interactions, metrics
+from app.services.metrics import ServiceCollector
+from app.services.registry import registry
 
 
 @asynccontextmanager
@@ -11,8 +14,21 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"📚 ChromaDB Path: {settings.CHROMA_DB_PATH}")
+    if settings.SNAPSHOT_PATH:
+        print(f"📦 Snapshot: {settings.SNAPSHOT_PATH} (imported if the vector store is empty)")
+    if settings.OPENAI_API_KEY or settings.EMBEDDING_BACKEND == "local":
+        try:
+            await registry.startup()
+            print(f"🔥 RAG service warmed up ({settings.EMBEDDING_BACKEND} embeddings)")
+        except Exception as e:
+            print(f"⚠️  RAG service warm-up failed: {e}")
+    else:
+        print("⚠️  OPENAI_API_KEY not set, skipping RAG service warm-up")
+    if not settings.OPENAI_API_KEY:
+        print("⚠️  OPENAI_API_KEY not set, chat is unavailable")
     yield
     # Shutdown
+    await registry.shutdown()
     print(f"👋 Shutting down {settings.APP_NAME}")
 
 
@@ -32,10 +48,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+    REGISTRY.register(ServiceCollector(registry.current))
+    app.include_router(metrics.router, tags=["Metrics"])
+
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["Health"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(interactions.router, prefix="/api/interactions", tags=["Interactions"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,131 @@
+"""Semantic cache of chat answers keyed on query embeddings"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.lexical_index import fold
+
+# A number and its unit, if any ("15 kg", "2,5mg", "3 ans")
+_QUANTITY_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*([a-zμ%]*)")
+
+
+def quantities(query: str) -> Tuple[Tuple[str, str], ...]:
+    """Numbers of a question with their unit ("enfant de 15 kg" -> (("15", "kg"),))"""
+    return tuple(
+        (number.replace(",", "."), unit)
+        for number, unit in _QUANTITY_RE.findall(fold(query))
+    )
+
+
+class SemanticAnswerCache:
+    """
+    LRU + TTL cache of chat answers.
+
+    A new question is served from the cache when the cosine similarity between
+    its embedding and a cached question's embedding reaches the threshold and
+    both name the same quantities: "posologie doliprane enfant 15 kg" and
+    "... 30 kg" embed almost identically but need different answers.
+
+    ``sync_version`` drops every answer when the indexed documents change,
+    including when another process rewrote the index.
+    """
+
+    def __init__(self, similarity_threshold: float, max_entries: int, ttl_seconds: int):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (normalized embedding, payload, stored_at, quantities); ordered by recency of use
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._lock = threading.Lock()
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [
+            key for key, (_, _, stored_at, _) in self._entries.items()
+            if now - stored_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, embedding: List[float], query: str = "") -> Optional[Dict]:
+        """Return the cached payload of the most similar question naming the same quantities as ``query``"""
+        with self._lock:
+            self._purge_expired()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[k][0] for k in self._matrix_keys])
+
+            similarities = self._matrix @ self._normalize(embedding)
+            wanted = quantities(query)
+            candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+            for best in candidates[np.argsort(-similarities[candidates])]:
+                key = self._matrix_keys[int(best)]
+                if self._entries[key][3] != wanted:
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+
+            self.misses += 1
+            return None
+
+    def store(self, query: str, embedding: List[float], payload: Dict):
+        """Cache the answer payload for a question"""
+        with self._lock:
+            key = self._key(query)
+            self._entries[key] = (self._normalize(embedding), payload, time.monotonic(), quantities(query))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self):
+        """Drop every cached answer (the knowledge base changed)"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def sync_version(self, version):
+        """Invalidate when the version of the indexed documents differs from the last one seen"""
+        with self._lock:
+            if version == self._version:
+                return
+            self._version = version
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,67 @@
+"""Decide whether a follow-up question must be rephrased before retrieval"""
+import re
+import unicodedata
+from typing import Callable, Optional
+
+# Words and phrases that refer back to earlier turns (pronouns, demonstratives,
+# "and for ...", "same", ...). Matched on accent-folded, lowercased text.
+_FOLLOW_UP_PATTERNS = [
+    # Not after a hyphen: "est-il" is an inversion, not a reference
+    r"(?<!-)\b(il|elle|ils|elles|lui|leur|leurs|eux)\b",
+    r"\b(celui|celle|ceux|celles)(-ci|-la)?\b",
+    r"\b(ca|cela|ceci)\b",
+    r"\b(ce|cet|cette|ces)\s+(medicament|molecule|produit|traitement|principe|patient|patiente|cas|dosage|posologie)s?\b",
+    r"^(et|mais|aussi|sinon|donc|alors|pourquoi|comment ca)\b",
+    r"\b(le meme|la meme|les memes|meme chose|aussi|egalement|precedent|precedente|dessus|ci-dessus)\b",
+    r"\b(en|y)\s+(a|ont|faut|prendre|donner|donne)\b",
+    r"\b(it|its|they|them|this one|that one|the same)\b",
+]
+_FOLLOW_UP_RE = re.compile("|".join(_FOLLOW_UP_PATTERNS))
+
+# Questions shorter than this rarely carry their own subject ("Et la dose ?")
+MIN_SELF_CONTAINED_WORDS = 4
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def is_self_contained(question: str, names_document: Optional[Callable[[str], bool]] = None) -> bool:
+    """
+    Cheap heuristic: a question of a few words that does not refer back to
+    the conversation and names a document of the knowledge base
+    (``names_document``, a title index lookup) can be sent to the retriever
+    as is. Without a subject ("Quelle est la posologie chez l'enfant ?") it
+    still depends on the conversation, pronoun or not.
+    """
+    folded = _fold(question).strip()
+    if len(re.findall(r"\w+", folded)) < MIN_SELF_CONTAINED_WORDS:
+        return False
+    if _FOLLOW_UP_RE.search(folded):
+        return False
+    return names_document is not None and names_document(question)
+
+
+def needs_condensation(
+    question: str,
+    chat_history: str,
+    mode: str = "auto",
+    names_document: Optional[Callable[[str], bool]] = None,
+) -> bool:
+    """
+    Whether to run the question-rephrasing LLM call.
+
+    ``mode`` is "always" (LangChain's behaviour whenever there is history),
+    "never", or "auto" (skip it for self-contained questions, see
+    is_self_contained). The first turn never needs it.
+    """
+    if not chat_history:
+        return False
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    if mode == "auto":
+        return not is_self_contained(question, names_document)
+    raise ValueError(f"Unknown CONDENSE_MODE: {mode}")
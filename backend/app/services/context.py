@@ -0,0 +1,146 @@
+"""Context assembly: merge, deduplicate and trim retrieved chunks before prompting"""
+import re
+from typing import Callable, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from app.services.sections import heading_text
+from app.services.tokens import count_tokens, truncate_to_tokens
+
+# Overlaps shorter than this are not considered (chance matches)
+MIN_OVERLAP_CHARS = 30
+
+# A truncated chunk shorter than this is not worth its tokens
+MIN_TRIMMED_TOKENS = 50
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.metadata.get("url") or doc.metadata.get("title", "")
+
+
+def overlap_length(first: str, second: str, max_chars: int) -> int:
+    """Length of the longest suffix of ``first`` that is a prefix of ``second``"""
+    for length in range(min(len(first), len(second), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+def _continuation(first: Document, second: Document) -> str:
+    """
+    Text of ``second`` to append after ``first``: section-aware chunks repeat
+    their heading line, which is dropped when both are in the same section
+    """
+    title = second.metadata.get("section_title")
+    if not title or title != first.metadata.get("section_title"):
+        return second.page_content
+    heading, separator, body = second.page_content.partition("\n")
+    return body if separator and heading_text(heading) == title else second.page_content
+
+
+def _merge_pair(first: Document, second: Document, max_overlap: int) -> Optional[Document]:
+    """``first`` followed by ``second`` when they overlap or are adjacent chunks"""
+    continuation = _continuation(first, second)
+    overlap = overlap_length(first.page_content, continuation, max_overlap)
+    # Merged passages span chunk_start..chunk_index
+    first_end = first.metadata.get("chunk_index")
+    second_start = second.metadata.get("chunk_start", second.metadata.get("chunk_index"))
+    adjacent = first_end is not None and second_start is not None and second_start == first_end + 1
+    if not overlap and not adjacent:
+        return None
+    separator = "" if overlap else "\n"
+    metadata = {
+        **first.metadata,
+        "score": max(first.metadata.get("score", 0.0), second.metadata.get("score", 0.0)),
+    }
+    if first_end is not None and second.metadata.get("chunk_index") is not None:
+        metadata["chunk_start"] = first.metadata.get("chunk_start", first_end)
+        metadata["chunk_index"] = second.metadata["chunk_index"]
+    return Document(page_content=first.page_content + separator + continuation[overlap:], metadata=metadata)
+
+
+def merge_adjacent(docs: List[Document], max_overlap: int) -> List[Document]:
+    """
+    Merge chunks of the same page that follow each other (consecutive
+    ``chunk_index`` or overlapping text) into one passage, placed at the rank
+    of its best chunk.
+    """
+    merged: List[Document] = []
+    for doc in docs:
+        current = len(merged)
+        merged.append(doc)
+        # The new chunk may also bridge two passages already kept (chunks 1 and 3, then 2)
+        changed = True
+        while changed:
+            changed = False
+            for position, existing in enumerate(merged):
+                if position == current or _doc_key(existing) != _doc_key(merged[current]):
+                    continue
+                combined = (
+                    _merge_pair(existing, merged[current], max_overlap)
+                    or _merge_pair(merged[current], existing, max_overlap)
+                )
+                if combined is not None:
+                    keep, drop = min(position, current), max(position, current)
+                    merged[keep] = combined
+                    del merged[drop]
+                    current = keep
+                    changed = True
+                    break
+    return merged
+
+
+def _shingles(text: str, size: int = 3) -> Set[tuple]:
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+def drop_near_duplicates(docs: List[Document], threshold: float) -> List[Document]:
+    """Drop passages whose word 3-gram Jaccard similarity to a better-ranked one reaches ``threshold``"""
+    kept: List[Document] = []
+    kept_shingles: List[Set[tuple]] = []
+    for doc in docs:
+        shingles = _shingles(doc.page_content)
+        if any(
+            len(shingles & other) / max(len(shingles | other), 1) >= threshold
+            for other in kept_shingles
+        ):
+            continue
+        kept.append(doc)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def trim_to_budget(docs: List[Document], max_tokens: int, count: Callable[[str], int] = count_tokens) -> List[Document]:
+    """Keep passages in rank order within ``max_tokens``, truncating the last one if worthwhile"""
+    kept: List[Document] = []
+    used = 0
+    for doc in docs:
+        size = count(doc.page_content)
+        if used + size <= max_tokens:
+            kept.append(doc)
+            used += size
+            continue
+        remaining = max_tokens - used
+        if remaining >= MIN_TRIMMED_TOKENS:
+            kept.append(Document(
+                page_content=truncate_to_tokens(doc.page_content, remaining),
+                metadata=doc.metadata,
+            ))
+        break
+    return kept
+
+
+def assemble_context(
+    docs: List[Document],
+    max_tokens: int,
+    dedup_threshold: float = 0.85,
+    max_overlap: int = 400,
+) -> List[Document]:
+    """
+    Passages to stuff into the prompt: overlapping or adjacent chunks of the
+    same page merged, near-duplicates dropped, total size within ``max_tokens``.
+    """
+    docs = merge_adjacent(docs, max_overlap)
+    docs = drop_near_duplicates(docs, dedup_threshold)
+    return trim_to_budget(docs, max_tokens)
@@ -0,0 +1,59 @@
+"""Token-budgeted conversation memory with an optional rolling summary"""
+from typing import Callable, List
+
+from langchain.prompts import PromptTemplate
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from app.services.tokens import count_tokens
+
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["summary", "new_lines"],
+    template="""Résume de façon concise la conversation entre un pharmacien et l'assistant, en conservant les médicaments, posologies, patients et contraintes mentionnés.
+
+Résumé actuel:
+{summary}
+
+Nouveaux échanges:
+{new_lines}
+
+Nouveau résumé:"""
+)
+
+
+def select_recent_messages(
+    messages: List[BaseMessage],
+    max_turns: int,
+    token_budget: int,
+    count: Callable[[str], int] = count_tokens,
+) -> List[BaseMessage]:
+    """
+    Keep the most recent question/answer turns, at most ``max_turns`` and
+    ``token_budget`` tokens. Turns are kept whole; the latest turn is always
+    kept even when it alone exceeds the budget.
+    """
+    selected: List[BaseMessage] = []
+    used = 0
+    turns = 0
+    # Walk back two messages (one turn) at a time
+    end = len(messages)
+    while end > 0 and turns < max_turns:
+        start = max(0, end - 2)
+        turn = messages[start:end]
+        size = sum(count(message.content) for message in turn)
+        if selected and used + size > token_budget:
+            break
+        selected = turn + selected
+        used += size
+        turns += 1
+        end = start
+    return selected
+
+
+def summary_message(summary: str) -> SystemMessage:
+    """History entry standing for the summarized older turns"""
+    return SystemMessage(content=f"Résumé des échanges précédents: {summary}")
+
+
+def format_lines(messages: List[BaseMessage]) -> str:
+    roles = {"human": "Pharmacien", "ai": "Assistant"}
+    return "\n".join(f"{roles.get(m.type, m.type)}: {m.content}" for m in messages)
@@ -0,0 +1,163 @@
+"""Content-hash keyed embedding cache (in-memory LRU in front of a SQLite file)"""
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings backend and caches vectors by hash of (namespace, text).
+
+    The namespace should identify the embedding model so that switching models
+    never returns vectors of the wrong space.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        namespace: str,
+        db_path: str,
+        max_memory_entries: int = 10000,
+        executor=None,
+    ):
+        self.underlying = underlying
+        # Optional BoundedExecutor used by the async methods for SQLite access
+        self.executor = executor
+        self.namespace = namespace
+        self.max_memory_entries = max_memory_entries
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for the given keys (memory first, then disk)"""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+        return found
+
+    def _store(self, items: Dict[str, List[float]]):
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+            self._db.commit()
+
+    def _split(self, texts: List[str]):
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(list(dict.fromkeys(keys)))
+        # Unique texts that still need to be embedded
+        to_embed = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                to_embed.setdefault(key, text)
+        self.hits += len(texts) - len(to_embed)
+        self.misses += len(to_embed)
+        return keys, cached, to_embed
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, to_embed = self._split(texts)
+        if to_embed:
+            vectors = self.underlying.embed_documents(list(to_embed.values()))
+            computed = dict(zip(to_embed.keys(), vectors))
+            self._store(computed)
+            cached.update(computed)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, cached, to_embed = self._split([text])
+        if to_embed:
+            vector = self.underlying.embed_query(text)
+            self._store({keys[0]: vector})
+            return vector
+        return cached[keys[0]]
+
+    async def _run_blocking(self, fn, *args):
+        # Memory hits never touch the disk, only go through the pool otherwise
+        if self.executor is None:
+            return fn(*args)
+        return await self.executor.run(fn, *args)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if all(self._key(text) in self._memory for text in texts):
+            keys, cached, to_embed = self._split(texts)
+        else:
+            keys, cached, to_embed = await self._run_blocking(self._split, texts)
+        if to_embed:
+            vectors = await self.underlying.aembed_documents(list(to_embed.values()))
+            computed = dict(zip(to_embed.keys(), vectors))
+            await self._run_blocking(self._store, computed)
+            cached.update(computed)
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self._key(text) in self._memory:
+            keys, cached, to_embed = self._split([text])
+        else:
+            keys, cached, to_embed = await self._run_blocking(self._split, [text])
+        if to_embed:
+            vector = await self.underlying.aembed_query(text)
+            await self._run_blocking(self._store, {keys[0]: vector})
+            return vector
+        return cached[keys[0]]
+
+    def close(self):
+        """Close the SQLite file (the cache is not used afterwards)"""
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
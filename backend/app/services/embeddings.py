@@ -0,0 +1,88 @@
+"""Embedding backends selectable with settings.EMBEDDING_BACKEND"""
+import re
+from typing import Dict
+
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+
+DEFAULT_COLLECTION = "pharmabot_knowledge"
+
+
+def embedding_model_name() -> str:
+    """Model producing the vectors of the configured backend"""
+    if settings.EMBEDDING_BACKEND == "local":
+        return settings.LOCAL_EMBEDDING_MODEL
+    return settings.EMBEDDING_MODEL
+
+
+def collection_name() -> str:
+    """
+    Chroma collection of the configured backend. Vectors of different models
+    cannot share a collection, so the local backend gets its own.
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        slug = re.sub(r"[^a-z0-9]+", "_", settings.LOCAL_EMBEDDING_MODEL.rsplit("/", 1)[-1].lower())
+        return f"{DEFAULT_COLLECTION}_{slug}"[:63].strip("_")
+    return DEFAULT_COLLECTION
+
+
+def build_embeddings() -> Embeddings:
+    """
+    Embeddings client of the configured backend: "openai" (API calls) or
+    "local" (sentence-transformers model run in-process on CPU, in batches of
+    LOCAL_EMBEDDING_BATCH_SIZE, with L2-normalized vectors).
+    """
+    if settings.EMBEDDING_BACKEND == "openai":
+        if not settings.OPENAI_API_KEY:
+            raise ValueError(
+                "OPENAI_API_KEY is not configured. Please set it in your .env file or environment variables."
+            )
+        from langchain_openai import OpenAIEmbeddings
+
+        return OpenAIEmbeddings(
+            model=settings.EMBEDDING_MODEL,
+            openai_api_key=settings.OPENAI_API_KEY
+        )
+
+    if settings.EMBEDDING_BACKEND == "local":
+        try:
+            import sentence_transformers  # noqa: F401
+        except ImportError as e:
+            raise ValueError(
+                "EMBEDDING_BACKEND=local requires sentence-transformers (pip install sentence-transformers)"
+            ) from e
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(
+            model_name=settings.LOCAL_EMBEDDING_MODEL,
+            model_kwargs={"device": settings.LOCAL_EMBEDDING_DEVICE},
+            encode_kwargs={
+                "batch_size": settings.LOCAL_EMBEDDING_BATCH_SIZE,
+                "normalize_embeddings": True,
+            },
+        )
+
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {settings.EMBEDDING_BACKEND}")
+
+
+async def check_embedding_backend(timeout: float) -> Dict:
+    """
+    Readiness of the configured backend without embedding anything: the
+    OpenAI model is looked up on the API (free, unlike an embedding call,
+    which the embedding cache would answer anyway); the local model is
+    loaded when the client was built.
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        return {"status": "loaded", "model": settings.LOCAL_EMBEDDING_MODEL}
+
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, timeout=timeout, max_retries=0)
+    try:
+        await client.models.retrieve(settings.EMBEDDING_MODEL)
+    except Exception as e:
+        return {"status": "unreachable", "model": settings.EMBEDDING_MODEL, "error": str(e)}
+    finally:
+        await client.close()
+    return {"status": "reachable", "model": settings.EMBEDDING_MODEL}
@@ -0,0 +1,54 @@
+"""Dedicated bounded thread pool for blocking vector-store and embedding-cache I/O"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class BoundedExecutor:
+    """
+    Runs blocking calls off the event loop on a fixed-size thread pool and keeps
+    track of queue depth, so that slow Chroma queries never block the uvicorn
+    worker and saturation is visible in the stats.
+    """
+
+    def __init__(self, max_workers: int, name: str = "blocking-io"):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._max_queued = 0
+
+    def _wrap(self, fn: Callable, *args, **kwargs) -> Callable[[], Any]:
+        def call():
+            with self._lock:
+                self._started += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._completed += 1
+        return call
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result"""
+        with self._lock:
+            self._submitted += 1
+            self._max_queued = max(self._max_queued, self._submitted - self._started)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._wrap(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._submitted - self._started,
+                "in_flight": self._started - self._completed,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,57 @@
+"""Readiness probes, cached so load-balancer polling does not add load"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class HealthMonitor:
+    """
+    Runs the RAGService readiness checks at most once per ``ttl_seconds``.
+    Concurrent callers during a probe wait for that probe instead of
+    starting their own.
+    """
+
+    def __init__(self, registry, ttl_seconds: float = 5.0):
+        self.registry = registry
+        self.ttl_seconds = ttl_seconds
+        self._report: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._probe: Optional[asyncio.Task] = None
+
+    async def check(self) -> Dict:
+        """Latest report: ``ready`` flag, service state and per-dependency checks"""
+        if self._report is not None and time.monotonic() - self._checked_at < self.ttl_seconds:
+            return self._report
+        if self._probe is None or self._probe.done():
+            self._probe = asyncio.ensure_future(self._run())
+        return await asyncio.shield(self._probe)
+
+    def invalidate(self):
+        self._report = None
+
+    async def _run(self) -> Dict:
+        service = self.registry.current()
+        checks = await service.check_health() if service is not None else {}
+
+        if not self.registry.warmed_up or not checks:
+            state = "warming_up" if service is not None else "not_started"
+        else:
+            state = "ready"
+        ready = (
+            state == "ready"
+            and checks["database"]["status"] == "connected"
+            and checks["embeddings"]["status"] in ("reachable", "loaded")
+            and checks["sessions"]["status"] == "ok"
+        )
+        if state == "ready" and not ready:
+            state = "unavailable"
+        report = {
+            "ready": ready,
+            "rag": state,
+            "checks": checks,
+            "checked_at": datetime.utcnow().isoformat(),
+        }
+        self._report = report
+        self._checked_at = time.monotonic()
+        return report
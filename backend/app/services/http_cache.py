@@ -0,0 +1,115 @@
+"""On-disk HTTP cache for the scrapers with ETag / Last-Modified validators"""
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+
+@dataclass
+class CachedResponse:
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers turning a GET into a conditional request"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Stores response bodies as files under ``cache_dir`` with a SQLite index of
+    validators, sizes and access times. Least recently used entries are evicted
+    once the total body size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.bodies_dir = Path(cache_dir) / "http"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(Path(cache_dir) / "http_cache.sqlite3"), timeout=30, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _filename(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT filename, etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if not row:
+                return None
+            path = self.bodies_dir / row[0]
+            if not path.exists():
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+            return CachedResponse(body=path.read_text(encoding="utf-8"), etag=row[1], last_modified=row[2])
+
+    def touch(self, url: str):
+        """Mark an entry as recently used (e.g. after a 304)"""
+        with self._lock:
+            self._db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def set_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        """Store the validators of an entry put without them (once its body has been processed)"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET etag = ?, last_modified = ? WHERE url = ?", (etag, last_modified, url)
+            )
+            self._db.commit()
+
+    def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]):
+        filename = self._filename(url)
+        data = body.encode("utf-8")
+        with self._lock:
+            (self.bodies_dir / filename).write_bytes(data)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (url, filename, etag, last_modified, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, filename, etag, last_modified, len(data), time.time()),
+            )
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, filename, size in self._db.execute(
+            "SELECT url, filename, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            (self.bodies_dir / filename).unlink(missing_ok=True)
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._db.commit()
+
+    def size(self) -> int:
+        """Total size of cached bodies in bytes"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
@@ -0,0 +1,236 @@
+"""Streaming ingestion pipeline: lazy chunking, batched concurrent embedding, batched writes"""
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+import openai
+from langchain_core.embeddings import Embeddings
+
+from app.services.interaction_index import extract_interactions
+from app.services.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying with backoff when calling the embedding API
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)
+
+
+def document_key(doc: Dict) -> str:
+    """Stable identity of a document: its URL, or its title when it has none"""
+    return doc.get("url") or doc.get("title", "")
+
+
+def document_filter(doc: Dict) -> Dict:
+    """Chroma filter matching every chunk indexed for a document"""
+    if doc.get("url"):
+        return {"url": doc["url"]}
+    return {"$and": [{"url": ""}, {"title": doc.get("title", "")}]}
+
+
+def chunk_id(doc_key: str, chunk: str) -> str:
+    """Deterministic chunk ID derived from (document key, chunk content)"""
+    doc_hash = hashlib.sha1(doc_key.encode("utf-8")).hexdigest()[:16]
+    chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:32]
+    return f"{doc_hash}-{chunk_hash}"
+
+
+class IngestionPipeline:
+    """
+    Indexes documents into a Chroma collection.
+
+    Documents are chunked one at a time and diffed against the chunks already
+    stored for the same page (see chunk_id). Only new chunks are embedded, in
+    batches of ``batch_size`` with at most ``concurrency`` embedding calls in
+    flight; rate-limit errors are retried with exponential backoff. Writes are
+    batched and serialized. The lexical index, when given, is kept in sync
+    with the collection and saved at the end of the run, and so is the
+    interaction index, fed from the "Interactions" sections of each page.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embeddings: Embeddings,
+        text_splitter,
+        batch_size: int = 64,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        progress_every: int = 10,
+        executor=None,
+        lexical_index=None,
+        interaction_index=None,
+    ):
+        self.collection = collection
+        self.embeddings = embeddings
+        self.text_splitter = text_splitter
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.progress_every = progress_every
+        self.executor = executor
+        self.lexical_index = lexical_index
+        self.interaction_index = interaction_index
+
+    async def run(self, documents: Iterable[Dict]) -> Dict[str, int]:
+        """Index the documents and return added/updated/removed/unchanged chunk counts"""
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        write_lock = asyncio.Lock()
+        tasks: List[asyncio.Task] = []
+        pending: List[tuple] = []
+        # Chunk IDs produced during this run, per document key, so that a page
+        # listed twice does not delete the chunks of its first occurrence
+        claimed: Dict[str, set] = {}
+        self._started = time.monotonic()
+        self._finished = None
+        self._embedded_chunks = 0
+        self._embedded_tokens = 0
+        self._batches = 0
+
+        async def flush():
+            if not pending:
+                return
+            # Backpressure: keep a bounded number of batches in memory
+            while len(tasks) >= 2 * self.concurrency:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    task.result()
+            batch = pending[:]
+            pending.clear()
+            tasks.append(asyncio.create_task(self._embed_and_write(batch, semaphore, write_lock)))
+
+        for doc in documents:
+            key = document_key(doc)
+            metadata = {
+                "title": doc.get("title", ""),
+                "url": doc.get("url", ""),
+                "source_type": doc.get("source_type", "unknown"),
+                "category": doc.get("category", ""),
+            }
+            chunks = {}
+            for index, (chunk, extra) in enumerate(self._split(doc["content"])):
+                # chunk_index lets context assembly merge neighbouring chunks
+                chunks.setdefault(chunk_id(key, chunk), (chunk, {**metadata, **extra, "chunk_index": index}))
+
+            existing = await self._run_blocking(
+                self.collection.get, where=document_filter(doc), include=["metadatas"]
+            )
+            existing_metadatas = dict(zip(existing["ids"], existing["metadatas"]))
+            seen = claimed.setdefault(key, set())
+
+            new_ids = [cid for cid in chunks if cid not in existing_metadatas and cid not in seen]
+            changed_ids = [
+                cid for cid in chunks
+                if cid in existing_metadatas and existing_metadatas[cid] != chunks[cid][1]
+            ]
+            removed_ids = [cid for cid in existing_metadatas if cid not in chunks and cid not in seen]
+            seen.update(chunks)
+
+            async with write_lock:
+                if changed_ids:
+                    await self._run_blocking(
+                        self.collection.update,
+                        ids=changed_ids,
+                        metadatas=[chunks[cid][1] for cid in changed_ids],
+                    )
+                if removed_ids:
+                    await self._run_blocking(self.collection.delete, ids=removed_ids)
+                if self.lexical_index is not None:
+                    self.lexical_index.update_metadata(changed_ids, [chunks[cid][1] for cid in changed_ids])
+                    self.lexical_index.remove(removed_ids)
+                if self.interaction_index is not None:
+                    self.interaction_index.set_document(key, extract_interactions(
+                        metadata["title"], doc["content"], metadata["url"], metadata["source_type"]
+                    ))
+
+            counts["added"] += len(new_ids)
+            counts["updated"] += len(changed_ids)
+            counts["removed"] += len(removed_ids)
+            counts["unchanged"] += len(chunks) - len(new_ids) - len(changed_ids)
+
+            for cid in new_ids:
+                pending.append((cid, chunks[cid][0], chunks[cid][1]))
+                if len(pending) >= self.batch_size:
+                    await flush()
+
+        await flush()
+        await asyncio.gather(*tasks)
+        if self.lexical_index is not None:
+            await self._run_blocking(self.lexical_index.save)
+        if self.interaction_index is not None:
+            await self._run_blocking(self.interaction_index.save)
+        self._finished = time.monotonic()
+        self._log_progress(final=True)
+        return counts
+
+    def _split(self, content: str) -> List[tuple]:
+        """(chunk, extra metadata) pairs; section-aware splitters also tell each chunk's section"""
+        if hasattr(self.text_splitter, "split_with_metadata"):
+            return self.text_splitter.split_with_metadata(content)
+        return [(chunk, {}) for chunk in self.text_splitter.split_text(content)]
+
+    async def _embed_and_write(self, batch: List[tuple], semaphore: asyncio.Semaphore, write_lock: asyncio.Lock):
+        ids = [item[0] for item in batch]
+        texts = [item[1] for item in batch]
+        metadatas = [item[2] for item in batch]
+
+        async with semaphore:
+            vectors = await self._embed_with_retry(texts)
+
+        async with write_lock:
+            await self._run_blocking(
+                self.collection.upsert,
+                ids=ids,
+                embeddings=vectors,
+                metadatas=metadatas,
+                documents=texts,
+            )
+            if self.lexical_index is not None:
+                self.lexical_index.add(ids, texts, metadatas)
+
+        self._batches += 1
+        self._embedded_chunks += len(texts)
+        self._embedded_tokens += sum(count_tokens(text) for text in texts)
+        if self._batches % self.progress_every == 0:
+            self._log_progress()
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        if self.executor is not None:
+            return await self.executor.run(fn, *args, **kwargs)
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.embeddings.aembed_documents(texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _log_progress(self, final: bool = False):
+        stats = self.stats()
+        label = "Ingestion done" if final else "Ingestion progress"
+        logger.info(
+            f"{label}: {stats['chunks']} chunks embedded in {stats['batches']} batches "
+            f"({stats['chunks_per_second']:.1f} chunks/s, {stats['tokens_per_second']:.0f} tokens/s)"
+        )
+
+    def stats(self) -> Optional[Dict]:
+        """Throughput of the current or last run"""
+        if not hasattr(self, "_started"):
+            return None
+        elapsed = max((self._finished or time.monotonic()) - self._started, 1e-6)
+        return {
+            "chunks": self._embedded_chunks,
+            "tokens": self._embedded_tokens,
+            "batches": self._batches,
+            "chunks_per_second": self._embedded_chunks / elapsed,
+            "tokens_per_second": self._embedded_tokens / elapsed,
+        }
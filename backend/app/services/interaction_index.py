@@ -0,0 +1,322 @@
+"""Pairwise drug interaction index extracted from the "Interactions" sections of monographs"""
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from langchain_core.documents import Document
+
+from app.services.context import merge_adjacent
+from app.services.lexical_index import fold, tokenize
+from app.services.sections import INTERACTION_LEVEL_RE, split_sections
+
+logger = logging.getLogger(__name__)
+
+_BULLET_RE = re.compile(r"^[-•*·]\s*")
+_PARTNER_SPLIT_RE = re.compile(r"(?<!\d),|,(?!\d)|;|/|\bet\b")
+
+# Start of the conditions qualifying a partner ("Méthotrexate à des doses
+# supérieures à 20 mg par semaine", "AINS chez le sujet âgé")
+_QUALIFIER_RE = re.compile(
+    r"\s+(?:(?:à|a|aux?|en|par|pour)\s+(?:des?|du|la|les|une?|fortes?|faibles?|cas|voie|doses?|posologies?|association)\b"
+    r"|(?:chez|lorsque|si)\b|\(|\d)",
+    re.IGNORECASE
+)
+
+# Words that do not name the drug ("Autres AINS", "Amoxicilline 500 mg gélule")
+_FILLER_WORDS = {
+    "autre", "autres", "mg", "g", "ug", "ml", "ui", "cp", "comprime", "comprimes", "gelule", "gelules",
+    "sachet", "sachets", "sirop", "solution", "buvable", "injectable", "pellicule", "effervescent", "lp",
+}
+
+# Class heads too generic to stand for their class ("Inhibiteurs de la pompe à
+# protons" and "Inhibiteurs calciques" share nothing)
+_GENERIC_HEADS = {
+    "inhibiteur", "antagoniste", "agoniste", "autre", "medicament", "substance", "derive", "produit",
+    "association", "traitement",
+}
+
+# Bumped when extraction changes, older files are then rebuilt from the chunks
+INDEX_VERSION = 2
+
+# Partners with more significant words (qualifiers removed) are prose, not drug or class names
+MAX_PARTNER_WORDS = 5
+
+
+@dataclass
+class Interaction:
+    drug: str  # Drug of the monograph
+    partner: str  # Drug or class as written in its "Interactions" section
+    description: str
+    title: str
+    url: str
+    source_type: str
+    level: str = ""  # Severity sub-heading, when the section has them
+
+
+def interaction_key(name: str) -> str:
+    """Folded, singular drug or class name without dosage ("Anticoagulants oraux 5 mg" -> "anticoagulant oraux")"""
+    words = [
+        word[:-1] if word.endswith("s") and len(word) > 3 else word
+        for word in tokenize(name)
+        if word not in _FILLER_WORDS and not any(c.isdigit() for c in word)
+    ]
+    return " ".join(words)
+
+
+def _partner_keys(name: str) -> Set[str]:
+    """
+    Keys of a partner: its name, and for multi-word class names their head
+    word ("anticoagulant" for "Anticoagulants oraux") unless it is generic.
+    Prescribed drugs are only looked up by their own name.
+    """
+    key = interaction_key(name)
+    keys = {key}
+    head = key.split(" ", 1)[0]
+    if head != key and len(head) >= 6 and head not in _GENERIC_HEADS:
+        keys.add(head)
+    keys.discard("")
+    return keys
+
+
+def split_qualifier(partner: str) -> Tuple[str, str]:
+    """Partner name and its qualifying conditions ("Méthotrexate à des doses > 20 mg" -> "Méthotrexate", "à des doses > 20 mg")"""
+    match = _QUALIFIER_RE.search(partner)
+    if not match:
+        return partner, ""
+    return partner[:match.start()].strip(), partner[match.start():].strip()
+
+
+def drug_names(title: str, url: str = "") -> List[str]:
+    """Names of the drug of a monograph ("Aspirine (Acide acétylsalicylique) - AINS" -> aspirine, acide acétylsalicylique)"""
+    head = title.split(" - ", 1)[0]
+    names = [re.sub(r"\(.*?\)", " ", head).strip()]
+    names += re.findall(r"\((.*?)\)", head)
+    slug = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    if slug:
+        names.append(slug.replace("-", " ").replace("_", " "))
+    return [name.strip() for name in names if name.strip()]
+
+
+def extract_interactions(title: str, content: str, url: str = "", source_type: str = "") -> List[Interaction]:
+    """
+    Entries of the "Interactions" sections of a monograph (see sections):
+    one per partner of each line ("Anticoagulants, antiagrégants" gives
+    two), with the text after the colon as description.
+    """
+    names = drug_names(title, url)
+    drug = names[0] if names else title
+    interactions = []
+    seen = set()
+    for section in split_sections(content):
+        if section.name != "interactions":
+            continue
+        level = ""
+        for line in section.text.splitlines()[1:]:
+            line = _BULLET_RE.sub("", line.strip().lstrip("#").strip())
+            if not line:
+                continue
+            if INTERACTION_LEVEL_RE.match(fold(line.rstrip(" :"))):
+                level = line.rstrip(" :")
+                continue
+            partners, _, description = line.partition(":")
+            description = description.strip()
+            if not description and line.endswith(":"):
+                continue  # Unknown sub-heading
+            for partner in _PARTNER_SPLIT_RE.split(partners):
+                # Conditions ("à des doses supérieures à 20 mg") go to the description
+                partner, qualifier = split_qualifier(partner.strip(" ."))
+                partner = partner.strip(" .")
+                if not partner or len(tokenize(partner)) > MAX_PARTNER_WORDS:
+                    continue
+                partner_description = f"{qualifier}: {description}" if qualifier and description else qualifier or description
+                if (fold(partner), partner_description) in seen:
+                    continue
+                seen.add((fold(partner), partner_description))
+                interactions.append(Interaction(
+                    drug=drug,
+                    partner=partner,
+                    description=partner_description,
+                    title=title,
+                    url=url,
+                    source_type=source_type,
+                    level=level,
+                ))
+    return interactions
+
+
+class InteractionIndex:
+    """
+    Interactions by unordered pair of drug (or class) keys, so that checking
+    a list of n medications takes n(n-1)/2 dict lookups and no model call.
+
+    Entries are kept per document (replaced when the document is re-indexed)
+    and saved as JSON at ``path``; ``reload_if_changed`` picks up a file
+    rewritten by another process (e.g. the scraping script).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self._documents: Dict[str, List[Interaction]] = {}
+        self._pairs: Dict[Tuple[str, str], List[Interaction]] = defaultdict(list)
+        # Number of pairs each drug or partner key is part of
+        self._known: Dict[str, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        """Number of documents with interactions"""
+        return len(self._documents)
+
+    def pair_count(self) -> int:
+        return len(self._pairs)
+
+    def set_document(self, key: str, interactions: List[Interaction]):
+        """Replace the interactions extracted from a document"""
+        with self._lock:
+            previous = self._documents.get(key, [])
+            if previous == interactions:
+                return
+            self._unindex(previous)
+            self._documents.pop(key, None)
+            if interactions:
+                self._documents[key] = interactions
+                self._index(interactions)
+
+    def remove_document(self, key: str):
+        self.set_document(key, [])
+
+    @staticmethod
+    def _pair_keys(interaction: Interaction) -> Set[Tuple[str, str]]:
+        drug_keys = {interaction_key(name) for name in drug_names(interaction.title, interaction.url)}
+        drug_keys.discard("")
+        return {
+            (min(a, b), max(a, b))
+            for a, b in itertools.product(drug_keys, _partner_keys(interaction.partner))
+            if a != b
+        }
+
+    def _index(self, interactions: Iterable[Interaction]):
+        for interaction in interactions:
+            for pair in self._pair_keys(interaction):
+                if pair not in self._pairs:
+                    for key in pair:
+                        self._known[key] += 1
+                self._pairs[pair].append(interaction)
+
+    def _unindex(self, interactions: Iterable[Interaction]):
+        for interaction in interactions:
+            for pair in self._pair_keys(interaction):
+                remaining = [entry for entry in self._pairs.get(pair, ()) if entry is not interaction]
+                if remaining:
+                    self._pairs[pair] = remaining
+                elif self._pairs.pop(pair, None) is not None:
+                    for key in pair:
+                        self._known[key] -= 1
+                        if not self._known[key]:
+                            del self._known[key]
+
+    def _reindex(self):
+        self._pairs = defaultdict(list)
+        self._known = defaultdict(int)
+        for interactions in self._documents.values():
+            self._index(interactions)
+
+    def unrecognized(self, medications: List[str]) -> List[str]:
+        """
+        Medications matching no drug or partner of the index: their
+        interactions could not be checked, which is not the same as none
+        """
+        with self._lock:
+            return [name for name in medications if interaction_key(name) not in self._known]
+
+    def check(self, medications: List[str]) -> List[Dict]:
+        """Interactions found between every pair of ``medications``, in list order"""
+        keys = [interaction_key(name) for name in medications]
+        found = []
+        with self._lock:
+            for (i, first), (j, second) in itertools.combinations(enumerate(medications), 2):
+                a, b = keys[i], keys[j]
+                hits = self._pairs.get((min(a, b), max(a, b)), ()) if a and b and a != b else ()
+                if hits:
+                    found.append({"drugs": [first, second], "findings": [asdict(hit) for hit in hits]})
+        return found
+
+    def rebuild(self, lexical_index, max_overlap: int = 400):
+        """Re-extract the interactions of every document from the chunks of the lexical index"""
+        pages: Dict[str, List[Document]] = defaultdict(list)
+        for cid, metadata in lexical_index.chunks():
+            chunk = lexical_index.get(cid)
+            if chunk:
+                pages[metadata.get("url") or metadata.get("title", "")].append(
+                    Document(page_content=chunk[0], metadata=metadata)
+                )
+        with self._lock:
+            self._documents = {}
+            self._pairs = defaultdict(list)
+            self._known = defaultdict(int)
+            for key, chunks in pages.items():
+                chunks.sort(key=lambda doc: doc.metadata.get("chunk_index", 0))
+                # Neighbouring chunks are stitched back into the page
+                text = "\n".join(doc.page_content for doc in merge_adjacent(chunks, max_overlap))
+                metadata = chunks[0].metadata
+                self.set_document(key, extract_interactions(
+                    metadata.get("title", ""), text, metadata.get("url", ""), metadata.get("source_type", "")
+                ))
+        logger.info(f"Interaction index rebuilt: {len(self)} documents, {self.pair_count()} pairs")
+
+    def save(self):
+        """Write the index to ``path`` (atomically)"""
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"version": INDEX_VERSION, "documents": {
+                key: [asdict(interaction) for interaction in interactions]
+                for key, interactions in self._documents.items()
+            }}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._loaded_mtime = self.path.stat().st_mtime
+
+    def load(self) -> bool:
+        """Replace the index with the content of ``path``; False when there is no file or it is outdated"""
+        if not self.path or not self.path.exists():
+            return False
+        mtime = self.path.stat().st_mtime
+        with open(self.path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != INDEX_VERSION:
+            logger.info(f"Interaction index {self.path} is outdated, it will be rebuilt")
+            return False
+        documents = payload["documents"]
+        with self._lock:
+            self._documents = {
+                key: [Interaction(**entry) for entry in entries]
+                for key, entries in documents.items()
+            }
+            self._reindex()
+            self._loaded_mtime = mtime
+        return True
+
+    def has_changed(self) -> bool:
+        """Whether another process rewrote the index file since it was loaded or saved"""
+        if not self.path:
+            return False
+        try:
+            return self.path.stat().st_mtime != self._loaded_mtime
+        except FileNotFoundError:
+            return False
+
+    def reload_if_changed(self):
+        if self.has_changed():
+            self.load()
@@ -0,0 +1,203 @@
+"""In-process BM25 index of the chunks stored in Chroma"""
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Common French words (accent-folded) and elided forms carrying no meaning
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette d dans de des du elle en et eux il ils je l la le les leur leurs
+lui m ma mais me meme mes moi mon n ne nos notre nous on ou par pas pour qu que qui s sa se ses
+son sur t ta te tes toi ton tu un une vos votre vous y est sont ete etre avoir ont c j
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)?")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Éfferalgan" -> "efferalgan")"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """French-aware tokens: accent folded, stopwords dropped, decimals kept ("2,5")"""
+    return [
+        token.replace(",", ".")
+        for token in _TOKEN_RE.findall(fold(text))
+        if token not in STOPWORDS
+    ]
+
+
+def _matches(metadata: Dict, where: Optional[Dict]) -> bool:
+    return not where or all(metadata.get(key) == value for key, value in where.items())
+
+
+class LexicalIndex:
+    """
+    Inverted index with BM25 scoring over chunk texts, keyed by the same chunk
+    IDs as the Chroma collection. Chunk texts and metadata are kept so that
+    lexical hits can be returned without querying Chroma.
+
+    The index lives in memory and is saved as gzipped JSON at ``path``;
+    ``reload_if_changed`` picks up a file rewritten by another process (e.g.
+    the scraping script). ``version`` changes on every modification so that
+    derived indexes (see title_index) know when to rebuild.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self._docs: Dict[str, Tuple[str, Dict]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._docs
+
+    def add(self, ids: Iterable[str], texts: Iterable[str], metadatas: Iterable[Dict]):
+        """Index (or re-index) chunks"""
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                if chunk_id in self._docs:
+                    self._remove(chunk_id)
+                terms = Counter(tokenize(text))
+                self._docs[chunk_id] = (text, metadata or {})
+                self._lengths[chunk_id] = sum(terms.values())
+                self._total_length += self._lengths[chunk_id]
+                for term, tf in terms.items():
+                    self._postings[term][chunk_id] = tf
+            self.version += 1
+
+    def update_metadata(self, ids: Iterable[str], metadatas: Iterable[Dict]):
+        with self._lock:
+            for chunk_id, metadata in zip(ids, metadatas):
+                if chunk_id in self._docs:
+                    self.add([chunk_id], [self._docs[chunk_id][0]], [metadata])
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in ids:
+                if chunk_id in self._docs:
+                    self._remove(chunk_id)
+            self.version += 1
+
+    def _remove(self, chunk_id: str):
+        text, _ = self._docs.pop(chunk_id)
+        self._total_length -= self._lengths.pop(chunk_id)
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def get(self, chunk_id: str) -> Optional[Tuple[str, Dict]]:
+        """Text and metadata of a chunk"""
+        return self._docs.get(chunk_id)
+
+    def chunks(self) -> List[Tuple[str, Dict]]:
+        """(chunk ID, metadata) of every indexed chunk, in insertion order"""
+        with self._lock:
+            return [(cid, metadata) for cid, (_, metadata) in self._docs.items()]
+
+    def search(self, query: str, k: int = 10, where: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """Best ``k`` chunk IDs by BM25 score, optionally filtered on metadata equality"""
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._docs)
+            if not terms or not count:
+                return []
+            avg_length = self._total_length / count
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            if where:
+                scores = {cid: s for cid, s in scores.items() if _matches(self._docs[cid][1], where)}
+            return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def rebuild(self, collection, batch_size: int = 5000):
+        """Re-index every chunk of a Chroma collection"""
+        with self._lock:
+            self._reset()
+            offset = 0
+            while True:
+                batch = collection.get(
+                    include=["documents", "metadatas"], limit=batch_size, offset=offset
+                )
+                if not batch["ids"]:
+                    break
+                self.add(batch["ids"], batch["documents"], batch["metadatas"])
+                offset += len(batch["ids"])
+        logger.info(f"Lexical index rebuilt with {len(self)} chunks")
+
+    def save(self):
+        """Write the index to ``path`` (atomically)"""
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"docs": {cid: [text, metadata] for cid, (text, metadata) in self._docs.items()}}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._loaded_mtime = self.path.stat().st_mtime
+
+    def load(self) -> bool:
+        """Replace the index with the content of ``path``; False when there is no file"""
+        if not self.path or not self.path.exists():
+            return False
+        mtime = self.path.stat().st_mtime
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            docs = json.load(f)["docs"]
+        # Build aside and swap, so that searches are not blocked meanwhile
+        fresh = LexicalIndex(k1=self.k1, b=self.b)
+        fresh.add(docs.keys(), (d[0] for d in docs.values()), (d[1] for d in docs.values()))
+        with self._lock:
+            self._docs, self._lengths = fresh._docs, fresh._lengths
+            self._postings, self._total_length = fresh._postings, fresh._total_length
+            self.version += 1
+            self._loaded_mtime = mtime
+        return True
+
+    def has_changed(self) -> bool:
+        """Whether another process rewrote the index file since it was loaded or saved"""
+        if not self.path:
+            return False
+        try:
+            return self.path.stat().st_mtime != self._loaded_mtime
+        except FileNotFoundError:
+            return False
+
+    def reload_if_changed(self):
+        if self.has_changed():
+            self.load()
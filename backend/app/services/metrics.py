@@ -0,0 +1,113 @@
+"""Prometheus metrics and per-request stage timings"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "pharmabot_stage_duration_seconds",
+    "Duration of request processing stages (embedding, vector_search, condense, first_token, generation, ...)",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+HTTP_SECONDS = Histogram(
+    "pharmabot_http_request_duration_seconds",
+    "HTTP request duration until the last byte of the response",
+    ["method", "route", "status"],
+    buckets=_BUCKETS,
+)
+LLM_TOKENS = Counter("pharmabot_llm_tokens", "OpenAI chat tokens", ["kind"])
+LLM_COST = Counter("pharmabot_llm_cost_dollars", "Estimated OpenAI chat cost")
+CHAT_RESPONSES = Counter(
+    "pharmabot_chat_responses", "Chat responses by how they were produced", ["path"]
+)
+
+# Stage durations (ms) of the request being handled, for the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> Dict[str, float]:
+    """Collect the stage timings of the current request (and its child tasks)"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+
+@contextmanager
+def measure(stage: str) -> Iterator[None]:
+    """Time a block as ``stage``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def record_timings(timings: Dict[str, float]):
+    """Observe the per-stage timings (ms) reported in chat responses"""
+    for stage, ms in timings.items():
+        observe_stage(stage, ms / 1000)
+
+
+def record_tokens(prompt: int, completion: int, cost: float = 0.0):
+    LLM_TOKENS.labels("prompt").inc(prompt)
+    LLM_TOKENS.labels("completion").inc(completion)
+    if cost:
+        LLM_COST.inc(cost)
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Server-Timing header value ("retrieval;dur=12.3, generation;dur=850.0")"""
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
+
+
+class ServiceCollector:
+    """
+    Reads cache hit counts, queue depths and session counts from the running
+    RAGService at scrape time. Nothing is reported before the service exists.
+    """
+
+    def __init__(self, get_service: Callable[[], Optional[object]]):
+        self.get_service = get_service
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        service = self.get_service()
+        if service is None:
+            return
+        stats = service.runtime_stats()
+
+        for cache in ("answer_cache", "embedding_cache"):
+            if stats.get(cache):
+                for outcome in ("hits", "misses"):
+                    counter = CounterMetricFamily(f"pharmabot_{cache}_{outcome}", f"{cache} {outcome}")
+                    counter.add_metric([], stats[cache][outcome])
+                    yield counter
+
+        queued = GaugeMetricFamily("pharmabot_executor_queued", "Calls waiting for a thread", labels=["pool"])
+        in_flight = GaugeMetricFamily("pharmabot_executor_in_flight", "Calls running on a thread", labels=["pool"])
+        for pool in ("executor", "reranker"):
+            if stats.get(pool):
+                queued.add_metric([pool], stats[pool]["queued"])
+                if "in_flight" in stats[pool]:
+                    in_flight.add_metric([pool], stats[pool]["in_flight"])
+        yield queued
+        yield in_flight
+
+        sessions = GaugeMetricFamily("pharmabot_sessions", "Conversation sessions held")
+        sessions.add_metric([], stats["sessions"]["sessions"])
+        yield sessions
@@ -1,6 +1,10 @@
+import asyncio
+import logging
 import sys
+import time
 import uuid
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple
 
 # Ensure chromadb uses pysqlite3 on macOS to avoid sqlite segmentation faults
 try:  # pragma: no cover - best effort fallback
@@ -11,41 +15,251 @@ try:  # pragma: no cover - best effort fallback
 except ImportError:
     pass
 
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
+from langchain.chains.conversational_retrieval.base import _get_chat_history
 from langchain.prompts import PromptTemplate
+from langchain_core.documents import Document
+from langchain_community.callbacks import get_openai_callback
 from app.config import settings
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.condense import needs_condensation
+from app.services.context import assemble_context
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.embeddings import build_embeddings, check_embedding_backend, collection_name, embedding_model_name
+from app.services.executor import BoundedExecutor
+from app.services.ingestion import IngestionPipeline
+from app.services.interaction_index import InteractionIndex
+from app.services.lexical_index import LexicalIndex
+from app.services.metrics import CHAT_RESPONSES, record_timings, record_tokens
+from app.services.reranker import CrossEncoderReranker
+from app.services.retriever import PharmaRetriever
+from app.services.sections import SectionTextSplitter
+from app.services.snapshot import export_snapshot, import_snapshot
+from app.services.shards import (
+    SHARD_FIELDS,
+    ShardedChroma,
+    ShardedCollection,
+    hnsw_metadata,
+    migrate_collection,
+    open_collection,
+    shard_names,
+)
+from app.services.session_store import build_session_store
+from app.services.title_index import TitleIndex, is_document_request
+from app.services.tokens import count_tokens, token_cost
+from app.services.conversation_memory import (
+    SUMMARY_PROMPT,
+    format_lines,
+    select_recent_messages,
+    summary_message,
+)
 import chromadb
 
+logger = logging.getLogger(__name__)
+
+# Custom prompt for pharmaceutical context
+QA_PROMPT = PromptTemplate(
+    input_variables=["context", "question", "chat_history"],
+    template="""Tu es un assistant IA spécialisé pour les pharmaciens. Tu dois répondre uniquement en te basant sur les informations officielles du Vidal et de Meddispar fournies ci-dessous.
+
+RÈGLES IMPORTANTES:
+1. Réponds UNIQUEMENT avec les informations contenues dans le contexte fourni
+2. Si tu ne trouves pas l'information dans le contexte, dis clairement "Je n'ai pas trouvé cette information dans les bases Vidal ou Meddispar"
+3. Cite toujours tes sources (Vidal ou Meddispar)
+4. Utilise un langage professionnel adapté aux pharmaciens
+5. En cas de doute, recommande de consulter directement les bases officielles
+6. N'invente JAMAIS d'informations médicales
+7. Rappelle que cet assistant est un outil d'aide à la décision et ne remplace pas le jugement professionnel
+
+Contexte des bases officielles:
+{context}
+
+Historique de conversation:
+{chat_history}
+
+Question du pharmacien: {question}
+
+Réponse basée uniquement sur les sources officielles:"""
+)
+
+# Explanation of the interactions found for a prescription
+INTERACTION_PROMPT = PromptTemplate(
+    input_variables=["medications", "findings"],
+    template="""Tu es un assistant IA spécialisé pour les pharmaciens. Voici les interactions relevées dans les bases Vidal et Meddispar pour une prescription.
+
+Médicaments: {medications}
+
+Interactions relevées:
+{findings}
+
+Explique brièvement au pharmacien le risque de chaque interaction et la conduite à tenir, en te basant uniquement sur ces informations et en citant la source. N'invente JAMAIS d'informations médicales.
+
+Explication:"""
+)
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
 class RAGService:
     def __init__(self):
         # Lazy initialization - clients created on first use
         self._embeddings = None
         self._llm = None
+        self._condense_llm = None
         self._vectorstore = None
+        self._collection = None
+        self._lexical_index = None
+        self._interaction_index = None
+        self._retriever = None
+        self._qa_chain = None
         self._initialized = False
         
-        # Session memory storage
-        self.sessions = {}
+        # Blocking Chroma / embedding-cache calls run here, off the event loop
+        self.executor = BoundedExecutor(max_workers=settings.VECTOR_STORE_THREADS)
+        
+        # Conversation history storage (bounded, see session_store)
+        self.sessions = build_session_store()
+        self._summary_llm = None
+        self._summarizing = set()
+        self._background_tasks = set()
+        
+        # Optional second stage re-scoring over-fetched candidates
+        self.reranker = None
+        if settings.RERANK_ENABLED:
+            self.reranker = CrossEncoderReranker(
+                settings.RERANK_MODEL,
+                batch_size=settings.RERANK_BATCH_SIZE,
+                device=settings.RERANK_DEVICE
+            )
+        
+        # Pipeline of the last indexing run (throughput reporting)
+        self.ingestion = None
+        
+        # Answers to first-turn questions, matched by embedding similarity
+        self.answer_cache = None
+        if settings.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS
+            )
         
     def _ensure_initialized(self):
-        """Lazy initialization of OpenAI and Chroma clients"""
+        """
+        Lazy initialization of the embedding, Chroma and OpenAI clients.
+        
+        Search only needs the embedding backend; the LLMs (and therefore chat)
+        are only available when OPENAI_API_KEY is set.
+        """
         if self._initialized:
             return
         
-        if not settings.OPENAI_API_KEY:
-            raise ValueError(
-                "OPENAI_API_KEY is not configured. Please set it in your .env file or environment variables."
+        self._embeddings = build_embeddings()
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self._embeddings = CachedEmbeddings(
+                self._embeddings,
+                namespace=embedding_model_name(),
+                db_path=settings.EMBEDDING_CACHE_PATH,
+                max_memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+                executor=self.executor
             )
         
-        self._embeddings = OpenAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
+        # Initialize ChromaDB with new API
+        chroma_client = chromadb.PersistentClient(
+            path=settings.CHROMA_DB_PATH
+        )
+        
+        hnsw = {
+            "space": settings.HNSW_SPACE,
+            "m": settings.HNSW_M,
+            "construction_ef": settings.HNSW_CONSTRUCTION_EF,
+            "search_ef": settings.HNSW_SEARCH_EF
+        }
+        if settings.SHARDING not in SHARD_FIELDS:
+            raise ValueError(f"Unknown SHARDING: {settings.SHARDING}")
+        if SHARD_FIELDS[settings.SHARDING]:
+            sharded = ShardedCollection(
+                chroma_client,
+                base_name=collection_name(),
+                fields=SHARD_FIELDS[settings.SHARDING],
+                hnsw=hnsw,
+                overrides=settings.HNSW_SHARD_OVERRIDES,
+                max_workers=settings.SHARD_QUERY_THREADS,
+                refresh_seconds=settings.SHARD_REFRESH_SECONDS
+            )
+            # First sharded start: move the vectors of the single collection
+            migrate_collection(chroma_client, collection_name(), sharded)
+            # The unsharded collection is not created when sharding is on
+            self._vectorstore = ShardedChroma(chroma_client, sharded, self._embeddings)
+            self._collection = sharded
+        else:
+            shards = shard_names(chroma_client, collection_name())
+            if shards:
+                logger.warning(
+                    f"SHARDING is none but {len(shards)} shards of {collection_name()} exist "
+                    f"({', '.join(shards)}); their chunks are not searched"
+                )
+            open_collection(chroma_client, collection_name(), hnsw_metadata(**hnsw))
+            self._vectorstore = Chroma(
+                client=chroma_client,
+                collection_name=collection_name(),
+                embedding_function=self._embeddings,
+            )
+            self._collection = self._vectorstore._collection
+        
+        # New environments start from a snapshot instead of a full crawl
+        restored = False
+        if settings.SNAPSHOT_PATH and not self._collection.count():
+            restored = self._restore_snapshot(settings.SNAPSHOT_PATH)
+        
+        # BM25 index over the same chunks, rebuilt when it is missing or stale
+        self._lexical_index = LexicalIndex(settings.LEXICAL_INDEX_PATH)
+        self._lexical_index.load()
+        if restored or len(self._lexical_index) != self._collection.count():
+            self._lexical_index.rebuild(self._collection)
+            self._lexical_index.save()
+        
+        # Interaction pairs, extracted again from the indexed pages when missing
+        self._interaction_index = InteractionIndex(settings.INTERACTION_INDEX_PATH)
+        if (restored or not self._interaction_index.load()) and len(self._lexical_index):
+            self._interaction_index.rebuild(self._lexical_index, max_overlap=2 * settings.CHUNK_OVERLAP)
+            self._interaction_index.save()
+        
+        self._retriever = PharmaRetriever(
+            vectorstore=self._vectorstore,
+            collection=self._collection,
+            executor=self.executor,
+            k=settings.TOP_K_RESULTS,
+            lexical_index=self._lexical_index,
+            title_index=TitleIndex(self._lexical_index, fuzzy_cutoff=settings.TITLE_MATCH_CUTOFF),
+            mode=settings.SEARCH_MODE,
+            candidates=settings.HYBRID_CANDIDATES,
+            section_boost=settings.SECTION_BOOST
         )
         
+        if settings.OPENAI_API_KEY:
+            self._init_llms()
+        
+        self._initialized = True
+    
+    def _restore_snapshot(self, path: str) -> bool:
+        """Import the snapshot at ``path`` into the empty store; a missing or unusable snapshot is only logged"""
+        if not Path(path).exists():
+            logger.warning(f"Snapshot {path} not found, starting with an empty vector store")
+            return False
+        try:
+            manifest = import_snapshot(path, self._collection, embedding_model_name())
+        except ValueError as e:
+            logger.error(f"Snapshot {path} not imported: {e}")
+            return False
+        logger.info(f"Vector store restored from {path} ({manifest['count']} chunks, {manifest['created_at']})")
+        return True
+    
+    def _init_llms(self):
+        """Create the OpenAI chat models and compile the retrieval chain"""
         self._llm = ChatOpenAI(
             model=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
@@ -53,18 +267,54 @@ class RAGService:
             openai_api_key=settings.OPENAI_API_KEY
         )
         
-        # Initialize ChromaDB with new API
-        chroma_client = chromadb.PersistentClient(
-            path=settings.CHROMA_DB_PATH
-        )
+        # Rephrasing follow-up questions is a short task, a cheaper model will do
+        self._condense_llm = self._llm
+        if settings.CONDENSE_LLM_MODEL and settings.CONDENSE_LLM_MODEL != settings.LLM_MODEL:
+            self._condense_llm = ChatOpenAI(
+                model=settings.CONDENSE_LLM_MODEL,
+                temperature=0,
+                max_tokens=200,
+                openai_api_key=settings.OPENAI_API_KEY
+            )
         
-        self._vectorstore = Chroma(
-            client=chroma_client,
-            collection_name="pharmabot_knowledge",
-            embedding_function=self._embeddings,
-        )
+        if settings.MEMORY_SUMMARY_ENABLED:
+            self._summary_llm = ChatOpenAI(
+                model=settings.MEMORY_SUMMARY_MODEL,
+                temperature=0,
+                max_tokens=500,
+                openai_api_key=settings.OPENAI_API_KEY
+            )
         
-        self._initialized = True
+        # Compile the retrieval chain once; conversation history is passed
+        # per call instead of binding a memory object to the chain
+        self._qa_chain = ConversationalRetrievalChain.from_llm(
+            llm=self._llm,
+            retriever=self._retriever,
+            condense_question_llm=self._condense_llm,
+            return_source_documents=True,
+            combine_docs_chain_kwargs={"prompt": QA_PROMPT}
+        )
+    
+    def _require_llm(self):
+        if self._qa_chain is None:
+            raise ValueError(
+                "OPENAI_API_KEY is not configured. Please set it in your .env file or environment variables."
+            )
+    
+    def warm_up(self):
+        """
+        Eagerly create clients, open the collection and embed a dummy query
+        (which also loads the local embedding model into memory)
+        """
+        self._ensure_initialized()
+        self._collection.count()
+        # Straight to the backend: the embedding cache would answer from disk
+        embeddings = self._embeddings
+        if isinstance(embeddings, CachedEmbeddings):
+            embeddings = embeddings.underlying
+        embeddings.embed_query("warm-up")
+        if self.reranker is not None:
+            self.reranker.warm_up()
     
     @property
     def embeddings(self):
@@ -74,6 +324,7 @@ class RAGService:
     @property
     def llm(self):
         self._ensure_initialized()
+        self._require_llm()
         return self._llm
     
     @property
@@ -81,32 +332,32 @@ class RAGService:
         self._ensure_initialized()
         return self._vectorstore
     
+    @property
+    def collection(self):
+        """Chroma collection of the chunks (a ShardedCollection when SHARDING is set)"""
+        self._ensure_initialized()
+        return self._collection
+    
+    @property
+    def retriever(self) -> PharmaRetriever:
+        self._ensure_initialized()
+        return self._retriever
+    
+    @property
+    def interaction_index(self) -> InteractionIndex:
+        self._ensure_initialized()
+        return self._interaction_index
+    
+    @property
+    def qa_chain(self) -> ConversationalRetrievalChain:
+        self._ensure_initialized()
+        self._require_llm()
+        return self._qa_chain
+    
     @property
     def qa_prompt(self):
         """Custom prompt for pharmaceutical context"""
-        return PromptTemplate(
-            input_variables=["context", "question", "chat_history"],
-            template="""Tu es un assistant IA spécialisé pour les pharmaciens. Tu dois répondre uniquement en te basant sur les informations officielles du Vidal et de Meddispar fournies ci-dessous.
-
-RÈGLES IMPORTANTES:
-1. Réponds UNIQUEMENT avec les informations contenues dans le contexte fourni
-2. Si tu ne trouves pas l'information dans le contexte, dis clairement "Je n'ai pas trouvé cette information dans les bases Vidal ou Meddispar"
-3. Cite toujours tes sources (Vidal ou Meddispar)
-4. Utilise un langage professionnel adapté aux pharmaciens
-5. En cas de doute, recommande de consulter directement les bases officielles
-6. N'invente JAMAIS d'informations médicales
-7. Rappelle que cet assistant est un outil d'aide à la décision et ne remplace pas le jugement professionnel
-
-Contexte des bases officielles:
-{context}
-
-Historique de conversation:
-{chat_history}
-
-Question du pharmacien: {question}
-
-Réponse basée uniquement sur les sources officielles:"""
-        )
+        return QA_PROMPT
     
     async def generate_response(
         self,
@@ -120,32 +371,353 @@ Réponse basée uniquement sur les sources officielles:"""
         if not session_id:
             session_id = str(uuid.uuid4())
         
-        if session_id not in self.sessions:
-            self.sessions[session_id] = ConversationBufferMemory(
-                memory_key="chat_history",
-                return_messages=True,
-                output_key="answer"
-            )
+        history = await self._get_history(session_id)
+        timings = {}
         
-        memory = self.sessions[session_id]
+        direct = await self._title_answer(query, timings)
+        if direct:
+            response, sources = direct
+            await self._save_turn(session_id, query, response)
+            CHAT_RESPONSES.labels("title").inc()
+            record_timings(timings)
+            return {
+                "response": response,
+                "sources": sources,
+                "session_id": session_id,
+                "tokens_used": 0,
+                "cached": False,
+                "timings": timings
+            }
         
-        # Create retrieval chain
-        qa_chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.vectorstore.as_retriever(
-                search_kwargs={"k": settings.TOP_K_RESULTS}
-            ),
-            memory=memory,
-            return_source_documents=True,
-            combine_docs_chain_kwargs={"prompt": self.qa_prompt}
+        # Answers only depend on the question when there is no history yet
+        query_embedding = None
+        if self.answer_cache is not None and not history:
+            started = time.perf_counter()
+            await self._sync_answer_cache()
+            query_embedding = await self.embeddings.aembed_query(query)
+            cached = self.answer_cache.lookup(query_embedding, query)
+            timings["cache_lookup"] = _elapsed_ms(started)
+            if cached:
+                await self._save_turn(session_id, query, cached["response"])
+                CHAT_RESPONSES.labels("answer_cache").inc()
+                record_timings(timings)
+                return {
+                    **cached,
+                    "session_id": session_id,
+                    "tokens_used": 0,
+                    "cached": True,
+                    "timings": timings
+                }
+        
+        # Generate response (token usage reported by OpenAI through the callback)
+        chat_history = _get_chat_history(history)
+        with get_openai_callback() as usage:
+            question, docs = await self._retrieve(query, chat_history, timings)
+            started = time.perf_counter()
+            combine_docs_chain = self.qa_chain.combine_docs_chain
+            result = await combine_docs_chain.ainvoke({
+                "input_documents": docs,
+                "question": question,
+                "chat_history": chat_history
+            })
+            response = result[combine_docs_chain.output_key]
+            timings["generation"] = _elapsed_ms(started)
+        await self._save_turn(session_id, query, response)
+        
+        sources = self._format_sources(docs)
+        if query_embedding is not None:
+            self.answer_cache.store(query, query_embedding, {
+                "response": response,
+                "sources": sources
+            })
+        
+        CHAT_RESPONSES.labels("llm").inc()
+        record_tokens(usage.prompt_tokens, usage.completion_tokens, usage.total_cost)
+        record_timings(timings)
+        logger.debug(f"Response timings (ms): {timings}")
+        return {
+            "response": response,
+            "sources": sources,
+            "session_id": session_id,
+            "tokens_used": usage.total_tokens,
+            "cached": False,
+            "timings": timings
+        }
+    
+    async def stream_response(
+        self,
+        query: str,
+        conversation_history: Optional[List] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """Streaming variant of generate_response.
+        
+        Yields events in order: one "sources" event as soon as retrieval is
+        done, one "token" event per chunk produced by the LLM, then a final
+        "done" event carrying token usage. Mirrors the steps of
+        ConversationalRetrievalChain (condense, retrieve, stuff, answer).
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        chat_history = _get_chat_history(await self._get_history(session_id))
+        timings = {}
+        
+        direct = await self._title_answer(query, timings)
+        if direct:
+            response, sources = direct
+            await self._save_turn(session_id, query, response)
+            CHAT_RESPONSES.labels("title").inc()
+            record_timings(timings)
+            yield {"event": "sources", "data": {"session_id": session_id, "sources": sources}}
+            yield {"event": "token", "data": {"content": response}}
+            yield {
+                "event": "done",
+                "data": {
+                    "session_id": session_id,
+                    "tokens_used": 0,
+                    "cached": False,
+                    "timings": timings
+                }
+            }
+            return
+        
+        query_embedding = None
+        if self.answer_cache is not None and not chat_history:
+            started = time.perf_counter()
+            await self._sync_answer_cache()
+            query_embedding = await self.embeddings.aembed_query(query)
+            cached = self.answer_cache.lookup(query_embedding, query)
+            timings["cache_lookup"] = _elapsed_ms(started)
+            if cached:
+                await self._save_turn(session_id, query, cached["response"])
+                CHAT_RESPONSES.labels("answer_cache").inc()
+                record_timings(timings)
+                yield {
+                    "event": "sources",
+                    "data": {"session_id": session_id, "sources": cached["sources"]}
+                }
+                yield {"event": "token", "data": {"content": cached["response"]}}
+                yield {
+                    "event": "done",
+                    "data": {
+                        "session_id": session_id,
+                        "tokens_used": 0,
+                        "cached": True,
+                        "timings": timings
+                    }
+                }
+                return
+        
+        # The rephrasing call is not streamed, OpenAI reports its usage
+        with get_openai_callback() as usage:
+            question, docs = await self._retrieve(query, chat_history, timings)
+        sources = self._format_sources(docs)
+        
+        yield {
+            "event": "sources",
+            "data": {
+                "session_id": session_id,
+                "sources": sources
+            }
+        }
+        
+        prompt = QA_PROMPT.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            chat_history=chat_history,
+            question=question
         )
         
-        # Generate response
-        result = await qa_chain.ainvoke({"question": query})
+        answer_parts = []
+        started = time.perf_counter()
+        async for chunk in self.llm.astream(prompt):
+            if chunk.content:
+                if not answer_parts:
+                    timings["first_token"] = _elapsed_ms(started)
+                answer_parts.append(chunk.content)
+                yield {"event": "token", "data": {"content": chunk.content}}
+        timings["generation"] = _elapsed_ms(started)
+        
+        answer = "".join(answer_parts)
+        await self._save_turn(session_id, query, answer)
+        
+        if query_embedding is not None:
+            self.answer_cache.store(query, query_embedding, {
+                "response": answer,
+                "sources": sources
+            })
+        
+        # OpenAI does not report usage on streamed completions, count locally
+        answer_prompt_tokens, answer_completion_tokens = count_tokens(prompt), count_tokens(answer)
+        prompt_tokens = usage.prompt_tokens + answer_prompt_tokens
+        completion_tokens = usage.completion_tokens + answer_completion_tokens
+        tokens_used = prompt_tokens + completion_tokens
+        cost = usage.total_cost + token_cost(settings.LLM_MODEL, answer_prompt_tokens, answer_completion_tokens)
+        CHAT_RESPONSES.labels("llm").inc()
+        record_tokens(prompt_tokens, completion_tokens, cost)
+        record_timings(timings)
+        
+        yield {
+            "event": "done",
+            "data": {
+                "session_id": session_id,
+                "tokens_used": tokens_used,
+                "cached": False,
+                "timings": timings
+            }
+        }
+    
+    async def _title_answer(self, query: str, timings: Dict[str, float]) -> Optional[Tuple[str, List[Dict]]]:
+        """
+        Fast path for "fiche X" messages: when the message explicitly asks for
+        the document of a drug or disease (see title_index), answer with the
+        indexed document itself, without embedding or LLM calls (this works
+        without OPENAI_API_KEY). Questions naming a drug ("doliprane enfant ?")
+        still get an answer.
+        """
+        if not settings.CHAT_TITLE_FAST_PATH or not is_document_request(query):
+            return None
+        started = time.perf_counter()
+        docs = await self.retriever.afind_by_title(query, k=settings.TOP_K_RESULTS)
+        timings["title_lookup"] = _elapsed_ms(started)
+        if not docs:
+            return None
+        
+        # Chunks of the best match only (other matches are listed as sources)
+        title = docs[0].metadata.get("title", "Document")
+        url = docs[0].metadata.get("url", "")
+        source = {"vidal": "Vidal", "meddispar": "Meddispar"}.get(docs[0].metadata.get("source_type"), "")
+        content = "\n\n".join(doc.page_content for doc in docs if doc.metadata.get("title") == title)
+        header = f"**{title}**" + (f" ({source})" if source else "")
+        footer = f"\n\nSource : {url}" if url else ""
+        return f"{header}\n\n{content}{footer}", self._format_sources(docs)
+    
+    def _names_document(self, question: str) -> bool:
+        """Whether a question names an indexed drug or disease (title or alias)"""
+        title_index = getattr(self.qa_chain.retriever, "title_index", None)
+        return title_index is not None and bool(title_index.mentions(question))
+    
+    async def _retrieve(self, query: str, chat_history: str, timings: Dict[str, float]) -> Tuple[str, List]:
+        """
+        Condense and retrieve stages of the chain, run explicitly so that the
+        rephrasing LLM call is skipped when the question is self-contained
+        (see settings.CONDENSE_MODE), followed by re-ranking and context
+        assembly when enabled. Returns the retrieval question and the
+        documents, and records stage latencies in ``timings``.
+        """
+        question = query
+        if needs_condensation(query, chat_history, settings.CONDENSE_MODE, self._names_document):
+            started = time.perf_counter()
+            question_generator = self.qa_chain.question_generator
+            result = await question_generator.ainvoke({
+                "question": query,
+                "chat_history": chat_history
+            })
+            question = result[question_generator.output_key]
+            timings["condense"] = _elapsed_ms(started)
+        
+        retriever = self.qa_chain.retriever
+        started = time.perf_counter()
+        if self.reranker is None:
+            docs = await retriever.aget_relevant_documents(question)
+            timings["retrieval"] = _elapsed_ms(started)
+        else:
+            candidates = await retriever.asearch(question, k=max(settings.RERANK_CANDIDATES, retriever.k))
+            timings["retrieval"] = _elapsed_ms(started)
+            started = time.perf_counter()
+            docs = await self.reranker.arerank(question, candidates, retriever.k)
+            timings["rerank"] = _elapsed_ms(started)
         
-        # Format sources
+        if settings.CONTEXT_ASSEMBLY_ENABLED:
+            started = time.perf_counter()
+            docs = assemble_context(
+                docs,
+                max_tokens=settings.CONTEXT_MAX_TOKENS,
+                dedup_threshold=settings.CONTEXT_DEDUP_THRESHOLD,
+                max_overlap=2 * settings.CHUNK_OVERLAP
+            )
+            timings["context"] = _elapsed_ms(started)
+        return question, docs
+    
+    async def _session_call(self, fn, *args):
+        """Call the session store (off the event loop for disk-backed stores)"""
+        if self.sessions.blocking:
+            return await self.executor.run(fn, *args)
+        return fn(*args)
+    
+    async def _get_history(self, session_id: str) -> List:
+        """
+        Conversation history to send to the chain: the full buffer, or in
+        "window" mode the last turns within the token budget, preceded by the
+        rolling summary of older turns when enabled.
+        """
+        messages = await self._session_call(self.sessions.get_messages, session_id)
+        if settings.MEMORY_MODE == "buffer":
+            return messages
+        
+        recent = select_recent_messages(
+            messages,
+            max_turns=settings.MEMORY_MAX_TURNS,
+            token_budget=settings.MEMORY_TOKEN_BUDGET
+        )
+        if settings.MEMORY_SUMMARY_ENABLED and len(recent) < len(messages):
+            summary, _ = await self._session_call(self.sessions.get_summary, session_id)
+            if summary:
+                return [summary_message(summary)] + recent
+        return recent
+    
+    async def _save_turn(self, session_id: str, question: str, answer: str):
+        """Append a question/answer turn to a session"""
+        await self._session_call(self.sessions.append_turn, session_id, question, answer)
+        if settings.MEMORY_MODE == "window" and settings.MEMORY_SUMMARY_ENABLED:
+            self._schedule_summary(session_id)
+    
+    def _schedule_summary(self, session_id: str):
+        """Refresh the rolling summary in the background, off the request path"""
+        if session_id in self._summarizing:
+            return
+        self._summarizing.add(session_id)
+        task = asyncio.create_task(self._refresh_summary(session_id))
+        self._background_tasks.add(task)
+        
+        def done(finished):
+            self._background_tasks.discard(finished)
+            self._summarizing.discard(session_id)
+        
+        task.add_done_callback(done)
+    
+    async def _refresh_summary(self, session_id: str):
+        """Fold the turns that left the memory window into the session summary"""
+        try:
+            messages = await self._session_call(self.sessions.get_messages, session_id)
+            total = await self._session_call(self.sessions.total_messages, session_id)
+            summary, covered = await self._session_call(self.sessions.get_summary, session_id)
+            
+            recent = select_recent_messages(
+                messages,
+                max_turns=settings.MEMORY_MAX_TURNS,
+                token_budget=settings.MEMORY_TOKEN_BUDGET
+            )
+            # Positions counted from the start of the session
+            first = total - len(messages)
+            older_end = first + len(messages) - len(recent)
+            if older_end <= covered:
+                return
+            
+            new_messages = messages[max(0, covered - first):len(messages) - len(recent)]
+            result = await self._summary_llm.ainvoke(SUMMARY_PROMPT.format(
+                summary=summary or "(aucun)",
+                new_lines=format_lines(new_messages)
+            ))
+            await self._session_call(self.sessions.set_summary, session_id, result.content, older_end)
+        except Exception as e:
+            logger.warning(f"Could not refresh summary of session {session_id}: {e}")
+    
+    @staticmethod
+    def _format_sources(docs: List) -> List[Dict]:
+        """Format retrieved documents as API sources"""
         sources = []
-        for doc in result.get("source_documents", []):
+        for doc in docs:
             sources.append({
                 "title": doc.metadata.get("title", "Document"),
                 "content": doc.page_content[:300] + "...",
@@ -153,84 +725,276 @@ Réponse basée uniquement sur les sources officielles:"""
                 "source_type": doc.metadata.get("source_type", "unknown"),
                 "relevance_score": doc.metadata.get("score", 0.0)
             })
-        
-        return {
-            "response": result["answer"],
-            "sources": sources,
-            "session_id": session_id,
-            "tokens_used": None  # Can be tracked with callbacks
-        }
+        return sources
     
     async def search_documents(
         self,
         query: str,
         source_type: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        mode: Optional[str] = None,
+        section: Optional[str] = None
     ) -> List[Dict]:
-        """Search documents in the vector store"""
-        
-        # Build filter
-        filter_dict = {}
-        if source_type:
-            filter_dict["source_type"] = source_type
-        
-        # Perform similarity search
-        docs = self.vectorstore.similarity_search_with_score(
+        """
+        Search documents (hybrid BM25 + vector search by default, see
+        settings.SEARCH_MODE), optionally within one monograph section
+        """
+        where = self._search_filter(source_type, section)
+        docs = await self.retriever.asearch(
             query,
-            k=limit,
-            filter=filter_dict if filter_dict else None
+            k=max(limit, settings.RERANK_CANDIDATES) if self.reranker else limit,
+            where=where,
+            mode=mode
         )
+        if self.reranker is not None:
+            docs = await self.reranker.arerank(query, docs, limit)
         
-        results = []
-        for doc, score in docs:
-            results.append({
-                "title": doc.metadata.get("title", "Document"),
-                "content": doc.page_content,
-                "url": doc.metadata.get("url", ""),
-                "source_type": doc.metadata.get("source_type", "unknown"),
-                "relevance_score": float(1 - score)  # Convert distance to similarity
-            })
+        return [self._search_result(doc) for doc in docs]
+    
+    async def search_documents_batch(
+        self,
+        queries: List[str],
+        source_type: Optional[str] = None,
+        limit: int = 10,
+        mode: Optional[str] = None,
+        section: Optional[str] = None
+    ) -> List[List[Dict]]:
+        """
+        Results of several searches (e.g. every line of a prescription): one
+        embedding call and one Chroma query for the whole batch
+        """
+        batches = await self.retriever.asearch_many(
+            queries,
+            k=max(limit, settings.RERANK_CANDIDATES) if self.reranker else limit,
+            where=self._search_filter(source_type, section),
+            mode=mode
+        )
+        if self.reranker is not None:
+            batches = [
+                await self.reranker.arerank(query, docs, limit)
+                for query, docs in zip(queries, batches)
+            ]
+        
+        return [[self._search_result(doc) for doc in docs] for docs in batches]
+    
+    @staticmethod
+    def _search_filter(source_type: Optional[str], section: Optional[str] = None) -> Optional[Dict]:
+        where = {}
+        if source_type:
+            where["source_type"] = source_type
+        if section:
+            where["section"] = section
+        return where or None
+    
+    @staticmethod
+    def _search_result(doc: Document) -> Dict:
+        return {
+            "title": doc.metadata.get("title", "Document"),
+            "content": doc.page_content,
+            "url": doc.metadata.get("url", ""),
+            "source_type": doc.metadata.get("source_type", "unknown"),
+            "section": doc.metadata.get("section"),
+            "relevance_score": doc.metadata.get("score", 0.0)
+        }
+    
+    async def _sync_answer_cache(self):
+        """Drop cached answers when the indexed documents changed, in this process or another one"""
+        if self._lexical_index is None:
+            return
+        if self._lexical_index.has_changed():
+            await self.executor.run(self._lexical_index.load)
+        self.answer_cache.sync_version(self._lexical_index.version)
+    
+    async def check_interactions(self, medications: List[str], explain: bool = False) -> Dict:
+        """
+        Interactions between every pair of ``medications``, looked up in the
+        interaction index (no model call). With ``explain``, the findings
+        alone are handed to the LLM for an explanation.
+        """
+        index = self.interaction_index
+        if index.has_changed():
+            await self.executor.run(index.load)
+        
+        started = time.perf_counter()
+        interactions = index.check(medications)
+        unrecognized = index.unrecognized(medications)
+        timings = {"lookup": _elapsed_ms(started)}
+        result = {
+            "interactions": interactions,
+            "unrecognized": unrecognized,
+            "checked_pairs": len(medications) * (len(medications) - 1) // 2,
+            "explanation": None,
+            "tokens_used": None,
+            "timings": timings
+        }
+        if not explain or not interactions:
+            return result
         
-        return results
+        findings = "\n".join(
+            f"- {finding['drug']} + {finding['partner']}: {finding['description'] or 'interaction signalée'}"
+            f" ({finding['source_type'].capitalize()}, {finding['url']})"
+            for pair in interactions
+            for finding in pair["findings"]
+        )
+        started = time.perf_counter()
+        with get_openai_callback() as usage:
+            message = await self.llm.ainvoke(INTERACTION_PROMPT.format(
+                medications=", ".join(medications),
+                findings=findings
+            ))
+        timings["generation"] = _elapsed_ms(started)
+        record_tokens(usage.prompt_tokens, usage.completion_tokens, usage.total_cost)
+        result["explanation"] = message.content
+        result["tokens_used"] = usage.total_tokens
+        return result
     
     async def get_stats(self) -> Dict:
         """Get database statistics"""
-        collection = self.vectorstore._collection
-        count = collection.count()
+        count = await self.executor.run(self.collection.count)
         
         return {
             "total_documents": count,
-            "embedding_model": settings.EMBEDDING_MODEL,
+            "embedding_backend": settings.EMBEDDING_BACKEND,
+            "embedding_model": embedding_model_name(),
             "llm_model": settings.LLM_MODEL,
             "chunk_size": settings.CHUNK_SIZE,
-            "sources": ["Vidal", "Meddispar"]
+            "sources": ["Vidal", "Meddispar"],
+            "lexical_index_chunks": len(self._lexical_index) if self._lexical_index is not None else None,
+            "interaction_pairs": (
+                self._interaction_index.pair_count() if self._interaction_index is not None else None
+            ),
+            "shards": (
+                await self.executor.run(self._collection.shard_counts)
+                if isinstance(self._collection, ShardedCollection) else None
+            ),
+            # The SQLite session store scans its tables for the counters
+            **await self._session_call(self.runtime_stats)
         }
     
-    def clear_session(self, session_id: str):
+    def runtime_stats(self) -> Dict:
+        """
+        Cache, thread pool and session counters (no Chroma call). The session
+        counters of the SQLite store query the database: call off the event loop.
+        """
+        return {
+            "answer_cache": self.answer_cache.stats() if self.answer_cache else None,
+            "embedding_cache": (
+                self._embeddings.stats()
+                if isinstance(self._embeddings, CachedEmbeddings) else None
+            ),
+            "reranker": self.reranker.stats() if self.reranker else None,
+            "executor": self.executor.stats(),
+            "sessions": self.sessions.stats()
+        }
+    
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+    
+    def close(self):
+        """Stop the thread pools and close the SQLite files (the service is not used afterwards)"""
+        self.executor.shutdown()
+        if self.reranker is not None:
+            self.reranker.close()
+        if isinstance(self._collection, ShardedCollection):
+            self._collection.close()
+        if isinstance(self._embeddings, CachedEmbeddings):
+            self._embeddings.close()
+        self.sessions.close()
+    
+    async def check_health(self) -> Dict:
+        """
+        Readiness checks: the Chroma collection opens (and its size), the
+        embedding backend is reachable or loaded, the session store answers.
+        Does not initialize the service.
+        """
+        if not self._initialized:
+            return {}
+        checks = {}
+        try:
+            count = await self.executor.run(self._collection.count)
+            checks["database"] = {"status": "connected", "collection": collection_name(), "documents": count}
+        except Exception as e:
+            checks["database"] = {"status": "error", "error": str(e)}
+        checks["embeddings"] = {
+            "backend": settings.EMBEDDING_BACKEND,
+            **await check_embedding_backend(settings.HEALTH_PROBE_TIMEOUT)
+        }
+        try:
+            checks["sessions"] = {"status": "ok", **await self._session_call(self.sessions.stats)}
+        except Exception as e:
+            checks["sessions"] = {"status": "error", "error": str(e)}
+        checks["llm"] = {"status": "configured" if self._qa_chain is not None else "unconfigured"}
+        return checks
+    
+    async def clear_session(self, session_id: str):
         """Clear conversation memory for a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-    
-    def add_documents(self, documents: List[Dict]):
-        """Add documents to the vector store"""
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        await self._session_call(self.sessions.clear, session_id)
+    
+    def add_documents(self, documents: Iterable[Dict]) -> Dict[str, int]:
+        """Index documents in the vector store (synchronous entry point for scripts)"""
+        return asyncio.run(self.aadd_documents(documents))
+    
+    async def export_snapshot(self, path: str) -> Dict:
+        """Write the vector store to a snapshot file (see snapshot); returns its manifest"""
+        return await self.executor.run(
+            export_snapshot, self.collection, path, embedding_model_name(), settings.SNAPSHOT_BATCH_SIZE
+        )
+    
+    async def import_snapshot(self, path: str) -> Dict:
+        """
+        Bulk-load a snapshot into the vector store (existing chunks with the
+        same IDs are overwritten), then rebuild the lexical, title and
+        interaction indexes from the collection.
+        """
+        manifest = await self.executor.run(import_snapshot, path, self.collection, embedding_model_name())
+        await self.executor.run(self._rebuild_indexes)
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate()
+        return manifest
+    
+    def _rebuild_indexes(self):
+        self._lexical_index.rebuild(self._collection)
+        self._lexical_index.save()
+        # The title index follows the lexical index version on its next lookup
+        self._interaction_index.rebuild(self._lexical_index, max_overlap=2 * settings.CHUNK_OVERLAP)
+        self._interaction_index.save()
+    
+    async def aadd_documents(self, documents: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Index documents in the vector store (idempotent).
+        
+        Chunks get deterministic IDs derived from the document URL and the
+        chunk content, so re-loading the same documents only embeds new
+        chunks, refreshes changed metadata and deletes chunks that
+        disappeared from a re-scraped page.
+        """
+        if settings.CHUNKING_MODE == "sections":
+            text_splitter = SectionTextSplitter(
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP
+            )
+        else:
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP,
+                separators=["\n\n", "\n", ". ", " ", ""]
+            )
+        self.ingestion = IngestionPipeline(
+            collection=self.collection,
+            embeddings=self.embeddings,
+            text_splitter=text_splitter,
+            batch_size=settings.INGEST_BATCH_SIZE,
+            concurrency=settings.INGEST_CONCURRENCY,
+            max_retries=settings.INGEST_MAX_RETRIES,
+            executor=self.executor,
+            lexical_index=self._lexical_index,
+            interaction_index=self._interaction_index
         )
+        counts = await self.ingestion.run(documents)
+        
+        # Cached answers may be stale now that the knowledge base changed
+        if self.answer_cache is not None and (counts["added"] or counts["updated"] or counts["removed"]):
+            self.answer_cache.invalidate()
         
-        texts = []
-        metadatas = []
-        
-        for doc in documents:
-            chunks = text_splitter.split_text(doc["content"])
-            for chunk in chunks:
-                texts.append(chunk)
-                metadatas.append({
-                    "title": doc.get("title", ""),
-                    "url": doc.get("url", ""),
-                    "source_type": doc.get("source_type", "unknown"),
-                    "category": doc.get("category", "")
-                })
-        
-        self.vectorstore.add_texts(texts=texts, metadatas=metadatas)
+        return counts
@@ -0,0 +1,44 @@
+"""Process-wide service registry shared by all API routers"""
+import asyncio
+from typing import Optional
+from app.services.rag_service import RAGService
+
+
+class ServiceRegistry:
+    """Holds the single RAGService (and its Chroma client) of this process"""
+
+    def __init__(self):
+        self._rag_service: Optional[RAGService] = None
+        # Set once startup() warmed the services up (readiness)
+        self.warmed_up = False
+
+    @property
+    def rag_service(self) -> RAGService:
+        # Created on first access when the lifespan handler did not run (tests, scripts)
+        if self._rag_service is None:
+            self._rag_service = RAGService()
+        return self._rag_service
+
+    def current(self) -> Optional[RAGService]:
+        """The RAGService if it was created already (without creating it)"""
+        return self._rag_service
+
+    async def startup(self):
+        """Build the services and warm them up so the first request is not penalised"""
+        await asyncio.to_thread(self.rag_service.warm_up)
+        self.warmed_up = True
+
+    async def shutdown(self):
+        """Release the services (thread pools, SQLite files)"""
+        self.warmed_up = False
+        if self._rag_service is not None:
+            await asyncio.to_thread(self._rag_service.close)
+        self._rag_service = None
+
+
+registry = ServiceRegistry()
+
+
+def get_rag_service() -> RAGService:
+    """FastAPI dependency returning the shared RAGService"""
+    return registry.rag_service
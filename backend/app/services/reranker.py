@@ -0,0 +1,86 @@
+"""Cross-encoder re-ranking of retrieved chunks"""
+import threading
+import time
+from typing import Dict, List
+
+from langchain_core.documents import Document
+
+from app.services.executor import BoundedExecutor
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores (query, chunk) pairs with a local sentence-transformers
+    cross-encoder in one batched CPU call and keeps the best chunks.
+
+    The model is loaded on first use (or by ``warm_up``). Inference runs on
+    a single dedicated thread: the model already uses several cores, and
+    concurrent requests would only compete for them.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, device: str = "cpu"):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self.executor = BoundedExecutor(max_workers=1, name="rerank")
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._calls = 0
+        self._pairs = 0
+        self._total_seconds = 0.0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                    except ImportError as e:
+                        raise ValueError(
+                            "RERANK_ENABLED requires sentence-transformers (pip install sentence-transformers)"
+                        ) from e
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def warm_up(self):
+        """Load the model and run one prediction"""
+        self.model.predict([("warm-up", "warm-up")])
+
+    def rerank(self, query: str, docs: List[Document], top_k: int) -> List[Document]:
+        """Best ``top_k`` documents by cross-encoder score (stored in ``metadata["score"]``)"""
+        if not docs:
+            return []
+        started = time.perf_counter()
+        scores = self.model.predict(
+            [(query, doc.page_content) for doc in docs],
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+        )
+        ranked = sorted(zip(docs, scores), key=lambda pair: float(pair[1]), reverse=True)[:top_k]
+
+        self._calls += 1
+        self._pairs += len(docs)
+        self._total_seconds += time.perf_counter() - started
+        return [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "retrieval_score": doc.metadata.get("score", 0.0), "score": float(score)},
+            )
+            for doc, score in ranked
+        ]
+
+    async def arerank(self, query: str, docs: List[Document], top_k: int) -> List[Document]:
+        return await self.executor.run(self.rerank, query, docs, top_k)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "calls": self._calls,
+            "pairs": self._pairs,
+            "avg_ms": round(self._total_seconds / self._calls * 1000, 1) if self._calls else None,
+            "queued": self.executor.stats()["queued"],
+        }
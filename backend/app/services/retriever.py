@@ -0,0 +1,280 @@
+"""Retriever used by the conversational chain and the search endpoint"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.services.metrics import measure
+from app.services.sections import detect_section
+
+# Rank offset of reciprocal rank fusion (value from the original paper)
+RRF_K = 60
+
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+
+# Metadata that differs between the chunks of a document (the title index keeps document metadata)
+_CHUNK_KEYS = {"section", "section_title", "chunk_index"}
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Merge ranked ID lists by summing 1 / (k + rank). Scores are scaled so
+    that an item ranked first in every list gets 1.0.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1 / (k + rank)
+    best = len(rankings) / (k + 1)
+    return sorted(
+        ((item, score / best) for item, score in scores.items()),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )
+
+
+def _scored(text: str, metadata: Dict, score: float) -> Document:
+    return Document(page_content=text, metadata={**(metadata or {}), "score": float(score)})
+
+
+def chroma_where(where: Optional[Dict]) -> Optional[Dict]:
+    """Chroma filter for metadata equalities (several keys need an explicit "$and")"""
+    if not where:
+        return None
+    if len(where) == 1:
+        return where
+    return {"$and": [{key: value} for key, value in where.items()]}
+
+
+def boost_section(docs: List[Document], section: str, boost: float) -> List[Document]:
+    """Raise the score of chunks from ``section`` by ``boost`` (relative) and re-sort"""
+    for doc in docs:
+        if doc.metadata.get("section") == section:
+            doc.metadata["score"] *= 1 + boost
+    return sorted(docs, key=lambda doc: doc.metadata["score"], reverse=True)
+
+
+class PharmaRetriever(BaseRetriever):
+    """
+    Hybrid retriever: Chroma vector search fused with the BM25 lexical index
+    by reciprocal rank fusion. Queries that name a document (e.g. "fiche
+    Doliprane 1000", see title_index) are answered from the lexical index
+    alone, without an embedding call. Chunks from the monograph section a
+    question is about ("posologie", see sections) get a ``section_boost``.
+
+    The query is embedded with the (async) embeddings client and the Chroma
+    query runs on the service's bounded thread pool instead of blocking the
+    event loop. Relevance scores are stored in ``metadata["score"]``.
+    """
+
+    vectorstore: Any
+    executor: Any
+    collection: Any = None  # Queried instead of the vectorstore's collection (sharding)
+    k: int = 5
+    lexical_index: Any = None
+    title_index: Any = None
+    mode: str = "hybrid"
+    candidates: int = 20  # Hits taken from each ranking before fusion
+    section_boost: float = 0.0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.search(query)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.asearch(query)
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        where: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        section: Optional[str] = None,
+    ) -> List[Document]:
+        if self.lexical_index is not None:
+            self.lexical_index.reload_if_changed()
+        k, mode = k or self.k, self._resolve_mode(mode)
+        section = self._boosted_section(query, section)
+        lexical = []
+        if mode != "vector":
+            shortcut, lexical = self._lexical(query, k, where, mode, section)
+            if shortcut is not None:
+                return shortcut
+        vector = []
+        if mode != "lexical":
+            embedding = self.vectorstore.embeddings.embed_query(query)
+            vector = self._query_collection(embedding, self._depth(k, mode, section), where)
+        return self._rank(k, mode, lexical, vector, section)
+
+    async def asearch(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        where: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        section: Optional[str] = None,
+    ) -> List[Document]:
+        """
+        Top ``k`` chunks for ``query`` with optional metadata equality filter.
+        Chunks of ``section`` (by default the section the query names) are boosted.
+        """
+        if self.lexical_index is not None and self.lexical_index.has_changed():
+            await self.executor.run(self.lexical_index.load)
+        k, mode = k or self.k, self._resolve_mode(mode)
+        section = self._boosted_section(query, section)
+        lexical = []
+        if mode != "vector":
+            shortcut, lexical = self._lexical(query, k, where, mode, section)
+            if shortcut is not None:
+                return shortcut
+        vector = []
+        if mode != "lexical":
+            with measure("embedding"):
+                embedding = await self.vectorstore.embeddings.aembed_query(query)
+            with measure("vector_search"):
+                vector = await self.executor.run(
+                    self._query_collection, embedding, self._depth(k, mode, section), where
+                )
+        return self._rank(k, mode, lexical, vector, section)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        k: Optional[int] = None,
+        where: Optional[Dict] = None,
+        mode: Optional[str] = None,
+    ) -> List[List[Document]]:
+        """
+        Top ``k`` chunks for each query. The queries needing vector search are
+        embedded in one batched call and looked up in one Chroma query.
+        """
+        if self.lexical_index is not None and self.lexical_index.has_changed():
+            await self.executor.run(self.lexical_index.load)
+        k, mode = k or self.k, self._resolve_mode(mode)
+        sections = [self._boosted_section(query, None) for query in queries]
+        results: List[Optional[List[Document]]] = [None] * len(queries)
+        lexical: List[List[Tuple[str, float]]] = [[] for _ in queries]
+        pending = []
+        for i, query in enumerate(queries):
+            if mode != "vector":
+                shortcut, lexical[i] = self._lexical(query, k, where, mode, sections[i])
+                if shortcut is not None:
+                    results[i] = shortcut
+                    continue
+            pending.append(i)
+
+        vectors: Dict[int, List[tuple]] = {}
+        if mode != "lexical" and pending:
+            with measure("embedding"):
+                embeddings = await self.vectorstore.embeddings.aembed_documents([queries[i] for i in pending])
+            depth = max(self._depth(k, mode, sections[i]) for i in pending)
+            with measure("vector_search"):
+                hits = await self.executor.run(self._query_collection_many, embeddings, depth, where)
+            vectors = dict(zip(pending, hits))
+        for i in pending:
+            results[i] = self._rank(k, mode, lexical[i], vectors.get(i, []), sections[i])
+        return results
+
+    async def afind_by_title(self, query: str, k: Optional[int] = None, where: Optional[Dict] = None) -> List[Document]:
+        """Chunks of the documents the query names (empty when it is not a drug name)"""
+        if self.lexical_index is None:
+            return []
+        if self.lexical_index.has_changed():
+            await self.executor.run(self.lexical_index.load)
+        return self._title_documents(query, k or self.k, where)
+
+    def _title_documents(self, query: str, k: int, where: Optional[Dict]) -> List[Document]:
+        if self.title_index is None:
+            return []
+        document_where = {key: value for key, value in (where or {}).items() if key not in _CHUNK_KEYS}
+        docs = []
+        for match in self.title_index.match(query, document_where):
+            for cid in match.chunk_ids:
+                if len(docs) == k:
+                    return docs
+                chunk = self.lexical_index.get(cid)
+                if chunk and all(chunk[1].get(key) == value for key, value in (where or {}).items()):
+                    docs.append(_scored(chunk[0], chunk[1], match.score))
+        return docs
+
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        mode = mode or self.mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if self.lexical_index is None or not len(self.lexical_index):
+            return "vector"
+        return mode
+
+    def _boosted_section(self, query: str, section: Optional[str]) -> Optional[str]:
+        if not self.section_boost:
+            return None
+        return section or detect_section(query)
+
+    def _depth(self, k: int, mode: str, section: Optional[str] = None) -> int:
+        # Boosting needs candidates beyond the top k to promote
+        return max(k, self.candidates) if mode == "hybrid" or section else k
+
+    def _lexical(self, query: str, k: int, where: Optional[Dict], mode: str, section: Optional[str] = None):
+        """Drug-name shortcut (or None) and BM25 hits"""
+        named = self._title_documents(query, k, where)
+        if named:
+            return named, []
+        with measure("lexical_search"):
+            return None, self.lexical_index.search(query, k=self._depth(k, mode, section), where=where)
+
+    def _query_collection(self, embedding: List[float], n_results: int, where: Optional[Dict]):
+        """(id, text, metadata, similarity) of the nearest chunks"""
+        return self._query_collection_many([embedding], n_results, where)[0]
+
+    def _query_collection_many(self, embeddings: List[List[float]], n_results: int, where: Optional[Dict]):
+        """Nearest chunks of each embedding, in a single Chroma query"""
+        collection = self.collection if self.collection is not None else self.vectorstore._collection
+        result = collection.query(
+            query_embeddings=embeddings,
+            n_results=n_results,
+            where=chroma_where(where),
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (cid, text, metadata, 1 - distance)
+                for cid, text, metadata, distance in zip(ids, documents, metadatas, distances)
+            ]
+            for ids, documents, metadatas, distances in zip(
+                result["ids"], result["documents"], result["metadatas"], result["distances"]
+            )
+        ]
+
+    def _rank(self, k: int, mode: str, lexical: List[Tuple[str, float]], vector: List[tuple], section: Optional[str]):
+        if section is None:
+            return self._combine(k, mode, lexical, vector)
+        docs = self._combine(self._depth(k, mode, section), mode, lexical, vector)
+        return boost_section(docs, section, self.section_boost)[:k]
+
+    def _combine(self, k: int, mode: str, lexical: List[Tuple[str, float]], vector: List[tuple]) -> List[Document]:
+        if mode == "vector":
+            return [_scored(text, metadata, score) for _, text, metadata, score in vector[:k]]
+        if mode == "lexical":
+            top = lexical[0][1] if lexical else 1.0
+            return [_scored(*self.lexical_index.get(cid), score / top) for cid, score in lexical[:k]]
+
+        chunks = {cid: (text, metadata) for cid, text, metadata, _ in vector}
+        fused = reciprocal_rank_fusion([[cid for cid, *_ in vector], [cid for cid, _ in lexical]])
+        docs = []
+        for cid, score in fused[:k]:
+            chunk = chunks.get(cid) or self.lexical_index.get(cid)
+            if chunk:
+                docs.append(_scored(chunk[0], chunk[1], score))
+        return docs
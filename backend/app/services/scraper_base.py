@@ -0,0 +1,222 @@
+import asyncio
+import aiohttp
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from app.config import settings
+from app.services.http_cache import HttpCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: ``rate`` requests per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class FetchResult:
+    text: str
+    not_modified: bool = False  # True when the server answered 304 to a conditional request
+
+
+class BaseScraper:
+    """
+    Shared async crawler core for the Vidal and Meddispar scrapers.
+
+    Uses one connection-pooled aiohttp session with keep-alive, a token bucket
+    per host so that concurrency never exceeds the polite request rate, and a
+    bounded worker pool to scrape pages concurrently.
+
+    Responses are kept in an on-disk HTTP cache and refreshed with conditional
+    requests; with ``skip_unchanged`` pages answered with 304 are not parsed
+    (and therefore not re-indexed) again. The validators of a new response are
+    only stored by ``confirm_pages``, once the page has been indexed, so a
+    failed indexing run fetches and processes the page again.
+    """
+
+    # Bump when parsing changes: cached validators of older versions no longer
+    # apply and every page is processed again
+    PARSER_VERSION = 2
+
+    def __init__(self, concurrency: Optional[int] = None, skip_unchanged: bool = True):
+        self.headers = {
+            "User-Agent": settings.USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+        }
+        self.concurrency = concurrency or settings.SCRAPING_CONCURRENCY
+        self.session = None
+        self._buckets: Dict[str, TokenBucket] = {}
+
+        self.skip_unchanged = skip_unchanged
+        self.unchanged_pages = 0
+        self.http_cache = None
+        self._pending_validators: Dict[str, tuple] = {}
+        if settings.HTTP_CACHE_ENABLED:
+            self.http_cache = HttpCache(settings.SCRAPING_CACHE_PATH, settings.HTTP_CACHE_MAX_BYTES)
+
+    @staticmethod
+    def extract_text(main_content, tags: List[str], min_length: int = 20) -> str:
+        """
+        Text of the ``tags`` elements of a page, one block per element.
+        Headings are kept whatever their length and marked "## " so that
+        chunking can follow the monograph sections (see sections).
+        """
+        content_parts = []
+        for element in main_content.find_all(tags):
+            text = element.get_text(strip=True)
+            if element.name in ("h2", "h3"):
+                if text:
+                    content_parts.append(f"## {text}")
+            elif text and len(text) > min_length:
+                content_parts.append(text)
+        return "\n\n".join(content_parts)
+
+    async def init_session(self):
+        """Initialize aiohttp session"""
+        if not self.session:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.concurrency,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+
+    async def close_session(self):
+        """Close aiohttp session"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def _bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            rate = settings.SCRAPING_RATE_PER_HOST or 1 / max(settings.REQUEST_DELAY, 0.001)
+            self._buckets[host] = TokenBucket(rate=rate, capacity=settings.SCRAPING_BURST)
+        return self._buckets[host]
+
+    def _cache_key(self, url: str) -> str:
+        """Cache entry of a page for the current parser and chunking settings"""
+        return (
+            f"{url}#parser={self.PARSER_VERSION}&chunking={settings.CHUNKING_MODE}"
+            f"-{settings.CHUNK_SIZE}-{settings.CHUNK_OVERLAP}"
+        )
+
+    async def fetch(self, url: str, retries: int = 3) -> Optional[FetchResult]:
+        """Fetch a page with retry logic, revalidating cached copies"""
+        await self.init_session()
+        key = self._cache_key(url)
+        cached = self.http_cache.get(key) if self.http_cache else None
+        headers = cached.conditional_headers() if cached else {}
+
+        for attempt in range(retries):
+            await self._bucket_for(url).acquire()
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached:
+                        self.http_cache.touch(key)
+                        return FetchResult(text=cached.body, not_modified=True)
+                    if response.status == 200:
+                        text = await response.text()
+                        etag = response.headers.get("ETag")
+                        last_modified = response.headers.get("Last-Modified")
+                        if self.http_cache and (etag or last_modified):
+                            # Validators wait for confirm_pages, see the class docstring
+                            self.http_cache.put(key, text, None, None)
+                            self._pending_validators[url] = (etag, last_modified)
+                        return FetchResult(text=text)
+                    else:
+                        logger.warning(f"Status {response.status} for {url}")
+
+            except Exception as e:
+                logger.error(f"Attempt {attempt + 1} failed for {url}: {e}")
+                if attempt < retries - 1:
+                    await asyncio.sleep(settings.REQUEST_DELAY * (attempt + 1))
+
+        return None
+
+    def confirm_pages(self, urls: Iterable[str]) -> int:
+        """Store the validators of fetched pages whose chunks have been indexed; returns their number"""
+        if not self.http_cache:
+            return 0
+        confirmed = 0
+        for url in urls:
+            validators = self._pending_validators.pop(url, None)
+            if validators:
+                self.http_cache.set_validators(self._cache_key(url), *validators)
+                confirmed += 1
+        return confirmed
+
+    async def fetch_page(self, url: str, retries: int = 3) -> str:
+        """Fetch a page body (cached body when unchanged)"""
+        result = await self.fetch(url, retries)
+        return result.text if result else None
+
+    async def fetch_changed_page(self, url: str, retries: int = 3) -> Optional[str]:
+        """Fetch a page body, or None when it is unchanged and skip_unchanged is set"""
+        result = await self.fetch(url, retries)
+        if not result:
+            return None
+        if result.not_modified and self.skip_unchanged:
+            self.unchanged_pages += 1
+            logger.debug(f"Unchanged since last crawl: {url}")
+            return None
+        return result.text
+
+    async def crawl(
+        self,
+        items: List[Dict[str, Any]],
+        scrape: Callable[[Dict[str, Any]], Awaitable[Optional[Dict]]],
+    ) -> List[Dict]:
+        """Run ``scrape`` on every item with a bounded worker pool, keeping input order"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+
+        results: List[Optional[Dict]] = [None] * len(items)
+        done = 0
+
+        async def worker():
+            nonlocal done
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    results[index] = await scrape(item)
+                except Exception as e:
+                    logger.error(f"Error scraping {item.get('url')}: {e}")
+                done += 1
+                if done % 10 == 0:
+                    logger.info(f"Progress: {done}/{len(items)} pages scraped")
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(items)))]
+        await asyncio.gather(*workers)
+        return [doc for doc in results if doc]
@@ -1,57 +1,17 @@
-import asyncio
-import aiohttp
 from bs4 import BeautifulSoup
 from typing import List, Dict
-import time
-from app.config import settings
+from app.services.scraper_base import BaseScraper
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class VidalScraper:
+class VidalScraper(BaseScraper):
     """Scraper pour extraire les données du Vidal"""
     
     BASE_URL = "https://www.vidal.fr"
     MALADIES_URL = "https://www.vidal.fr/maladies/chez-adulte.html"
     
-    def __init__(self):
-        self.headers = {
-            "User-Agent": settings.USER_AGENT,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
-        }
-        self.session = None
-    
-    async def init_session(self):
-        """Initialize aiohttp session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession(headers=self.headers)
-    
-    async def close_session(self):
-        """Close aiohttp session"""
-        if self.session:
-            await self.session.close()
-    
-    async def fetch_page(self, url: str, retries: int = 3) -> str:
-        """Fetch a page with retry logic"""
-        await self.init_session()
-        
-        for attempt in range(retries):
-            try:
-                async with self.session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    else:
-                        logger.warning(f"Status {response.status} for {url}")
-                        
-            except Exception as e:
-                logger.error(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < retries - 1:
-                    await asyncio.sleep(settings.REQUEST_DELAY * (attempt + 1))
-        
-        return None
-    
     async def get_disease_categories(self) -> List[Dict[str, str]]:
         """Récupère la liste des catégories de maladies"""
         logger.info("Fetching disease categories from Vidal...")
@@ -88,26 +48,18 @@ class VidalScraper:
         """Scrape une page de maladie spécifique"""
         logger.info(f"Scraping: {title}")
         
-        html = await self.fetch_page(url)
+        # Unchanged pages are skipped: their indexed chunks are left as-is
+        html = await self.fetch_changed_page(url)
         if not html:
             return None
         
         soup = BeautifulSoup(html, 'html.parser')
         
-        # Extract main content
-        content_parts = []
-        
         # Find article or main content
         main_content = soup.find('article') or soup.find('div', class_='content')
         
-        if main_content:
-            # Extract paragraphs
-            for p in main_content.find_all(['p', 'li', 'h2', 'h3']):
-                text = p.get_text(strip=True)
-                if text and len(text) > 20:
-                    content_parts.append(text)
-        
-        content = "\n\n".join(content_parts)
+        # Paragraphs, with "## " section headings
+        content = self.extract_text(main_content, ['p', 'li', 'h2', 'h3']) if main_content else ""
         
         if not content:
             logger.warning(f"No content extracted for {title}")
@@ -130,21 +82,15 @@ class VidalScraper:
             if max_pages:
                 categories = categories[:max_pages]
             
-            documents = []
-            
-            # Scrape each category
-            for i, category in enumerate(categories):
-                if i > 0 and i % 10 == 0:
-                    logger.info(f"Progress: {i}/{len(categories)} pages scraped")
-                
-                doc = await self.scrape_disease_page(category['url'], category['title'])
-                if doc:
-                    documents.append(doc)
-                
-                # Rate limiting
-                await asyncio.sleep(settings.REQUEST_DELAY)
+            # Scrape pages concurrently, rate limited per host
+            documents = await self.crawl(
+                categories,
+                lambda category: self.scrape_disease_page(category['url'], category['title'])
+            )
             
             logger.info(f"✅ Scraped {len(documents)} documents from Vidal")
+            if self.unchanged_pages:
+                logger.info(f"   {self.unchanged_pages} pages unchanged since last crawl")
             return documents
             
         finally:
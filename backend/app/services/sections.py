@@ -0,0 +1,126 @@
+"""Monograph sections: heading detection and section-aware chunking"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.services.lexical_index import fold
+
+# Canonical sections and the (accent-folded) heading words naming them,
+# first match wins ("contre-indications" before "indications")
+SECTIONS = (
+    ("contre_indications", re.compile(r"contre.?indication")),
+    ("indications", re.compile(r"\bindication|\butilisation")),
+    ("posologie", re.compile(r"posologie|mode d.administration|\bdoses?\b")),
+    ("interactions", re.compile(r"\binteraction")),
+    ("effets_indesirables", re.compile(r"effets? (indesirable|secondaire)")),
+    ("mises_en_garde", re.compile(r"mises? en garde|precaution")),
+    ("grossesse_allaitement", re.compile(r"grossesse|allaitement|fecondite")),
+    ("surdosage", re.compile(r"surdosage")),
+    ("surveillance", re.compile(r"surveillance")),
+    ("pharmacologie", re.compile(r"pharmaco|mecanisme d.action")),
+    ("conservation", re.compile(r"conservation")),
+)
+SECTION_NAMES = tuple(name for name, _ in SECTIONS)
+
+# Text before the first heading, or under a heading naming no known section
+GENERAL_SECTION = "general"
+
+# Severity sub-headings of Vidal interaction sections ("Associations déconseillées:"),
+# which do not end the section
+INTERACTION_LEVEL_RE = re.compile(r"^(associations?\b|precautions? d.emploi|a prendre en compte)[^:]{0,40}$")
+
+_BULLET_RE = re.compile(r"^[-•*·]\s*")
+
+# Colon-terminated lines longer than this are sentences, not headings
+MAX_HEADING_CHARS = 80
+
+
+def section_name(heading: str) -> Optional[str]:
+    """Canonical section named by a heading ("Interactions majeures" -> "interactions")"""
+    folded = fold(heading)
+    for name, pattern in SECTIONS:
+        if pattern.search(folded):
+            return name
+    return None
+
+
+def heading_text(line: str) -> Optional[str]:
+    """
+    Heading of a line, or None: "## Posologie" markers added by the
+    scrapers, or short "Posologie adulte:" lines naming a known section
+    """
+    line = line.strip()
+    if line.startswith("#"):
+        return line.lstrip("#").strip().rstrip(" :") or None
+    if (
+        line.endswith(":")
+        and len(line) <= MAX_HEADING_CHARS
+        and not _BULLET_RE.match(line)
+        and section_name(line) is not None
+    ):
+        return line.rstrip(" :")
+    return None
+
+
+@dataclass
+class Section:
+    name: str  # Canonical name, see SECTIONS
+    title: str  # Heading as written, "" before the first heading
+    text: str  # Heading line included
+
+
+def split_sections(content: str) -> List[Section]:
+    """Consecutive sections of a page, in order"""
+    sections: List[Section] = []
+    name, title, lines = GENERAL_SECTION, "", []
+
+    def flush():
+        if any(line.strip() for line in lines[1 if title else 0:]):
+            sections.append(Section(name, title, "\n".join(lines).strip()))
+
+    for line in content.splitlines():
+        heading = heading_text(line)
+        if heading is not None and not (name == "interactions" and INTERACTION_LEVEL_RE.match(fold(heading))):
+            flush()
+            name, title, lines = section_name(heading) or GENERAL_SECTION, heading, []
+        lines.append(line.strip())
+    flush()
+    return sections
+
+
+def detect_section(query: str) -> Optional[str]:
+    """Section a question is about ("posologie du doliprane ?" -> "posologie"), if any"""
+    return section_name(query)
+
+
+class SectionTextSplitter:
+    """
+    Splits monographs section by section so that chunks never straddle two
+    sections. The body of each section is split with the usual recursive
+    splitter and every chunk starts with the section heading, so that each
+    chunk says what it is about.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, _ in self.split_with_metadata(text)]
+
+    def split_with_metadata(self, text: str) -> List[Tuple[str, Dict]]:
+        """(chunk, {"section", "section_title"}) pairs in page order"""
+        chunks = []
+        for section in split_sections(text):
+            metadata = {"section": section.name, "section_title": section.title}
+            if not section.title:
+                chunks.extend((chunk, metadata) for chunk in self._splitter.split_text(section.text))
+                continue
+            heading, _, body = section.text.partition("\n")
+            chunks.extend((f"{heading}\n{chunk}", metadata) for chunk in self._splitter.split_text(body))
+        return chunks
@@ -0,0 +1,319 @@
+"""Conversation session stores with LRU + idle-TTL eviction"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from app.config import settings
+
+_MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage}
+
+
+def _message_size(message: BaseMessage) -> int:
+    return len(message.content.encode("utf-8"))
+
+
+class SessionStore(ABC):
+    """
+    Stores the messages of each conversation.
+
+    Sessions idle for more than ``ttl_seconds`` are dropped, the least recently
+    used sessions are evicted beyond ``max_sessions``, and each session keeps at
+    most ``max_messages`` messages.
+    """
+
+    # Whether calls do disk I/O and should run off the event loop
+    blocking = False
+
+    def __init__(self, max_sessions: int, ttl_seconds: int, max_messages: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.evicted = 0
+
+    @abstractmethod
+    def get_messages(self, session_id: str) -> List[BaseMessage]:
+        """Messages of a session, oldest first (empty for unknown sessions)"""
+
+    @abstractmethod
+    def append_turn(self, session_id: str, question: str, answer: str):
+        """Record a question/answer turn"""
+
+    @abstractmethod
+    def total_messages(self, session_id: str) -> int:
+        """Number of messages appended since the session started (including trimmed ones)"""
+
+    @abstractmethod
+    def get_summary(self, session_id: str) -> Tuple[str, int]:
+        """Rolling summary of older turns and how many messages (from the start) it covers"""
+
+    @abstractmethod
+    def set_summary(self, session_id: str, summary: str, covered: int):
+        """Replace the rolling summary of a session"""
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        """Forget a session"""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Number of sessions, messages and bytes held"""
+
+    def close(self):
+        """Release the storage (the store is not used afterwards)"""
+
+
+@dataclass
+class _Session:
+    messages: List[BaseMessage] = field(default_factory=list)
+    last_access: float = 0.0
+    size: int = 0
+    total: int = 0
+    summary: str = ""
+    summary_covered: int = 0
+
+    @property
+    def bytes(self) -> int:
+        return self.size + len(self.summary.encode("utf-8"))
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store (sessions are lost on restart and not shared across workers)"""
+
+    def __init__(self, max_sessions: int, ttl_seconds: int, max_messages: int):
+        super().__init__(max_sessions, ttl_seconds, max_messages)
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Ordered by last access: stop at the first session still alive
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def _touch(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session:
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_messages(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            self._evict()
+            session = self._touch(session_id)
+            return list(session.messages) if session else []
+
+    def append_turn(self, session_id: str, question: str, answer: str):
+        with self._lock:
+            # An expired session starts afresh instead of being revived
+            self._evict()
+            session = self._sessions.setdefault(session_id, _Session())
+            for message in (HumanMessage(content=question), AIMessage(content=answer)):
+                session.messages.append(message)
+                session.size += _message_size(message)
+                session.total += 1
+            while len(session.messages) > self.max_messages:
+                session.size -= _message_size(session.messages.pop(0))
+            self._touch(session_id)
+            self._evict()
+
+    def total_messages(self, session_id: str) -> int:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.total if session else 0
+
+    def get_summary(self, session_id: str) -> Tuple[str, int]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return (session.summary, session.summary_covered) if session else ("", 0)
+
+    def set_summary(self, session_id: str, summary: str, covered: int):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                session.summary = summary
+                session.summary_covered = covered
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "messages": sum(len(session.messages) for session in self._sessions.values()),
+                "bytes": sum(session.bytes for session in self._sessions.values()),
+                "evicted": self.evicted,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store in a local SQLite file, shared by every uvicorn worker and kept across restarts"""
+
+    blocking = True
+
+    def __init__(self, db_path: str, max_sessions: int, ttl_seconds: int, max_messages: int):
+        super().__init__(max_sessions, ttl_seconds, max_messages)
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                total_messages INTEGER NOT NULL DEFAULT 0,
+                summary TEXT NOT NULL DEFAULT '',
+                summary_covered INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+            """
+        )
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _delete_sessions(self, session_ids: List[str]):
+        for session_id in session_ids:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _evict(self):
+        expired = [
+            row[0] for row in self._db.execute(
+                "SELECT session_id FROM sessions WHERE last_access < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        ]
+        overflow = [
+            row[0] for row in self._db.execute(
+                "SELECT session_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                (self.max_sessions,),
+            )
+        ]
+        stale = list(dict.fromkeys(expired + overflow))
+        self._delete_sessions(stale)
+        self.evicted += len(stale)
+
+    def get_messages(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ? AND last_access >= ?",
+                (time.time(), session_id, time.time() - self.ttl_seconds),
+            ).rowcount
+            self._db.commit()
+            if not updated:
+                return []
+            rows = self._db.execute(
+                "SELECT type, content FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+            return [_MESSAGE_TYPES[kind](content=content) for kind, content in rows]
+
+    def append_turn(self, session_id: str, question: str, answer: str):
+        with self._lock:
+            # An expired session starts afresh instead of being revived
+            expired = self._db.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND last_access < ?",
+                (session_id, time.time() - self.ttl_seconds),
+            ).fetchone()
+            if expired:
+                self._delete_sessions([session_id])
+                self.evicted += 1
+            self._db.execute(
+                "INSERT INTO sessions (session_id, last_access, total_messages) VALUES (?, ?, 2) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "last_access = excluded.last_access, total_messages = total_messages + 2",
+                (session_id, time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO messages (session_id, type, content) VALUES (?, ?, ?)",
+                [(session_id, "human", question), (session_id, "ai", answer)],
+            )
+            self._db.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages),
+            )
+            self._evict()
+            self._db.commit()
+
+    def total_messages(self, session_id: str) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT total_messages FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return row[0] if row else 0
+
+    def get_summary(self, session_id: str) -> Tuple[str, int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary, summary_covered FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return (row[0], row[1]) if row else ("", 0)
+
+    def set_summary(self, session_id: str, summary: str, covered: int):
+        with self._lock:
+            self._db.execute(
+                "UPDATE sessions SET summary = ?, summary_covered = ? WHERE session_id = ?",
+                (summary, covered, session_id),
+            )
+            self._db.commit()
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._delete_sessions([session_id])
+            self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            messages, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM messages"
+            ).fetchone()
+            size += self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(CAST(summary AS BLOB))), 0) FROM sessions"
+            ).fetchone()[0]
+            return {
+                "backend": "sqlite",
+                "sessions": sessions,
+                "messages": messages,
+                "bytes": size,
+                "evicted": self.evicted,
+            }
+
+
+def build_session_store() -> SessionStore:
+    """Session store selected by settings.SESSION_BACKEND ("memory" or "sqlite")"""
+    limits = {
+        "max_sessions": settings.SESSION_MAX_SESSIONS,
+        "ttl_seconds": settings.SESSION_TTL_SECONDS,
+        "max_messages": settings.SESSION_MAX_MESSAGES,
+    }
+    if settings.SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore(settings.SESSION_DB_PATH, **limits)
+    if settings.SESSION_BACKEND == "memory":
+        return InMemorySessionStore(**limits)
+    raise ValueError(f"Unknown SESSION_BACKEND: {settings.SESSION_BACKEND}")
@@ -0,0 +1,384 @@
+"""Vector collections: HNSW settings and sharding by source (and category)"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_community.vectorstores import Chroma
+
+from app.services.lexical_index import fold
+
+logger = logging.getLogger(__name__)
+
+# Chroma's HNSW defaults, for comparison with the configured parameters
+HNSW_DEFAULTS = {"hnsw:space": "l2", "hnsw:M": 16, "hnsw:construction_ef": 100, "hnsw:search_ef": 10}
+
+# Metadata fields each sharding mode splits collections on
+SHARD_FIELDS = {
+    "none": (),
+    "source": ("source_type",),
+    "source_category": ("source_type", "category"),
+}
+
+# Chroma collection names are limited to 63 characters
+MAX_COLLECTION_NAME = 63
+
+
+def hnsw_metadata(space: str, m: int, construction_ef: int, search_ef: int, overrides: Optional[Dict] = None) -> Dict:
+    """Collection metadata setting the HNSW parameters (``overrides`` use the short names, e.g. "search_ef")"""
+    metadata = {
+        "hnsw:space": space,
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+    for key, value in (overrides or {}).items():
+        if key == "space":
+            raise ValueError("hnsw space cannot differ between shards (their scores are merged)")
+        metadata[f"hnsw:{key}"] = value
+    return metadata
+
+
+def open_collection(client, name: str, metadata: Optional[Dict] = None):
+    """
+    The collection ``name``, created with ``metadata`` (HNSW parameters)
+    when missing. The HNSW parameters of an existing index cannot be changed,
+    they are only reported when they differ.
+    """
+    try:
+        collection = client.get_collection(name, embedding_function=None)
+    except ValueError:
+        return client.create_collection(name, metadata=metadata or None, embedding_function=None)
+    current = collection.metadata or {}
+    differing = {
+        key: value for key, value in (metadata or {}).items()
+        if current.get(key, HNSW_DEFAULTS.get(key)) != value
+    }
+    if differing:
+        logger.warning(
+            f"Collection {name} keeps its HNSW parameters, {differing} only apply to new collections"
+        )
+    return collection
+
+
+def _slug(value) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", fold(str(value))).strip("_") or "none"
+
+
+def _equalities(where: Optional[Dict]) -> Tuple[Dict, List[Dict]]:
+    """Equality conditions of a filter ({"a": 1} or {"$and": [...]}) and the other clauses"""
+    if not where:
+        return {}, []
+    clauses = where["$and"] if set(where) == {"$and"} else [{key: value} for key, value in where.items()]
+    equal, other = {}, []
+    for clause in clauses:
+        (key, value), = clause.items()
+        if not key.startswith("$") and not isinstance(value, dict):
+            equal[key] = value
+        elif not key.startswith("$") and set(value) == {"$eq"}:
+            equal[key] = value["$eq"]
+        else:
+            other.append(clause)
+    return equal, other
+
+
+def _where(equal: Dict, other: List[Dict]) -> Optional[Dict]:
+    clauses = [{key: value} for key, value in equal.items()] + other
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def shard_names(client, base_name: str) -> List[str]:
+    """Names of the shards of ``base_name`` present in the database"""
+    return sorted(
+        collection.name for collection in client.list_collections()
+        if collection.name.startswith(f"{base_name}__")
+    )
+
+
+def migrate_collection(client, name: str, sharded: "ShardedCollection") -> int:
+    """
+    Move the chunks of the unsharded collection ``name`` into empty shards
+    (embeddings included), then drop it; an empty one is dropped directly.
+    Returns the number of chunks moved.
+    """
+    try:
+        collection = client.get_collection(name, embedding_function=None)
+    except ValueError:
+        return 0
+    if not collection.count():
+        client.delete_collection(name)
+        return 0
+    if sharded.count():
+        logger.warning(f"Collection {name} and its shards both hold chunks, {name} is not searched")
+        return 0
+    copied = sharded.copy_from(collection)
+    if sharded.count() != collection.count():
+        logger.warning(f"Shards hold {sharded.count()} chunks after copying {name}, keeping {name}")
+        return copied
+    client.delete_collection(name)
+    logger.info(f"Collection {name} moved into {len(sharded.shard_counts())} shards and dropped")
+    return copied
+
+
+class ShardedCollection:
+    """
+    A set of Chroma collections, one per value of the shard fields
+    (``source_type``, and ``category`` if configured), used through the
+    subset of the Collection API the app needs (get, query, upsert, update,
+    delete, count).
+
+    Queries filtered on the shard fields only search the matching shards,
+    so a Vidal search scales with the Vidal shard alone. Other queries fan
+    out to every shard in parallel and the hits are merged by distance (all
+    shards share one distance space). Writes are routed by metadata.
+
+    Shards created by other processes (the scraping script) are picked up
+    by ``refresh``, run at most every ``refresh_seconds`` before routing and
+    whenever a filter names a shard not known yet.
+    """
+
+    def __init__(
+        self,
+        client,
+        base_name: str,
+        fields: Tuple[str, ...],
+        hnsw: Optional[Dict] = None,
+        overrides: Optional[Dict[str, Dict]] = None,
+        max_workers: int = 4,
+        refresh_seconds: float = 5.0,
+    ):
+        self.client = client
+        self.base_name = base_name
+        self.fields = fields
+        # hnsw_metadata arguments of new shards (space, m, construction_ef, search_ef)
+        self.hnsw = hnsw or {"space": "l2", "m": 16, "construction_ef": 100, "search_ef": 10}
+        # Per-shard HNSW parameters, keyed by shard suffix ("meddispar", "vidal__maladie")
+        self.overrides = overrides or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard-query")
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._shards: Dict[str, object] = {}
+        self._values: Dict[str, Tuple] = {}
+        self.refresh()
+
+    def _prefix(self) -> str:
+        return f"{self.base_name}__"
+
+    def _name(self, values: Tuple) -> Tuple[str, str]:
+        suffix = "__".join(_slug(value) for value in values)
+        name = f"{self._prefix()}{suffix}"
+        if len(name) > MAX_COLLECTION_NAME:
+            digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+            name = f"{name[:MAX_COLLECTION_NAME - 9]}_{digest}"
+        return suffix, name
+
+    def refresh(self, max_age: float = 0.0):
+        """Pick up shards created by other processes, unless done less than ``max_age`` seconds ago"""
+        if time.monotonic() - self._refreshed_at < max_age:
+            return
+        with self._lock:
+            for collection in self.client.list_collections():
+                if collection.name.startswith(self._prefix()) and collection.name not in self._shards:
+                    values = (collection.metadata or {}).get("shard_values")
+                    if values is not None:
+                        self._values[collection.name] = tuple(values.split("\x1f"))
+                    self._shards[collection.name] = self.client.get_collection(
+                        collection.name, embedding_function=None
+                    )
+            self._refreshed_at = time.monotonic()
+
+    def _shard_for(self, metadata: Dict):
+        values = tuple(metadata.get(field, "") for field in self.fields)
+        suffix, name = self._name(values)
+        if name not in self._shards:
+            with self._lock:
+                if name not in self._shards:
+                    hnsw = hnsw_metadata(**self.hnsw, overrides=self.overrides.get(suffix))
+                    # Shard values are kept to route filtered queries without parsing names
+                    hnsw["shard_values"] = "\x1f".join(str(value) for value in values)
+                    self._values[name] = tuple(str(value) for value in values)
+                    self._shards[name] = open_collection(self.client, name, hnsw)
+        return self._shards[name]
+
+    def _route(self, where: Optional[Dict]) -> List[Tuple[object, Optional[Dict]]]:
+        """Shards a filter can match, each with the filter minus the conditions its shard implies"""
+        self.refresh(max_age=self.refresh_seconds)
+        equal, other = _equalities(where)
+        routed = self._match(equal, other)
+        if not routed and any(field in equal for field in self.fields):
+            # A shard unknown here may have been created since the last refresh
+            self.refresh(max_age=min(1.0, self.refresh_seconds))
+            routed = self._match(equal, other)
+        return routed
+
+    def _match(self, equal: Dict, other: List[Dict]) -> List[Tuple[object, Optional[Dict]]]:
+        routed = []
+        for name, collection in sorted(self._shards.items()):
+            values = dict(zip(self.fields, self._values.get(name, ())))
+            if any(str(equal[field]) != value for field, value in values.items() if field in equal):
+                continue
+            remaining = {key: value for key, value in equal.items() if key not in values}
+            routed.append((collection, _where(remaining, other)))
+        return routed
+
+    def shard_counts(self) -> Dict[str, int]:
+        return {name: collection.count() for name, collection in sorted(self._shards.items())}
+
+    def count(self) -> int:
+        return sum(self.shard_counts().values())
+
+    def query(self, query_embeddings, n_results: int, where: Optional[Dict] = None, include=("metadatas", "documents", "distances")):
+        """Nearest chunks of each embedding across the matching shards, merged by distance"""
+        include = list(include)
+        routed = self._route(where)
+        futures = [
+            self._pool.submit(
+                collection.query,
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=shard_where,
+                include=include,
+            )
+            for collection, shard_where in routed
+        ]
+        results = [future.result() for future in futures]
+        if len(results) == 1:
+            return results[0]
+
+        keys = ["ids"] + include
+        order = keys.index("distances") if "distances" in keys else None
+        merged = {key: [] for key in keys}
+        for i in range(len(query_embeddings)):
+            hits = [hit for result in results for hit in zip(*(result[key][i] for key in keys))]
+            if order is not None:
+                hits.sort(key=lambda hit: hit[order])
+            for position, key in enumerate(keys):
+                merged[key].append([hit[position] for hit in hits[:n_results]])
+        return merged
+
+    def get(self, ids=None, where: Optional[Dict] = None, include=("metadatas", "documents"), limit=None, offset=None):
+        """Chunks of every matching shard, paginated over the shards in name order"""
+        include = list(include)
+        merged = {"ids": [], **{key: [] for key in include}}
+        skip, remaining = offset or 0, limit
+        for collection, shard_where in self._route(where):
+            if remaining is not None and remaining <= 0:
+                break
+            if ids is None and skip:
+                size = (
+                    collection.count() if shard_where is None
+                    else len(collection.get(where=shard_where, include=[])["ids"])
+                )
+                if skip >= size:
+                    skip -= size
+                    continue
+            result = collection.get(
+                ids=ids, where=shard_where, include=include, limit=remaining, offset=skip or None
+            )
+            skip = 0
+            merged["ids"].extend(result["ids"])
+            for key in include:
+                merged[key].extend(result[key])
+            if remaining is not None:
+                remaining -= len(result["ids"])
+        return merged
+
+    def _locate(self, ids: List[str]) -> Dict[str, object]:
+        """Shard currently holding each of ``ids``"""
+        located = {}
+        for collection in self._shards.values():
+            for cid in collection.get(ids=ids, include=[])["ids"]:
+                located[cid] = collection
+        return located
+
+    def _group(self, ids, *columns) -> Dict[str, tuple]:
+        """Shard name -> (ids, *columns) of the chunks routed there (``columns[0]`` are the metadatas)"""
+        groups: Dict[str, tuple] = {}
+        for item in zip(ids, *columns):
+            name = self._shard_for(item[1]).name
+            group = groups.setdefault(name, tuple([] for _ in item))
+            for values, value in zip(group, item):
+                values.append(value)
+        return groups
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        """Write each chunk to the shard of its metadata"""
+        for name, (group_ids, group_metadatas, group_embeddings, group_documents) in self._group(
+            ids, metadatas, embeddings, documents
+        ).items():
+            self._shards[name].upsert(
+                ids=group_ids, embeddings=group_embeddings, metadatas=group_metadatas, documents=group_documents
+            )
+
+    def update(self, ids, metadatas):
+        """Update chunk metadata; chunks whose shard fields changed move to their new shard"""
+        located = self._locate(list(ids))
+        moved = []
+        for name, (group_ids, group_metadatas) in self._group(ids, metadatas).items():
+            in_place = [(cid, m) for cid, m in zip(group_ids, group_metadatas) if located.get(cid) is self._shards[name]]
+            if in_place:
+                self._shards[name].update(ids=[cid for cid, _ in in_place], metadatas=[m for _, m in in_place])
+            moved += [(cid, m) for cid, m in zip(group_ids, group_metadatas) if cid in located and located[cid] is not self._shards[name]]
+        if moved:
+            moved_ids = [cid for cid, _ in moved]
+            current = self.get(ids=moved_ids, include=["embeddings", "documents"])
+            stored = dict(zip(current["ids"], zip(current["embeddings"], current["documents"])))
+            self._delete_located(moved_ids, located)
+            self.upsert(
+                ids=moved_ids,
+                embeddings=[stored[cid][0] for cid in moved_ids],
+                metadatas=[m for _, m in moved],
+                documents=[stored[cid][1] for cid in moved_ids],
+            )
+
+    def _delete_located(self, ids: Iterable[str], located: Dict[str, object]):
+        groups = defaultdict(list)
+        for cid in ids:
+            if cid in located:
+                groups[located[cid].name].append(cid)
+        for name, group in groups.items():
+            self._shards[name].delete(ids=group)
+
+    def delete(self, ids):
+        ids = list(ids)
+        self._delete_located(ids, self._locate(ids))
+
+    def copy_from(self, collection, batch_size: int = 1000) -> int:
+        """Copy every chunk (with its embedding) of an unsharded collection into the shards"""
+        offset = 0
+        while True:
+            batch = collection.get(
+                include=["embeddings", "metadatas", "documents"], limit=batch_size, offset=offset
+            )
+            if not batch["ids"]:
+                break
+            self.upsert(batch["ids"], batch["embeddings"], batch["metadatas"], batch["documents"])
+            offset += len(batch["ids"])
+        logger.info(f"Copied {offset} chunks of {collection.name} into {len(self._shards)} shards")
+        return offset
+
+    def close(self):
+        """Stop the query threads"""
+        self._pool.shutdown(wait=False)
+
+
+class ShardedChroma(Chroma):
+    """
+    LangChain Chroma vector store over a ShardedCollection. Unlike the Chroma
+    constructor, it does not create the unsharded base collection.
+    """
+
+    def __init__(self, client, collection: ShardedCollection, embedding_function):
+        self._client = client
+        self._client_settings = None
+        self._persist_directory = None
+        self._embedding_function = embedding_function
+        self._collection = collection
+        self.override_relevance_score_fn = None
@@ -0,0 +1,111 @@
+"""Snapshots of the vector store: export to a versioned zip, bulk import"""
+import io
+import json
+import logging
+import os
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "pharmabot-snapshot"
+SNAPSHOT_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _part_names(index: int):
+    return f"part-{index:05d}.npy", f"part-{index:05d}.jsonl"
+
+
+def export_snapshot(collection, path: str, embedding_model: str, batch_size: int = 1000) -> Dict:
+    """
+    Write every chunk of ``collection`` to a zip at ``path``: per batch, the
+    embeddings as a float32 .npy array and the ids, metadata and documents
+    as JSON lines, plus a manifest. Returns the manifest.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    parts, count, dimension = [], 0, None
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        while True:
+            batch = collection.get(
+                include=["embeddings", "metadatas", "documents"], limit=batch_size, offset=count
+            )
+            if not batch["ids"]:
+                break
+            vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+            dimension = int(vectors.shape[1])
+            vectors_name, chunks_name = _part_names(len(parts))
+            buffer = io.BytesIO()
+            np.save(buffer, vectors, allow_pickle=False)
+            archive.writestr(vectors_name, buffer.getvalue())
+            archive.writestr(chunks_name, "".join(
+                json.dumps({"id": cid, "metadata": metadata, "document": document}, ensure_ascii=False) + "\n"
+                for cid, metadata, document in zip(batch["ids"], batch["metadatas"], batch["documents"])
+            ))
+            parts.append({"embeddings": vectors_name, "chunks": chunks_name, "count": len(batch["ids"])})
+            count += len(batch["ids"])
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "embedding_model": embedding_model,
+            "dimension": dimension,
+            "count": count,
+            "parts": parts,
+        }
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    os.replace(tmp_path, path)
+    logger.info(f"Snapshot of {count} chunks written to {path}")
+    return manifest
+
+
+def read_manifest(path: str) -> Dict:
+    """Manifest of a snapshot; ValueError when the file is not a snapshot this version can read"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+    except (KeyError, zipfile.BadZipFile) as e:
+        raise ValueError(f"{path} is not a snapshot: {e}")
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a snapshot")
+    if manifest.get("version", 0) > SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {manifest['version']} is newer than supported ({SNAPSHOT_VERSION})")
+    return manifest
+
+
+def import_snapshot(path: str, collection, embedding_model: Optional[str] = None) -> Dict:
+    """
+    Upsert every chunk of the snapshot at ``path`` into ``collection``, one
+    batch per part, with the stored embeddings (nothing is re-embedded).
+    Snapshots of another embedding model are refused. Returns the manifest.
+    """
+    manifest = read_manifest(path)
+    if embedding_model and manifest["embedding_model"] != embedding_model:
+        raise ValueError(
+            f"Snapshot embeddings come from {manifest['embedding_model']}, "
+            f"the configured model is {embedding_model}"
+        )
+    imported = 0
+    with zipfile.ZipFile(path) as archive:
+        for part in manifest["parts"]:
+            vectors = np.load(io.BytesIO(archive.read(part["embeddings"])), allow_pickle=False)
+            chunks = [json.loads(line) for line in archive.read(part["chunks"]).decode("utf-8").splitlines()]
+            if len(chunks) != len(vectors):
+                raise ValueError(f"Snapshot part {part['chunks']} is corrupted")
+            collection.upsert(
+                ids=[chunk["id"] for chunk in chunks],
+                embeddings=vectors.tolist(),
+                metadatas=[chunk["metadata"] for chunk in chunks],
+                documents=[chunk["document"] for chunk in chunks],
+            )
+            imported += len(chunks)
+    logger.info(f"Imported {imported} chunks from snapshot {path}")
+    return manifest
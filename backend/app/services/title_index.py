@@ -0,0 +1,198 @@
+"""Drug-name lookups: title/alias index with prefix and fuzzy matching"""
+import difflib
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from app.services.lexical_index import tokenize
+
+# Leading words of "fiche X"-style requests that are not part of the name
+_REQUEST_WORDS = {"fiche", "fiches", "monographie", "notice", "rcp", "vidal", "meddispar", "medicament"}
+
+# Leading words of messages explicitly asking for a document ("fiche doliprane")
+_DOCUMENT_REQUEST_WORDS = {"fiche", "fiches", "monographie", "notice", "rcp"}
+
+# Prefixes shorter than this are too ambiguous to resolve a name
+MIN_PREFIX_LENGTH = 4
+
+# Longest name, in words, looked for inside a question
+MAX_MENTION_WORDS = 4
+
+
+def normalize_name(text: str) -> str:
+    """Accent/case-folded name without stopwords ("Fiche du Doliprane®" -> "doliprane")"""
+    tokens = tokenize(text)
+    while tokens and tokens[0] in _REQUEST_WORDS:
+        tokens.pop(0)
+    return " ".join(tokens)
+
+
+def is_document_request(text: str) -> bool:
+    """Whether a message asks for a document rather than a question about it ("fiche doliprane")"""
+    tokens = tokenize(text)
+    return len(tokens) > 1 and tokens[0] in _DOCUMENT_REQUEST_WORDS
+
+
+def _aliases(title: str, url: str) -> Set[str]:
+    """Names a document may be asked for besides its full title"""
+    aliases = {normalize_name(re.sub(r"\(.*?\)", " ", title))}
+    tokens = tokenize(title)
+    if tokens and tokens[0].isalpha() and len(tokens[0]) >= MIN_PREFIX_LENGTH:
+        aliases.add(tokens[0])  # Brand name: "doliprane" for "Doliprane 1000 mg cp"
+    slug = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    if slug:
+        aliases.add(normalize_name(slug.replace("-", " ").replace("_", " ")))
+    aliases.discard("")
+    return aliases
+
+
+@dataclass
+class TitleMatch:
+    title: str
+    chunk_ids: List[str]
+    score: float  # 1.0 for exact and alias matches, similarity ratio for fuzzy ones
+    kind: str  # "exact", "alias", "prefix" or "fuzzy"
+    metadata: Dict = field(default_factory=dict)
+
+
+class TitleIndex:
+    """
+    Maps document titles and aliases (brand name, title without parentheses,
+    URL slug) to the chunks of each document, derived from the chunk metadata
+    held by the lexical index and rebuilt whenever that index changes.
+
+    Names are kept in a dict for exact lookups, in a character trie for
+    prefix lookups and bucketed by first letter for difflib fuzzy matching,
+    so resolving a name never needs an embedding or LLM call.
+    """
+
+    def __init__(self, lexical_index, fuzzy_cutoff: float = 0.88):
+        self.lexical_index = lexical_index
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.Lock()
+        self._version = None
+        self._docs: Dict[str, Tuple[str, Dict, List[str]]] = {}
+        self._titles: Dict[str, Set[str]] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._trie: Dict = {}
+        self._buckets: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._docs)
+
+    def _refresh(self):
+        version = self.lexical_index.version
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._build(self.lexical_index.chunks())
+                self._version = version
+
+    def _build(self, chunks: Iterable[Tuple[str, Dict]]):
+        docs: Dict[str, Tuple[str, Dict, List[str]]] = {}
+        for chunk_id, metadata in chunks:
+            title = metadata.get("title", "")
+            if not title:
+                continue
+            key = metadata.get("url") or title
+            docs.setdefault(key, (title, metadata, []))[2].append(chunk_id)
+
+        titles: Dict[str, Set[str]] = defaultdict(set)
+        names: Dict[str, Set[str]] = defaultdict(set)
+        for key, (title, metadata, _) in docs.items():
+            name = normalize_name(title)
+            if name:
+                titles[name].add(key)
+                names[name].add(key)
+            for alias in _aliases(title, metadata.get("url", "")):
+                names[alias].add(key)
+
+        trie: Dict = {}
+        buckets: Dict[str, List[str]] = defaultdict(list)
+        for name in names:
+            node = trie
+            for char in name:
+                node = node.setdefault(char, {})
+            node["$"] = name
+            buckets[name[0]].append(name)
+
+        self._docs, self._titles, self._names = docs, dict(titles), dict(names)
+        self._trie, self._buckets = trie, dict(buckets)
+
+    def _completions(self, prefix: str, limit: int) -> List[str]:
+        node = self._trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        found, stack = [], [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            if "$" in node:
+                found.append(node["$"])
+            stack.extend(child for char, child in node.items() if char != "$")
+        return found
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Titles of the documents whose name or alias starts with ``prefix``"""
+        self._refresh()
+        keys = []
+        for name in self._completions(normalize_name(prefix), limit * 5):
+            keys.extend(key for key in self._names[name] if key not in keys)
+        return sorted({self._docs[key][0] for key in keys}, key=len)[:limit]
+
+    def match(self, query: str, where: Optional[Dict] = None) -> List[TitleMatch]:
+        """
+        Documents the whole query names, best first: exact title or alias,
+        then a prefix naming a single document, then close misspellings.
+        Empty when the query is not a name.
+        """
+        self._refresh()
+        name = normalize_name(query)
+        if not name:
+            return []
+
+        if name in self._names:
+            kind = "exact" if name in self._titles else "alias"
+            return self._matches(self._names[name], 1.0, kind, where)
+
+        if len(name) >= MIN_PREFIX_LENGTH:
+            keys = set()
+            for completion in self._completions(name, 50):
+                keys |= self._names[completion]
+            if len(keys) == 1:
+                return self._matches(keys, 1.0, "prefix", where)
+
+        close = difflib.get_close_matches(name, self._buckets.get(name[0], []), n=3, cutoff=self.fuzzy_cutoff)
+        matches = []
+        for candidate in close:
+            score = difflib.SequenceMatcher(None, name, candidate).ratio()
+            matches.extend(self._matches(self._names[candidate], score, "fuzzy", where))
+        return matches
+
+    def mentions(self, text: str) -> List[str]:
+        """Indexed titles and aliases appearing in ``text``, longest first ("posologie du doliprane ?" -> ["doliprane"])"""
+        self._refresh()
+        tokens = tokenize(text)
+        found = []
+        for size in range(min(MAX_MENTION_WORDS, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                name = " ".join(tokens[start:start + size])
+                if name in self._names and name not in found:
+                    found.append(name)
+        return found
+
+    def _matches(self, keys: Iterable[str], score: float, kind: str, where: Optional[Dict]) -> List[TitleMatch]:
+        matches = []
+        # Shortest titles first: "Doliprane" before "Doliprane 1000 mg cp effervescent"
+        for key in sorted(keys, key=lambda key: len(self._docs[key][0])):
+            title, metadata, chunk_ids = self._docs[key]
+            if where and any(metadata.get(k) != v for k, v in where.items()):
+                continue
+            matches.append(TitleMatch(title=title, chunk_ids=list(chunk_ids), score=score, kind=kind, metadata=metadata))
+        return matches
@@ -0,0 +1,42 @@
+"""Token counting shared by the services (tiktoken, with a rough fallback)"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # pragma: no cover - offline or missing encoding files
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of ``text`` for OpenAI models (≈ 4 characters per token offline)"""
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """First ``max_tokens`` tokens of ``text``"""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def token_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated OpenAI cost in dollars (LangChain's price table, 0 for models it does not list)"""
+    from langchain_community.callbacks.openai_info import get_openai_token_cost_for_model
+
+    try:
+        return (
+            get_openai_token_cost_for_model(model, prompt_tokens)
+            + get_openai_token_cost_for_model(model, completion_tokens, is_completion=True)
+        )
+    except ValueError:
+        return 0.0
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request overhead of building ConversationalRetrievalChain
+on every chat request versus reusing the chain compiled once by RAGService.
+
+Uses fake LLM/embeddings and an in-memory Chroma collection so that only the
+LangChain setup and orchestration cost is measured (no network).
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import chromadb
+from langchain.chains import ConversationalRetrievalChain
+from langchain.memory import ConversationBufferMemory
+from langchain.prompts import PromptTemplate
+from langchain_community.chat_models.fake import FakeListChatModel
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import Chroma
+
+from app.services.rag_service import QA_PROMPT
+
+
+def build_vectorstore() -> Chroma:
+    embeddings = FakeEmbeddings(size=64)
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name="benchmark_chain_setup",
+        embedding_function=embeddings,
+    )
+    vectorstore.add_texts(
+        texts=[f"Document de test numéro {i} sur le paracétamol" for i in range(20)],
+        metadatas=[{"title": f"Doc {i}", "url": "", "source_type": "vidal"} for i in range(20)],
+    )
+    return vectorstore
+
+
+def build_chain(llm, vectorstore, memory=None) -> ConversationalRetrievalChain:
+    kwargs = {"memory": memory} if memory else {}
+    return ConversationalRetrievalChain.from_llm(
+        llm=llm,
+        retriever=vectorstore.as_retriever(search_kwargs={"k": 5}),
+        return_source_documents=True,
+        combine_docs_chain_kwargs={
+            "prompt": PromptTemplate(
+                input_variables=QA_PROMPT.input_variables,
+                template=QA_PROMPT.template,
+            )
+        },
+        **kwargs,
+    )
+
+
+def report(label: str, samples: list):
+    samples_ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<28} mean={statistics.mean(samples_ms):7.3f} ms  "
+        f"p50={statistics.median(samples_ms):7.3f} ms  "
+        f"p95={sorted(samples_ms)[int(len(samples_ms) * 0.95) - 1]:7.3f} ms"
+    )
+
+
+async def main(iterations: int):
+    llm = FakeListChatModel(responses=["Réponse de test"])
+    vectorstore = build_vectorstore()
+
+    # Setup cost only
+    setup = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build_chain(llm, vectorstore, memory=ConversationBufferMemory(
+            memory_key="chat_history", return_messages=True, output_key="answer"
+        ))
+        setup.append(time.perf_counter() - start)
+
+    # Full request: build per request (before) vs compiled once (after)
+    before = []
+    for _ in range(iterations):
+        memory = ConversationBufferMemory(
+            memory_key="chat_history", return_messages=True, output_key="answer"
+        )
+        start = time.perf_counter()
+        chain = build_chain(llm, vectorstore, memory=memory)
+        await chain.ainvoke({"question": "Posologie du paracétamol ?"})
+        before.append(time.perf_counter() - start)
+
+    compiled = build_chain(llm, vectorstore)
+    after = []
+    for _ in range(iterations):
+        memory = ConversationBufferMemory(
+            memory_key="chat_history", return_messages=True, output_key="answer"
+        )
+        start = time.perf_counter()
+        result = await compiled.ainvoke({
+            "question": "Posologie du paracétamol ?",
+            "chat_history": memory.chat_memory.messages,
+        })
+        memory.save_context({"question": "Posologie du paracétamol ?"}, {"answer": result["answer"]})
+        after.append(time.perf_counter() - start)
+
+    print(f"Iterations: {iterations}")
+    report("chain setup only", setup)
+    report("request (build per call)", before)
+    report("request (compiled once)", after)
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"Per-request overhead saved: {saved * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
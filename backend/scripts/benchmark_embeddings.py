@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query latency, corpus embedding throughput and retrieval recall of
+the embedding backends (OpenAI vs local sentence-transformers) on our corpus.
+
+Chunks are read from the indexed Chroma collection. Each document title is
+used as a query whose relevant chunks are the chunks of that document;
+recall@k is the share of queries with at least one relevant chunk in the
+top k. The OpenAI backend reuses the vectors stored in Chroma for the corpus
+and is skipped when OPENAI_API_KEY is not set.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import chromadb
+import numpy as np
+
+from app.config import settings
+from app.services.embeddings import DEFAULT_COLLECTION, build_embeddings
+
+
+def load_corpus(limit: int):
+    client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
+    collection = client.get_or_create_collection(DEFAULT_COLLECTION)
+    data = collection.get(include=["documents", "metadatas", "embeddings"], limit=limit)
+    return data["ids"], data["documents"], data["metadatas"], data["embeddings"]
+
+
+def build_queries(ids, metadatas, count: int, seed: int):
+    relevant = defaultdict(set)
+    for chunk_id, metadata in zip(ids, metadatas):
+        if metadata.get("title"):
+            relevant[metadata["title"]].add(chunk_id)
+    titles = sorted(relevant)
+    random.Random(seed).shuffle(titles)
+    return [(title, relevant[title]) for title in titles[:count]]
+
+
+def backend(name: str):
+    settings.EMBEDDING_BACKEND = name
+    return build_embeddings()
+
+
+def report(label: str, samples: list):
+    samples_ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<28} mean={statistics.mean(samples_ms):7.3f} ms  "
+        f"p50={statistics.median(samples_ms):7.3f} ms  "
+        f"p95={sorted(samples_ms)[max(int(len(samples_ms) * 0.95) - 1, 0)]:7.3f} ms"
+    )
+
+
+def normalized(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def evaluate(name, embeddings, corpus_matrix, ids, queries, k):
+    latencies, hits, rankings = [], 0, {}
+    embeddings.embed_query("warm-up")
+    for query, relevant in queries:
+        start = time.perf_counter()
+        vector = embeddings.embed_query(query)
+        latencies.append(time.perf_counter() - start)
+        scores = corpus_matrix @ normalized([vector])[0]
+        top = [ids[i] for i in np.argsort(-scores)[:k]]
+        rankings[query] = top
+        hits += bool(relevant.intersection(top))
+    report(f"{name} query embedding", latencies)
+    print(f"{name + ' recall@' + str(k):<28} {hits / len(queries):.3f}")
+    return rankings
+
+
+def main(args):
+    ids, documents, metadatas, stored = load_corpus(args.corpus_size)
+    if not ids:
+        sys.exit(f"Collection {DEFAULT_COLLECTION} is empty, index documents first (scripts/load_demo_data.py)")
+    queries = build_queries(ids, metadatas, args.queries, args.seed)
+    print(f"Corpus: {len(ids)} chunks, {len(queries)} title queries, k={args.k}")
+
+    results = {}
+    if settings.OPENAI_API_KEY:
+        results["openai"] = evaluate("openai", backend("openai"), normalized(stored), ids, queries, args.k)
+    else:
+        print("OPENAI_API_KEY not set, skipping the OpenAI backend")
+
+    local = backend("local")
+    start = time.perf_counter()
+    local_matrix = normalized(local.embed_documents(documents))
+    elapsed = time.perf_counter() - start
+    print(f"{'local corpus embedding':<28} {len(documents) / elapsed:7.1f} chunks/s ({settings.LOCAL_EMBEDDING_MODEL})")
+    results["local"] = evaluate("local", local, local_matrix, ids, queries, args.k)
+
+    if len(results) == 2:
+        overlap = statistics.mean(
+            len(set(results["openai"][query]) & set(results["local"][query])) / args.k
+            for query, _ in queries
+        )
+        print(f"{'top-k overlap local/openai':<28} {overlap:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus-size", type=int, default=5000, help="Maximum number of chunks to load")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -311,9 +311,13 @@ def main():
     
     try:
         rag_service = RAGService()
-        rag_service.add_documents(DEMO_DATA)
+        counts = rag_service.add_documents(DEMO_DATA)
         
         logger.info(f"✅ {len(DEMO_DATA)} documents chargés avec succès")
+        logger.info(
+            f"   Chunks: {counts['added']} ajoutés, {counts['updated']} mis à jour, "
+            f"{counts['removed']} supprimés, {counts['unchanged']} inchangés"
+        )
         
         # Test de recherche
         import asyncio
@@ -2,6 +2,7 @@
 """
 Script to scrape data from Vidal and Meddispar and index it in ChromaDB
 """
+import argparse
 import asyncio
 import sys
 from pathlib import Path
@@ -21,19 +22,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def main():
+async def main(full: bool = False):
     """Main scraping function"""
     logger.info("🚀 Starting data scraping process...")
     logger.info(f"📁 Data will be stored in: {settings.CHROMA_DB_PATH}")
     
     all_documents = []
+    scrapers = []
     
     # Scrape Vidal
     logger.info("\n" + "="*60)
     logger.info("📚 SCRAPING VIDAL")
     logger.info("="*60)
     try:
-        vidal_scraper = VidalScraper()
+        vidal_scraper = VidalScraper(skip_unchanged=not full)
+        scrapers.append(vidal_scraper)
         vidal_docs = await vidal_scraper.scrape_all(max_pages=50)  # Limit for testing
         all_documents.extend(vidal_docs)
         logger.info(f"✅ Vidal: {len(vidal_docs)} documents collected")
@@ -45,7 +48,8 @@ async def main():
     logger.info("💊 SCRAPING MEDDISPAR")
     logger.info("="*60)
     try:
-        meddispar_scraper = MeddisparScraper()
+        meddispar_scraper = MeddisparScraper(skip_unchanged=not full)
+        scrapers.append(meddispar_scraper)
         meddispar_docs = await meddispar_scraper.scrape_all(max_pages=50)  # Limit for testing
         all_documents.extend(meddispar_docs)
         logger.info(f"✅ Meddispar: {len(meddispar_docs)} documents collected")
@@ -61,8 +65,22 @@ async def main():
         
         try:
             rag_service = RAGService()
-            rag_service.add_documents(all_documents)
+            counts = await rag_service.aadd_documents(all_documents)
             logger.info("✅ Documents successfully indexed in ChromaDB")
+            # Only indexed pages may be answered with 304 (and skipped) next time
+            confirmed = sum(
+                scraper.confirm_pages(doc["url"] for doc in all_documents) for scraper in scrapers
+            )
+            logger.info(f"   HTTP cache validators stored for {confirmed} pages")
+            logger.info(
+                f"   Chunks: {counts['added']} added, {counts['updated']} updated, "
+                f"{counts['removed']} removed, {counts['unchanged']} unchanged"
+            )
+            throughput = rag_service.ingestion.stats()
+            logger.info(
+                f"   Throughput: {throughput['chunks_per_second']:.1f} chunks/s, "
+                f"{throughput['tokens_per_second']:.0f} tokens/s"
+            )
             
             # Show stats
             stats = await rag_service.get_stats()
@@ -70,6 +88,9 @@ async def main():
             logger.info(f"   - Total documents: {stats['total_documents']}")
             logger.info(f"   - Embedding model: {stats['embedding_model']}")
             logger.info(f"   - LLM model: {stats['llm_model']}")
+            if stats.get("embedding_cache"):
+                cache_stats = stats["embedding_cache"]
+                logger.info(f"   - Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
             
         except Exception as e:
             logger.error(f"❌ Error indexing documents: {e}")
@@ -81,4 +102,11 @@ async def main():
     logger.info("="*60)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Scrape Vidal and Meddispar and index them in ChromaDB")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-parse and re-index pages even when the server reports them unchanged (304)"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(full=args.full))
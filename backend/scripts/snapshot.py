@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Export the vector store to a snapshot file, or import one in bulk
+
+    python scripts/snapshot.py export data/snapshots/pharmabot.zip
+    python scripts/snapshot.py import data/snapshots/pharmabot.zip
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.rag_service import RAGService
+from app.services.snapshot import read_manifest
+from app.config import settings
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+async def main(command: str, path: str):
+    rag_service = RAGService()
+    logger.info(f"📁 ChromaDB: {settings.CHROMA_DB_PATH}")
+
+    if command == "export":
+        manifest = await rag_service.export_snapshot(path)
+        size = Path(path).stat().st_size / 1024 / 1024
+        logger.info(f"✅ {manifest['count']} chunks exported to {path} ({size:.1f} MB)")
+    else:
+        manifest = read_manifest(path)
+        logger.info(
+            f"📦 Snapshot of {manifest['created_at']}: {manifest['count']} chunks, "
+            f"{manifest['embedding_model']} embeddings"
+        )
+        await rag_service.import_snapshot(path)
+        stats = await rag_service.get_stats()
+        logger.info(f"✅ Imported, {stats['total_documents']} chunks in the vector store")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a vector store snapshot")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="Snapshot file (.zip)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.command, args.path))
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
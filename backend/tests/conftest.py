@@ -1,7 +1,20 @@
 """Pytest configuration and fixtures"""
+import uuid
+
+import chromadb
 import pytest
 from fastapi.testclient import TestClient
+from langchain.chains import ConversationalRetrievalChain
+from langchain_community.chat_models.fake import FakeListChatModel
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import Chroma
+
 from app.main import app
+from app.services.interaction_index import InteractionIndex
+from app.services.lexical_index import LexicalIndex
+from app.services.rag_service import QA_PROMPT, RAGService
+from app.services.retriever import PharmaRetriever
+from app.services.title_index import TitleIndex
 
 
 @pytest.fixture
@@ -16,3 +29,55 @@ def mock_env(monkeypatch):
     monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key-123")
     monkeypatch.setenv("CHROMA_DB_PATH", "./test_data/chroma_db")
     monkeypatch.setenv("DEBUG", "True")
+
+
+@pytest.fixture
+def make_rag_service(tmp_path):
+    """
+    Build RAGServices backed by an in-memory collection, fake embeddings and
+    index files under tmp_path. Chat is available when ``responses`` are
+    given: a fake LLM answers them in turn (``condense_responses`` for the
+    rephrasing step) and fails once they are used up.
+    """
+    def make(responses=None, condense_responses=None, lexical_index=None, k=5):
+        name = f"test-{uuid.uuid4().hex[:12]}"
+        service = RAGService()
+        service._embeddings = FakeEmbeddings(size=8)
+        service._vectorstore = Chroma(
+            client=chromadb.EphemeralClient(),
+            collection_name=name,
+            embedding_function=service._embeddings,
+        )
+        service._collection = service._vectorstore._collection
+        if lexical_index is None:
+            lexical_index = LexicalIndex(str(tmp_path / f"{name}-lexical.json.gz"))
+        service._lexical_index = lexical_index
+        service._interaction_index = InteractionIndex(str(tmp_path / f"{name}-interactions.json"))
+        service._retriever = PharmaRetriever(
+            vectorstore=service._vectorstore,
+            collection=service._collection,
+            executor=service.executor,
+            k=k,
+            lexical_index=lexical_index,
+            title_index=TitleIndex(lexical_index),
+        )
+        if responses is not None:
+            service._llm = FakeListChatModel(responses=responses)
+            service._condense_llm = FakeListChatModel(responses=condense_responses or [])
+            service._qa_chain = ConversationalRetrievalChain.from_llm(
+                llm=service._llm,
+                condense_question_llm=service._condense_llm,
+                retriever=service._retriever,
+                return_source_documents=True,
+                combine_docs_chain_kwargs={"prompt": QA_PROMPT},
+            )
+        service._initialized = True
+        return service
+
+    return make
+
+
+@pytest.fixture
+def rag_service(make_rag_service):
+    """RAGService backed by an in-memory collection and fake embeddings"""
+    return make_rag_service()
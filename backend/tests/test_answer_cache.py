@@ -0,0 +1,68 @@
+"""Tests for the semantic answer cache"""
+import time
+
+from app.services.answer_cache import SemanticAnswerCache
+
+
+def make_cache(**overrides):
+    params = {"similarity_threshold": 0.95, "max_entries": 2, "ttl_seconds": 60}
+    params.update(overrides)
+    return SemanticAnswerCache(**params)
+
+
+def test_similar_question_hits():
+    """Test that a near-identical embedding returns the cached answer"""
+    cache = make_cache()
+    cache.store("posologie paracétamol adulte", [1.0, 0.0, 0.0], {"response": "4 g/jour"})
+
+    assert cache.lookup([0.99, 0.05, 0.0]) == {"response": "4 g/jour"}
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted past the size cap"""
+    cache = make_cache()
+    cache.store("a", [1.0, 0.0, 0.0], {"response": "a"})
+    cache.store("b", [0.0, 1.0, 0.0], {"response": "b"})
+    cache.lookup([1.0, 0.0, 0.0])  # "a" becomes most recent
+    cache.store("c", [0.0, 0.0, 1.0], {"response": "c"})
+
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0]) == {"response": "a"}
+
+
+def test_ttl_expiry_and_invalidate():
+    """Test that expired entries and invalidation clear the cache"""
+    cache = make_cache(ttl_seconds=0)
+    cache.store("a", [1.0, 0.0], {"response": "a"})
+    time.sleep(0.01)
+    assert cache.lookup([1.0, 0.0]) is None
+
+    cache = make_cache()
+    cache.store("a", [1.0, 0.0], {"response": "a"})
+    cache.invalidate()
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def test_questions_with_other_quantities_miss():
+    """Test that near-identical questions differing by a dose or weight are not served the same answer"""
+    cache = make_cache()
+    cache.store("posologie doliprane enfant 15 kg", [1.0, 0.0, 0.0], {"response": "15 kg"})
+
+    assert cache.lookup([1.0, 0.01, 0.0], "posologie doliprane enfant 30 kg") is None
+    assert cache.lookup([1.0, 0.01, 0.0], "posologie doliprane enfant") is None
+    assert cache.lookup([1.0, 0.01, 0.0], "Posologie Doliprane enfant 15kg ?") == {"response": "15 kg"}
+
+
+def test_version_change_invalidates():
+    """Test that a new version of the indexed documents drops cached answers"""
+    cache = make_cache()
+    cache.sync_version(1)
+    cache.store("a", [1.0, 0.0], {"response": "a"})
+    cache.sync_version(1)
+    assert cache.lookup([1.0, 0.0], "a") == {"response": "a"}
+
+    cache.sync_version(2)
+    assert cache.lookup([1.0, 0.0], "a") is None
@@ -1,5 +1,13 @@
 """Tests for API request validation"""
+import json
+
 import pytest
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.main import app
+from app.services.registry import get_rag_service
+from app.services.tokens import token_cost
 
 
 def test_chat_empty_message(client):
@@ -64,3 +72,78 @@ def test_chat_request_structure(client):
     )
     # Should be 200 or 503 (if no API key/no data)
     assert response.status_code in [200, 500, 503]
+
+
+def test_chat_stream_empty_message(client):
+    """Test that the streaming endpoint rejects empty messages"""
+    response = client.post(
+        "/api/chat/stream",
+        json={"message": "  ", "conversation_history": []}
+    )
+    assert response.status_code == 400
+    assert "empty" in response.json()["detail"].lower()
+
+
+def test_chat_stream_request_structure(client):
+    """Test that the streaming endpoint accepts the chat request structure"""
+    response = client.post(
+        "/api/chat/stream",
+        json={"message": "Posologie du paracétamol", "session_id": "test-stream"}
+    )
+    # Should stream (200) or fail cleanly (503 without API key)
+    assert response.status_code in [200, 500, 503]
+    if response.status_code == 200:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("event: sources")
+
+
+def test_chat_stream_events(client, make_rag_service, monkeypatch):
+    """Test the order of the streamed events and the usage reported for the answer"""
+    monkeypatch.setattr(settings, "LLM_MODEL", "gpt-4")
+    monkeypatch.setattr("app.services.rag_service.count_tokens", lambda text: 10)
+    service = make_rag_service(responses=["1 g par prise."])
+    service.add_documents([{
+        "title": "Paracétamol",
+        "content": "Posologie adulte: 1 g par prise.",
+        "url": "https://www.vidal.fr/paracetamol.html",
+        "source_type": "vidal",
+    }])
+    cost = REGISTRY.get_sample_value("pharmabot_llm_cost_dollars_total")
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        response = client.post(
+            "/api/chat/stream",
+            json={"message": "Posologie du paracétamol", "session_id": "test-stream-events"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    events = []
+    for frame in response.text.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert events[0][1]["sources"][0]["title"] == "Paracétamol"
+    assert "".join(data["content"] for name, data in events[1:-1]) == "1 g par prise."
+    assert events[-1][1]["tokens_used"] == 20
+    assert REGISTRY.get_sample_value("pharmabot_llm_cost_dollars_total") == pytest.approx(
+        cost + token_cost("gpt-4", 10, 10)
+    )
+
+
+def test_batch_search_validation(client):
+    """Test that batch searches need non-empty queries"""
+    response = client.post("/api/search/batch", json={"queries": []})
+    assert response.status_code == 422
+
+    response = client.post("/api/search/batch", json={"queries": ["Doliprane", "  "]})
+    assert response.status_code == 400
+
+
+def test_clear_session(client):
+    """Test that clearing a session succeeds, even for an unknown session"""
+    response = client.post("/api/chat/clear", json={"session_id": "test-clear"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
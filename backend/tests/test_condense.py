@@ -0,0 +1,88 @@
+"""Tests for skipping the question-rephrasing step"""
+import asyncio
+
+import pytest
+
+from app.services.condense import is_self_contained, needs_condensation
+
+
+def names_document(question):
+    return "paracétamol" in question.lower() or "tramadol" in question.lower()
+
+
+@pytest.mark.parametrize("question", [
+    "Quelle est la posologie du paracétamol chez l'adulte ?",
+    "Le tramadol est-il classé comme stupéfiant ?",
+])
+def test_self_contained_questions(question):
+    assert is_self_contained(question, names_document)
+
+
+@pytest.mark.parametrize("question", [
+    "Et chez l'enfant ?",
+    "Quelle dose maximale ?",
+    "Peut-on le donner pendant la grossesse ? Et elle, combien ?",
+    "Est-ce que ce médicament interagit avec l'alcool ?",
+    "Et pour la femme enceinte, quelle posologie ?",
+    # No pronoun, but no subject either
+    "Quelle est la posologie chez l'enfant ?",
+])
+def test_follow_up_questions(question):
+    assert not is_self_contained(question, names_document)
+
+
+def test_questions_naming_no_document_are_condensed():
+    question = "Quelle est la posologie du paracétamol chez l'adulte ?"
+    assert not is_self_contained(question)
+    assert needs_condensation(question, "Human: x")
+    assert not needs_condensation(question, "Human: x", names_document=names_document)
+
+
+def test_needs_condensation_modes():
+    follow_up = "Et chez l'enfant ?"
+    assert not needs_condensation(follow_up, "")
+    assert needs_condensation(follow_up, "Human: paracétamol")
+    assert not needs_condensation(follow_up, "Human: paracétamol", mode="never")
+    assert needs_condensation(
+        "Quelle est la posologie du paracétamol chez l'adulte ?", "Human: x", mode="always"
+    )
+    with pytest.raises(ValueError):
+        needs_condensation(follow_up, "Human: x", mode="sometimes")
+
+
+@pytest.fixture
+def rag_service(make_rag_service, monkeypatch):
+    """RAGService with fake models and one indexed chunk"""
+    monkeypatch.setattr("app.services.rag_service.settings.ANSWER_CACHE_ENABLED", False)
+    service = make_rag_service(
+        responses=["réponse"], condense_responses=["Posologie du paracétamol chez l'enfant ?"], k=1
+    )
+    service.add_documents([{
+        "title": "Paracétamol",
+        "content": "Paracétamol: 1 g par prise chez l'adulte.",
+        "url": "u",
+        "source_type": "vidal",
+    }])
+    return service
+
+
+def test_condensation_only_for_follow_ups(rag_service):
+    """Test that only context-dependent follow-ups pay for the rephrasing call"""
+    async def conversation():
+        first = await rag_service.generate_response("Posologie du paracétamol chez l'adulte ?", session_id="s")
+        self_contained = await rag_service.generate_response(
+            "Le paracétamol est-il contre-indiqué en cas d'insuffisance hépatique ?", session_id="s"
+        )
+        follow_up = await rag_service.generate_response("Et chez l'enfant ?", session_id="s")
+        elliptical = await rag_service.generate_response("Quelle est la posologie chez l'enfant ?", session_id="s")
+        return first, self_contained, follow_up, elliptical
+
+    first, self_contained, follow_up, elliptical = asyncio.run(conversation())
+
+    assert "condense" not in first["timings"]
+    assert "condense" not in self_contained["timings"]
+    assert "condense" in follow_up["timings"]
+    assert "condense" in elliptical["timings"]
+    assert {"retrieval", "generation"} <= set(follow_up["timings"])
+    assert follow_up["response"] == "réponse"
+    assert follow_up["sources"][0]["title"] == "Paracétamol"
@@ -0,0 +1,71 @@
+"""Tests for context assembly before prompting"""
+from langchain_core.documents import Document
+
+from app.services.context import assemble_context, drop_near_duplicates, merge_adjacent, trim_to_budget
+from app.services.sections import SectionTextSplitter
+from app.services.tokens import count_tokens
+
+URL = "https://www.vidal.fr/paracetamol.html"
+
+
+def chunk(text, index=None, url=URL, score=0.5):
+    metadata = {"url": url, "title": "Paracétamol", "score": score}
+    if index is not None:
+        metadata["chunk_index"] = index
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_overlapping_chunks_are_merged():
+    overlap = "la dose maximale est de 4 g par jour chez l'adulte"
+    first = chunk("Posologie: 1 g par prise, " + overlap, score=0.9)
+    second = chunk(overlap + ", espacer les prises de 4 heures.", score=0.7)
+
+    merged = merge_adjacent([second, first], max_overlap=400)
+
+    assert len(merged) == 1
+    assert merged[0].page_content == "Posologie: 1 g par prise, " + overlap + ", espacer les prises de 4 heures."
+    assert merged[0].metadata["score"] == 0.9
+
+
+def test_adjacent_chunks_bridge_and_other_pages_stay_apart():
+    docs = [chunk("Indications.", 0), chunk("Interactions.", 2), chunk("Autre page.", 1, url="other"), chunk("Posologie.", 1)]
+
+    merged = merge_adjacent(docs, max_overlap=400)
+
+    assert [doc.page_content for doc in merged] == ["Indications.\nPosologie.\nInteractions.", "Autre page."]
+
+
+def test_section_chunks_merge_without_repeating_heading_or_overlap():
+    sentences = [f"Phrase numéro {i} sur la posologie du paracétamol chez l'adulte." for i in range(12)]
+    text = "## Posologie\n" + " ".join(sentences)
+    pieces = SectionTextSplitter(chunk_size=200, chunk_overlap=80).split_with_metadata(text)
+    assert len(pieces) > 2
+    docs = [
+        Document(page_content=content, metadata={"url": URL, **metadata, "chunk_index": i})
+        for i, (content, metadata) in enumerate(pieces)
+    ]
+
+    merged = merge_adjacent(list(reversed(docs)), max_overlap=160)
+
+    assert len(merged) == 1
+    assert merged[0].page_content.count("## Posologie") == 1
+    assert all(merged[0].page_content.count(sentence) == 1 for sentence in sentences)
+
+
+def test_near_duplicates_are_dropped():
+    text = "Le paracétamol est contre-indiqué en cas d'insuffisance hépatocellulaire sévère"
+    docs = [chunk(text), chunk(text + "."), chunk("Tout autre chose sur la conservation du produit")]
+
+    assert len(drop_near_duplicates(docs, threshold=0.85)) == 2
+
+
+def test_trim_to_budget():
+    docs = [chunk("paracétamol " * 100), chunk("ibuprofène " * 100), chunk("tramadol " * 100)]
+    sizes = [count_tokens(doc.page_content) for doc in docs]
+
+    assert len(trim_to_budget(docs, max_tokens=sizes[0] + sizes[1] + 10)) == 2
+
+    trimmed = trim_to_budget(docs, max_tokens=sizes[0] + sizes[1] + 60)
+    assert len(trimmed) == 3
+    assert count_tokens(trimmed[2].page_content) <= 60
+    assert assemble_context(docs, max_tokens=10) == []
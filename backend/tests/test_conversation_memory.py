@@ -0,0 +1,53 @@
+"""Tests for the token-budgeted conversation memory"""
+import asyncio
+
+from langchain_community.chat_models.fake import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.config import settings
+from app.services.conversation_memory import select_recent_messages
+from app.services.rag_service import RAGService
+
+
+def make_history(turns):
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"question {i}"), AIMessage(content=f"réponse {i}")]
+    return messages
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_window_keeps_last_turns():
+    """Test that only the last N whole turns are kept"""
+    recent = select_recent_messages(make_history(5), max_turns=2, token_budget=1000, count=word_count)
+    assert [m.content for m in recent] == ["question 3", "réponse 3", "question 4", "réponse 4"]
+
+
+def test_window_respects_token_budget():
+    """Test that turns beyond the token budget are dropped, latest turn always kept"""
+    history = make_history(5)
+    assert len(select_recent_messages(history, max_turns=5, token_budget=8, count=word_count)) == 4
+    assert len(select_recent_messages(history, max_turns=5, token_budget=1, count=word_count)) == 2
+
+
+def test_rolling_summary_covers_older_turns(monkeypatch):
+    """Test that turns leaving the window are summarized off the request path"""
+    monkeypatch.setattr(settings, "MEMORY_MODE", "window")
+    monkeypatch.setattr(settings, "MEMORY_MAX_TURNS", 1)
+    monkeypatch.setattr(settings, "MEMORY_SUMMARY_ENABLED", True)
+    service = RAGService()
+    service._summary_llm = FakeListChatModel(responses=["résumé 1", "résumé 2"])
+
+    async def run():
+        for i in range(3):
+            await service._save_turn("s", f"question {i}", f"réponse {i}")
+            await asyncio.gather(*service._background_tasks)
+        return await service._get_history("s")
+
+    history = asyncio.run(run())
+    assert history[0].content.endswith("résumé 2")
+    assert [m.content for m in history[1:]] == ["question 2", "réponse 2"]
+    assert service.sessions.get_summary("s") == ("résumé 2", 4)
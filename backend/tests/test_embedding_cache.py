@@ -0,0 +1,56 @@
+"""Tests for the persistent embedding cache"""
+import asyncio
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that count how many texts were embedded"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += len(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def test_documents_are_embedded_once(tmp_path):
+    """Test that unchanged texts are served from the cache"""
+    underlying = CountingEmbeddings()
+    cached = CachedEmbeddings(underlying, namespace="test", db_path=str(tmp_path / "emb.sqlite3"))
+
+    first = cached.embed_documents(["paracétamol", "ibuprofène", "paracétamol"])
+    second = cached.embed_documents(["paracétamol", "ibuprofène"])
+
+    assert underlying.calls == 2
+    assert first[0] == first[2] == second[0]
+    assert cached.stats()["hits"] == 3
+    assert cached.stats()["misses"] == 2
+
+
+def test_cache_persists_on_disk(tmp_path):
+    """Test that a new process reuses vectors stored on disk"""
+    db_path = str(tmp_path / "emb.sqlite3")
+    CachedEmbeddings(CountingEmbeddings(), namespace="test", db_path=db_path).embed_query("aspirine")
+
+    underlying = CountingEmbeddings()
+    cached = CachedEmbeddings(underlying, namespace="test", db_path=db_path)
+    assert asyncio.run(cached.aembed_query("aspirine")) == [8.0, 1.0]
+    assert underlying.calls == 0
+
+
+def test_namespace_isolates_models(tmp_path):
+    """Test that vectors of another model are never returned"""
+    db_path = str(tmp_path / "emb.sqlite3")
+    CachedEmbeddings(CountingEmbeddings(), namespace="model-a", db_path=db_path).embed_query("x")
+
+    underlying = CountingEmbeddings()
+    CachedEmbeddings(underlying, namespace="model-b", db_path=db_path).embed_query("x")
+    assert underlying.calls == 1
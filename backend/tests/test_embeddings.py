@@ -0,0 +1,71 @@
+"""Tests for the embedding backend selection"""
+import sys
+
+import pytest
+from langchain_community.embeddings import FakeEmbeddings
+
+from app.config import settings
+from app.services import rag_service as rag_module
+from app.services.embeddings import build_embeddings, collection_name, embedding_model_name
+
+
+def test_local_backend_has_its_own_collection(monkeypatch):
+    assert collection_name() == "pharmabot_knowledge"
+
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    assert collection_name() == "pharmabot_knowledge_all_minilm_l6_v2"
+    assert embedding_model_name() == "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def test_backend_errors(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        build_embeddings()
+
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "local")
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    with pytest.raises(ValueError, match="sentence-transformers"):
+        build_embeddings()
+
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "word2vec")
+    with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+        build_embeddings()
+
+
+def test_search_works_without_api_key(monkeypatch, tmp_path):
+    """Test that only chat requires OPENAI_API_KEY when embeddings are local"""
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical.json.gz"))
+    monkeypatch.setattr(rag_module, "build_embeddings", lambda: FakeEmbeddings(size=8))
+
+    service = rag_module.RAGService()
+    service.warm_up()
+
+    assert service.retriever is not None
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        service.qa_chain
+
+
+def test_warm_up_bypasses_the_embedding_cache(monkeypatch, tmp_path):
+    """Test that warm-up runs the backend even when the cache holds the warm-up vector"""
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.db"))
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical.json.gz"))
+    calls = []
+
+    class CountingEmbeddings(FakeEmbeddings):
+        def embed_query(self, text):
+            calls.append(text)
+            return super().embed_query(text)
+
+    monkeypatch.setattr(rag_module, "build_embeddings", lambda: CountingEmbeddings(size=8))
+
+    for _ in range(2):
+        rag_module.RAGService().warm_up()
+
+    assert calls == ["warm-up", "warm-up"]
@@ -0,0 +1,35 @@
+"""Tests for the bounded blocking-I/O executor"""
+import asyncio
+import time
+
+from app.services.executor import BoundedExecutor
+
+
+def test_blocking_calls_do_not_block_the_loop():
+    """Test that blocking calls run on the pool while the loop keeps serving"""
+    executor = BoundedExecutor(max_workers=2)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        await asyncio.gather(
+            executor.run(time.sleep, 0.1),
+            executor.run(time.sleep, 0.1),
+            executor.run(time.sleep, 0.1),
+            ticker(),
+        )
+        return ticks
+
+    assert asyncio.run(run()) == 5
+    stats = executor.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+    # Three calls on two threads: one had to wait
+    assert stats["max_queued"] >= 1
@@ -1,7 +1,11 @@
 """Tests for health check endpoints"""
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.services.health import HealthMonitor
+
 
 def test_health_check(client):
     """Test the health check endpoint"""
@@ -21,12 +25,88 @@ def test_system_status(client):
     assert response.status_code == 200
     
     data = response.json()
-    assert data["status"] == "operational"
+    # No warmed-up RAG service outside the lifespan handler
+    assert data["status"] == "degraded"
     assert "services" in data
     assert data["services"]["api"] == "running"
+    assert data["services"]["database"] == "unknown"
     assert "timestamp" in data
 
 
+def test_liveness_and_readiness(client):
+    """Liveness always answers, readiness refuses traffic before warm-up"""
+    assert client.get("/api/live").json()["status"] == "alive"
+
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+
+class FakeService:
+    def __init__(self, documents=10):
+        self.documents = documents
+        self.probes = 0
+
+    async def check_health(self):
+        self.probes += 1
+        await asyncio.sleep(0.01)
+        return {
+            "database": {"status": "connected", "documents": self.documents},
+            "embeddings": {"status": "reachable"},
+            "sessions": {"status": "ok", "sessions": 0},
+            "llm": {"status": "configured"},
+        }
+
+
+class FakeRegistry:
+    def __init__(self, service, warmed_up=True):
+        self.service = service
+        self.warmed_up = warmed_up
+
+    def current(self):
+        return self.service
+
+
+def test_health_monitor_caches_probes():
+    service = FakeService()
+    monitor = HealthMonitor(FakeRegistry(service), ttl_seconds=60)
+
+    async def poll():
+        return await asyncio.gather(*(monitor.check() for _ in range(5)))
+
+    reports = asyncio.run(poll())
+    assert all(report["ready"] for report in reports)
+    assert reports[0]["checks"]["database"]["documents"] == 10
+    assert service.probes == 1
+
+    asyncio.run(monitor.check())
+    assert service.probes == 1
+    monitor.invalidate()
+    asyncio.run(monitor.check())
+    assert service.probes == 2
+
+
+def test_health_monitor_not_ready():
+    report = asyncio.run(HealthMonitor(FakeRegistry(FakeService(), warmed_up=False)).check())
+    assert not report["ready"]
+    assert report["rag"] == "warming_up"
+
+    service = FakeService()
+
+    async def broken_database():
+        return {
+            "database": {"status": "error", "error": "disk I/O error"},
+            "embeddings": {"status": "loaded"},
+            "sessions": {"status": "ok"},
+            "llm": {"status": "unconfigured"},
+        }
+
+    service.check_health = broken_database
+    report = asyncio.run(HealthMonitor(FakeRegistry(service)).check())
+    assert not report["ready"]
+    assert report["rag"] == "unavailable"
+
+
 def test_root_endpoint(client):
     """Test the root endpoint"""
     response = client.get("/")
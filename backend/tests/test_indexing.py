@@ -0,0 +1,65 @@
+"""Tests for idempotent document indexing"""
+
+
+def make_doc(content, title="Paracétamol"):
+    return {
+        "title": title,
+        "content": content,
+        "url": "https://www.vidal.fr/paracetamol.html",
+        "source_type": "vidal",
+        "category": "medicament",
+    }
+
+
+def test_reloading_is_idempotent(rag_service):
+    """Test that loading the same documents twice does not duplicate chunks"""
+    docs = [make_doc("Posologie adulte: 1 g par prise.")]
+
+    first = rag_service.add_documents(docs)
+    second = rag_service.add_documents(docs)
+
+    assert first["added"] == 1
+    assert second == {"added": 0, "updated": 0, "removed": 0, "unchanged": 1}
+    assert rag_service.vectorstore._collection.count() == 1
+
+
+def test_changed_page_replaces_chunks(rag_service):
+    """Test that re-scraped pages update metadata and drop vanished chunks"""
+    rag_service.add_documents([make_doc("Posologie adulte: 1 g par prise.")])
+
+    counts = rag_service.add_documents([make_doc("Posologie adulte: 500 mg par prise.")])
+    assert counts["added"] == 1
+    assert counts["removed"] == 1
+
+    counts = rag_service.add_documents([make_doc("Posologie adulte: 500 mg par prise.", title="Doliprane")])
+    assert counts["updated"] == 1
+    assert rag_service.vectorstore._collection.count() == 1
+
+
+def test_batched_ingestion(rag_service, monkeypatch):
+    """Test that many chunks are embedded in several batches and all written"""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "INGEST_CONCURRENCY", 2)
+    docs = [
+        {"title": f"Doc {i}", "content": f"Contenu du document {i}.", "url": f"https://example.org/{i}"}
+        for i in range(10)
+    ]
+
+    counts = rag_service.add_documents(iter(docs))
+
+    assert counts["added"] == 10
+    assert rag_service.ingestion.stats()["batches"] == 4
+    assert rag_service.vectorstore._collection.count() == 10
+
+
+def test_lexical_index_follows_collection(rag_service):
+    """Test that indexing keeps the BM25 index in sync with the collection"""
+    rag_service.add_documents([make_doc("Posologie adulte: 1 g par prise.")])
+    rag_service.add_documents([make_doc("Posologie adulte: 500 mg par prise.")])
+
+    index = rag_service._lexical_index
+    assert len(index) == rag_service.vectorstore._collection.count() == 1
+    assert index.search("500 mg") and not index.search("1 g")
+    assert index.path.exists()
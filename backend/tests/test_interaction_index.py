@@ -0,0 +1,141 @@
+"""Tests for the drug interaction index"""
+import asyncio
+
+import pytest
+
+from app.services.interaction_index import InteractionIndex, extract_interactions, interaction_key
+from app.services.lexical_index import LexicalIndex
+
+ASPIRINE = {
+    "title": "Aspirine (Acide acétylsalicylique) - Anti-inflammatoire et antiagrégant",
+    "url": "https://www.vidal.fr/medicaments/substances/acide-acetylsalicylique.html",
+    "content": """L'aspirine est un AINS.
+
+        Interactions majeures:
+        - Anticoagulants: majoration du risque hémorragique
+        - Méthotrexate: augmentation de la toxicité
+
+        Précautions:
+        - À prendre au cours des repas""",
+}
+
+METHOTREXATE = {
+    "title": "Méthotrexate",
+    "url": "https://www.vidal.fr/medicaments/substances/methotrexate.html",
+    "content": """## Interactions
+        Associations contre-indiquées:
+        - Triméthoprime, sulfaméthoxazole: toxicité hématologique
+        Associations déconseillées:
+        - Pénicillines: diminution de l'élimination du méthotrexate""",
+}
+
+CLOPIDOGREL = {
+    "title": "Clopidogrel",
+    "url": "https://www.vidal.fr/medicaments/substances/clopidogrel.html",
+    "content": """## Interactions
+        - Inhibiteurs de la pompe à protons: diminution de l'effet antiagrégant
+        - Acide acétylsalicylique à des doses supérieures à 500 mg par prise: risque hémorragique""",
+}
+
+
+def extract(doc):
+    return extract_interactions(doc["title"], doc["content"], doc["url"], "vidal")
+
+
+def test_extract_interactions():
+    interactions = extract(ASPIRINE)
+    assert [(i.drug, i.partner) for i in interactions] == [("Aspirine", "Anticoagulants"), ("Aspirine", "Méthotrexate")]
+    assert interactions[0].description == "majoration du risque hémorragique"
+
+    interactions = extract(METHOTREXATE)
+    assert [i.partner for i in interactions] == ["Triméthoprime", "sulfaméthoxazole", "Pénicillines"]
+    assert interactions[-1].level == "Associations déconseillées"
+
+
+def test_long_partners_are_kept_with_their_qualifier():
+    interactions = extract(CLOPIDOGREL)
+
+    assert [i.partner for i in interactions] == ["Inhibiteurs de la pompe à protons", "Acide acétylsalicylique"]
+    assert interactions[1].description == "à des doses supérieures à 500 mg par prise: risque hémorragique"
+
+
+def test_interaction_key():
+    assert interaction_key("Amoxicilline 500 mg gélule") == "amoxicilline"
+    assert interaction_key("Anticoagulants oraux") == "anticoagulant oraux"
+
+
+@pytest.fixture
+def index():
+    index = InteractionIndex()
+    for doc in (ASPIRINE, METHOTREXATE, CLOPIDOGREL):
+        index.set_document(doc["url"], extract(doc))
+    return index
+
+
+def test_check_all_pairs(index):
+    found = index.check(["Méthotrexate 2,5 mg", "Paracétamol", "Acide acétylsalicylique", "anticoagulants"])
+
+    assert [pair["drugs"] for pair in found] == [
+        ["Méthotrexate 2,5 mg", "Acide acétylsalicylique"],
+        ["Acide acétylsalicylique", "anticoagulants"],
+    ]
+    assert found[0]["findings"][0]["description"] == "augmentation de la toxicité"
+    assert index.check(["Pénicillines", "Méthotrexate"])[0]["findings"][0]["level"] == "Associations déconseillées"
+    assert index.check(["Clopidogrel", "Acide acétylsalicylique"])
+
+
+def test_generic_class_heads_do_not_match(index):
+    assert index.check(["Clopidogrel", "Inhibiteurs de la pompe à protons"])
+    assert index.check(["Clopidogrel", "Inhibiteurs calciques"]) == []
+    assert index.check(["Clopidogrel", "Inhibiteurs"]) == []
+    # Prescribed names are not reduced to their head word either
+    assert index.check(["Aspirine", "Anticoagulants oraux"]) == []
+
+
+def test_unrecognized_medications(index):
+    assert index.unrecognized(["Aspirine", "Pénicillines", "Doliprane 1000 mg"]) == ["Doliprane 1000 mg"]
+    index.set_document(METHOTREXATE["url"], [])
+    assert index.unrecognized(["Pénicillines", "Méthotrexate"]) == ["Pénicillines"]
+
+
+def test_replace_document_and_persist(index, tmp_path):
+    index.set_document(ASPIRINE["url"], [])
+    assert index.check(["aspirine", "méthotrexate"]) == []
+
+    index.path = tmp_path / "interactions.json"
+    index.save()
+    loaded = InteractionIndex(str(index.path))
+    assert loaded.load()
+    assert loaded.check(["méthotrexate", "pénicillines"])
+    assert not loaded.has_changed()
+
+
+def test_rebuild_from_lexical_index():
+    lexical = LexicalIndex()
+    lines = ASPIRINE["content"].split("\n\n")
+    metadata = {"title": ASPIRINE["title"], "url": ASPIRINE["url"], "source_type": "vidal"}
+    lexical.add(
+        [f"c{i}" for i in range(len(lines))],
+        lines,
+        [{**metadata, "chunk_index": i} for i in range(len(lines))],
+    )
+    index = InteractionIndex()
+    index.rebuild(lexical)
+
+    assert index.check(["aspirine", "méthotrexate"])
+
+
+def test_ingestion_fills_the_index(rag_service):
+    doc = {**ASPIRINE, "source_type": "vidal", "category": "medicament"}
+    asyncio.run(rag_service.aadd_documents([doc]))
+
+    result = asyncio.run(rag_service.check_interactions(["Aspirine", "Méthotrexate"]))
+    assert result["checked_pairs"] == 1
+    assert result["unrecognized"] == []
+    assert result["interactions"][0]["findings"][0]["partner"] == "Méthotrexate"
+    assert result["explanation"] is None
+
+
+def test_interactions_endpoint_validation(client):
+    response = client.post("/api/interactions/", json={"medications": ["Aspirine"]})
+    assert response.status_code == 422
@@ -0,0 +1,123 @@
+"""Tests for the BM25 lexical index and hybrid retrieval"""
+import asyncio
+import uuid
+
+import chromadb
+import pytest
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import Chroma
+
+from app.services.executor import BoundedExecutor
+from app.services.lexical_index import LexicalIndex, tokenize
+from app.services.retriever import PharmaRetriever, reciprocal_rank_fusion
+from app.services.title_index import TitleIndex
+
+
+def test_tokenize_folds_accents_and_drops_stopwords():
+    assert tokenize("Éfferalgan: 2,5 g/jour chez l'adulte") == ["efferalgan", "2.5", "g", "jour", "chez", "adulte"]
+
+
+def test_bm25_ranks_exact_terms_first():
+    index = LexicalIndex()
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Doliprane 1000 mg comprimé, paracétamol",
+            "Paracétamol: ne pas dépasser 4 g par jour",
+            "Ibuprofène 400 mg, anti-inflammatoire",
+        ],
+        [{"source_type": "vidal"}, {"source_type": "vidal"}, {"source_type": "meddispar"}],
+    )
+
+    assert index.search("doliprane 1000")[0][0] == "a"
+    assert index.search("4 g/jour")[0][0] == "b"
+    assert [cid for cid, _ in index.search("mg", where={"source_type": "meddispar"})] == ["c"]
+
+    index.remove(["a"])
+    assert index.search("doliprane") == []
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "lexical.json.gz"
+    index = LexicalIndex(str(path))
+    index.add(["a"], ["Tramadol, stupéfiant"], [{"title": "Tramadol"}])
+    index.save()
+
+    other = LexicalIndex(str(path))
+    assert other.has_changed()
+    assert other.load()
+    assert not other.has_changed()
+    assert other.search("stupefiant")[0][0] == "a"
+    assert other.chunks() == [("a", {"title": "Tramadol"})]
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]])
+    assert [item for item, _ in fused] == ["b", "a", "c"]
+    assert reciprocal_rank_fusion([["a"], ["a"]])[0][1] == pytest.approx(1.0)
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    calls: int = 0
+    batches: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+    def embed_documents(self, texts):
+        self.batches += 1
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def retriever():
+    embeddings = CountingEmbeddings(size=8)
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"test-{uuid.uuid4().hex[:12]}",
+        embedding_function=embeddings,
+    )
+    texts = ["Doliprane 1000 mg: 1 comprimé par prise", "Ibuprofène: anti-inflammatoire non stéroïdien"]
+    metadatas = [{"title": "Doliprane 1000", "source_type": "vidal"}, {"title": "Ibuprofène", "source_type": "vidal"}]
+    ids = vectorstore.add_texts(texts, metadatas=metadatas)
+    index = LexicalIndex()
+    index.add(ids, texts, metadatas)
+    return PharmaRetriever(
+        vectorstore=vectorstore,
+        executor=BoundedExecutor(2),
+        k=2,
+        lexical_index=index,
+        title_index=TitleIndex(index),
+    )
+
+
+def test_drug_name_skips_embedding(retriever):
+    """Test that a query naming a document is answered without an embedding call"""
+    docs = asyncio.run(retriever.asearch("fiche Doliprane 1000"))
+
+    assert [doc.metadata["title"] for doc in docs] == ["Doliprane 1000"]
+    assert retriever.vectorstore.embeddings.calls == 0
+
+
+def test_hybrid_search_fuses_both_rankings(retriever):
+    docs = asyncio.run(retriever.asearch("anti-inflammatoire"))
+
+    assert docs[0].metadata["title"] == "Ibuprofène"
+    assert len(docs) == 2
+    assert retriever.vectorstore.embeddings.calls == 1
+    assert asyncio.run(retriever.asearch("anti-inflammatoire", mode="vector"))
+
+
+def test_batch_search_embeds_once(retriever):
+    """Test that a batch of queries costs one embedding call"""
+    retriever.vectorstore.embeddings.batches = 0  # Indexing the fixture chunks
+    queries = ["fiche Doliprane 1000", "anti-inflammatoire", "comprimé par prise"]
+    results = asyncio.run(retriever.asearch_many(queries))
+
+    assert [docs[0].metadata["title"] for docs in results] == ["Doliprane 1000", "Ibuprofène", "Doliprane 1000"]
+    assert retriever.vectorstore.embeddings.batches == 1
+    assert retriever.vectorstore.embeddings.calls == 0
+
+    single = asyncio.run(retriever.asearch("anti-inflammatoire"))
+    assert [doc.page_content for doc in single] == [doc.page_content for doc in results[1]]
@@ -0,0 +1,61 @@
+"""Tests for Prometheus metrics and Server-Timing headers"""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app.api.metrics import MetricsMiddleware, metrics
+from app.services.metrics import ServiceCollector, measure, record_timings
+
+
+def test_metrics_endpoint(client):
+    client.get("/api/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'pharmabot_http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}' in response.text
+    # Scrapes may read the SQLite session store, they run in the threadpool
+    assert not asyncio.iscoroutinefunction(metrics)
+
+
+def test_server_timing_header():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, server_timing=True)
+
+    @app.get("/work")
+    async def work():
+        with measure("vector_search"):
+            pass
+        record_timings({"generation": 12.5})
+        return {}
+
+    response = TestClient(app).get("/work")
+
+    assert "vector_search;dur=" in response.headers["server-timing"]
+    assert "generation;dur=12.5" in response.headers["server-timing"]
+
+
+class FakeService:
+    def runtime_stats(self):
+        return {
+            "answer_cache": {"hits": 3, "misses": 1},
+            "embedding_cache": None,
+            "reranker": None,
+            "executor": {"queued": 2, "in_flight": 4},
+            "sessions": {"sessions": 7},
+        }
+
+
+def test_service_collector():
+    registry = CollectorRegistry()
+    registry.register(ServiceCollector(lambda: None))
+    assert b"pharmabot" not in generate_latest(registry)
+
+    registry = CollectorRegistry()
+    registry.register(ServiceCollector(FakeService))
+    output = generate_latest(registry).decode()
+
+    assert "pharmabot_answer_cache_hits_total 3.0" in output
+    assert 'pharmabot_executor_queued{pool="executor"} 2.0' in output
+    assert "pharmabot_sessions 7.0" in output
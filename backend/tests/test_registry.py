@@ -0,0 +1,37 @@
+"""Tests for the process-wide service registry"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.config import settings
+from app.services.registry import ServiceRegistry, get_rag_service, registry
+
+
+def test_rag_service_is_shared():
+    """Test that every dependency call returns the same RAGService"""
+    assert get_rag_service() is get_rag_service()
+    assert get_rag_service() is registry.rag_service
+
+
+def test_registry_shutdown_releases_service():
+    """Test that shutdown drops the service so a new one is built on next access"""
+    local_registry = ServiceRegistry()
+    first = local_registry.rag_service
+    asyncio.run(local_registry.shutdown())
+    assert local_registry.rag_service is not first
+
+
+def test_registry_shutdown_closes_pools_and_files(monkeypatch, tmp_path):
+    """Test that shutdown stops the thread pool and closes the session database"""
+    monkeypatch.setattr(settings, "SESSION_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "SESSION_DB_PATH", str(tmp_path / "sessions.sqlite3"))
+    local_registry = ServiceRegistry()
+    service = local_registry.rag_service
+
+    asyncio.run(local_registry.shutdown())
+
+    with pytest.raises(RuntimeError):
+        service.executor._pool.submit(print)
+    with pytest.raises(sqlite3.ProgrammingError):
+        service.sessions.stats()
@@ -0,0 +1,54 @@
+"""Tests for the cross-encoder re-ranking stage"""
+import asyncio
+
+from langchain_core.documents import Document
+
+from app.services.reranker import CrossEncoderReranker
+
+
+class KeywordCrossEncoder:
+    """Scores a pair by the number of query words found in the passage"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        return [sum(word in passage for word in query.split()) for query, passage in pairs]
+
+
+def make_reranker():
+    reranker = CrossEncoderReranker("fake-model")
+    reranker._model = KeywordCrossEncoder()
+    return reranker
+
+
+def test_rerank_keeps_best_documents():
+    reranker = make_reranker()
+    docs = [
+        Document(page_content="posologie adulte", metadata={"score": 0.9}),
+        Document(page_content="posologie enfant", metadata={"score": 0.5}),
+        Document(page_content="conservation", metadata={"score": 0.7}),
+    ]
+
+    ranked = reranker.rerank("posologie enfant", docs, top_k=2)
+
+    assert [doc.page_content for doc in ranked] == ["posologie enfant", "posologie adulte"]
+    assert ranked[0].metadata == {"score": 2.0, "retrieval_score": 0.5}
+    assert reranker._model.batches == [3]
+    assert reranker.stats()["pairs"] == 3
+
+
+def test_chat_retrieval_over_fetches_then_reranks(make_rag_service, monkeypatch):
+    """Test that the chain sees the re-ranked top-k out of the over-fetched candidates"""
+    monkeypatch.setattr("app.services.rag_service.settings.RERANK_CANDIDATES", 3)
+    service = make_rag_service(responses=[], k=1)
+    service.reranker = make_reranker()
+    service.vectorstore.add_texts(["posologie adulte", "posologie enfant", "conservation"])
+
+    timings = {}
+    _, docs = asyncio.run(service._retrieve("posologie enfant", "", timings))
+
+    assert [doc.page_content for doc in docs] == ["posologie enfant"]
+    assert service.reranker._model.batches == [3]
+    assert "rerank" in timings
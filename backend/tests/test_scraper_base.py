@@ -0,0 +1,110 @@
+"""Tests for the shared scraper crawling core"""
+import asyncio
+import time
+
+from app.services.scraper_base import BaseScraper, TokenBucket
+
+
+def test_token_bucket_enforces_rate():
+    """Test that the bucket spaces requests according to its rate"""
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # First token is immediate, the next three wait 1/20 s each
+    assert asyncio.run(run()) >= 0.14
+
+
+def test_crawl_runs_concurrently_and_keeps_order(tmp_path, monkeypatch):
+    """Test that the worker pool overlaps pages and drops failed ones"""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "SCRAPING_CACHE_PATH", str(tmp_path))
+    scraper = BaseScraper(concurrency=4)
+    items = [{"url": f"https://example.org/{i}", "index": i} for i in range(8)]
+
+    async def scrape(item):
+        await asyncio.sleep(0.05)
+        if item["index"] == 3:
+            return None
+        return {"index": item["index"]}
+
+    start = time.monotonic()
+    documents = asyncio.run(scraper.crawl(items, scrape))
+    elapsed = time.monotonic() - start
+
+    assert [doc["index"] for doc in documents] == [0, 1, 2, 4, 5, 6, 7]
+    assert elapsed < 0.3
+
+
+def test_http_cache_validators_and_eviction(tmp_path):
+    """Test that cached responses expose validators and are evicted LRU past the cap"""
+    from app.services.http_cache import HttpCache
+
+    cache = HttpCache(str(tmp_path), max_bytes=10)
+    cache.put("https://example.org/a", "aaaaaa", etag='"v1"', last_modified=None)
+    assert cache.get("https://example.org/a").conditional_headers() == {"If-None-Match": '"v1"'}
+
+    time.sleep(0.01)
+    cache.put("https://example.org/b", "bbbbbb", etag=None, last_modified="Wed, 01 Oct 2025 00:00:00 GMT")
+    assert cache.get("https://example.org/a") is None
+    assert cache.get("https://example.org/b").body == "bbbbbb"
+    assert cache.size() == 6
+
+
+class FakeResponse:
+    def __init__(self, status, text="", headers=None):
+        self.status = status
+        self._text = text
+        self.headers = headers or {}
+
+    async def text(self):
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Answers 304 to requests carrying the page's ETag, 200 otherwise"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(headers or {})
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, "<html>page</html>", {"ETag": '"v1"'})
+
+
+def test_validators_are_stored_once_the_page_is_indexed(tmp_path, monkeypatch):
+    """Test that a page is only skipped as unchanged after confirm_pages, and again processed after a parser bump"""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "SCRAPING_CACHE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "REQUEST_DELAY", 0.001)
+    scraper = BaseScraper()
+    scraper.session = FakeSession()
+    url = "https://example.org/page"
+
+    async def crawl_once():
+        return await scraper.fetch_changed_page(url)
+
+    # Not confirmed (e.g. indexing failed): fetched and processed again
+    assert asyncio.run(crawl_once()) == "<html>page</html>"
+    assert asyncio.run(crawl_once()) == "<html>page</html>"
+    assert scraper.session.requests[1] == {}
+
+    assert scraper.confirm_pages([url]) == 1
+    assert asyncio.run(crawl_once()) is None
+    assert scraper.unchanged_pages == 1
+
+    monkeypatch.setattr(BaseScraper, "PARSER_VERSION", BaseScraper.PARSER_VERSION + 1)
+    assert asyncio.run(crawl_once()) == "<html>page</html>"
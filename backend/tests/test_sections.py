@@ -0,0 +1,98 @@
+"""Tests for section-aware chunking and section filtering"""
+import asyncio
+import uuid
+
+import chromadb
+import pytest
+from bs4 import BeautifulSoup
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import Chroma
+
+from app.services.executor import BoundedExecutor
+from app.services.lexical_index import LexicalIndex
+from app.services.retriever import PharmaRetriever
+from app.services.scraper_base import BaseScraper
+from app.services.sections import SectionTextSplitter, detect_section, split_sections
+
+MONOGRAPH = """Le paracétamol est un antalgique et antipyrétique.
+
+        Posologie adulte:
+        - 500 mg à 1 g par prise, toutes les 4 à 6 heures
+        - Maximum 4 g par jour
+
+        Contre-indications:
+        - Insuffisance hépatique sévère
+
+        ## Interactions
+        Associations déconseillées:
+        - Alcool: toxicité hépatique
+        Précautions d'emploi:
+        - Antivitamines K: risque hémorragique"""
+
+
+def test_split_sections():
+    sections = split_sections(MONOGRAPH)
+
+    assert [s.name for s in sections] == ["general", "posologie", "contre_indications", "interactions"]
+    assert sections[1].title == "Posologie adulte"
+    # Severity sub-headings stay in the interactions section
+    assert "Antivitamines K" in sections[3].text
+
+
+def test_chunks_stay_within_sections():
+    splitter = SectionTextSplitter(chunk_size=60, chunk_overlap=0)
+    chunks = splitter.split_with_metadata(MONOGRAPH)
+
+    posologie = [chunk for chunk, metadata in chunks if metadata["section"] == "posologie"]
+    assert len(posologie) == 2
+    assert all(chunk.startswith("Posologie adulte") for chunk in posologie)
+    assert not any("Insuffisance" in chunk for chunk in posologie)
+
+
+def test_detect_section():
+    assert detect_section("Quelle est la posologie du paracétamol ?") == "posologie"
+    assert detect_section("contre-indications de l'ibuprofène") == "contre_indications"
+    assert detect_section("Doliprane 1000") is None
+
+
+def test_scraper_marks_headings():
+    soup = BeautifulSoup(
+        "<article><h2>Posologie</h2><p>Un comprimé trois fois par jour au cours des repas.</p><p>Court</p></article>",
+        "html.parser",
+    )
+    text = BaseScraper.extract_text(soup.find("article"), ["p", "h2"])
+    assert text == "## Posologie\n\nUn comprimé trois fois par jour au cours des repas."
+
+
+@pytest.fixture
+def retriever():
+    embeddings = FakeEmbeddings(size=8)
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"test-{uuid.uuid4().hex[:12]}",
+        embedding_function=embeddings,
+    )
+    chunks = SectionTextSplitter(chunk_size=1000, chunk_overlap=0).split_with_metadata(MONOGRAPH)
+    texts = [chunk for chunk, _ in chunks]
+    metadatas = [{"title": "Paracétamol", "source_type": "vidal", **metadata} for _, metadata in chunks]
+    ids = vectorstore.add_texts(texts, metadatas=metadatas)
+    index = LexicalIndex()
+    index.add(ids, texts, metadatas)
+    return PharmaRetriever(vectorstore=vectorstore, executor=BoundedExecutor(2), k=2, lexical_index=index)
+
+
+def test_section_filter(retriever):
+    where = {"source_type": "vidal", "section": "interactions"}
+    for mode in ("vector", "hybrid"):
+        docs = asyncio.run(retriever.asearch("paracétamol", where=where, mode=mode))
+        assert [doc.metadata["section"] for doc in docs] == ["interactions"]
+
+
+def test_section_boost(retriever):
+    retriever.section_boost = 10.0
+    docs = asyncio.run(retriever.asearch("paracétamol posologie hépatique", mode="lexical"))
+    assert docs[0].metadata["section"] == "posologie"
+
+    retriever.section_boost = 0.0
+    docs = asyncio.run(retriever.asearch("paracétamol posologie hépatique", mode="lexical"))
+    assert docs[0].metadata["section"] != "posologie"
@@ -0,0 +1,84 @@
+"""Tests for the conversation session stores"""
+import time
+
+import pytest
+
+from app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def factory(max_sessions=10, ttl_seconds=60, max_messages=100):
+        if request.param == "memory":
+            return InMemorySessionStore(max_sessions, ttl_seconds, max_messages)
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), max_sessions, ttl_seconds, max_messages)
+    return factory
+
+
+def test_turns_are_recorded_and_cleared(make_store):
+    """Test that turns are returned in order and clear forgets the session"""
+    store = make_store()
+    store.append_turn("s1", "Posologie ?", "1 g")
+    store.append_turn("s1", "Et chez l'enfant ?", "15 mg/kg")
+
+    messages = store.get_messages("s1")
+    assert [m.type for m in messages] == ["human", "ai", "human", "ai"]
+    assert messages[-1].content == "15 mg/kg"
+
+    store.clear("s1")
+    assert store.get_messages("s1") == []
+
+
+def test_least_recently_used_session_is_evicted(make_store):
+    """Test that the session cap evicts the least recently used session"""
+    store = make_store(max_sessions=2)
+    store.append_turn("a", "q", "r")
+    time.sleep(0.01)
+    store.append_turn("b", "q", "r")
+    time.sleep(0.01)
+    store.get_messages("a")
+    time.sleep(0.01)
+    store.append_turn("c", "q", "r")
+
+    assert store.get_messages("b") == []
+    assert store.get_messages("a")
+    assert store.stats()["sessions"] == 2
+
+
+def test_idle_sessions_expire_and_history_is_capped(make_store):
+    """Test idle TTL and the per-session message cap"""
+    store = make_store(ttl_seconds=0)
+    store.append_turn("a", "q", "r")
+    time.sleep(0.01)
+    assert store.get_messages("a") == []
+
+    store = make_store(max_messages=2)
+    store.append_turn("a", "q1", "r1")
+    store.append_turn("a", "q2", "r2")
+    assert [m.content for m in store.get_messages("a")] == ["q2", "r2"]
+    assert store.stats()["bytes"] == 4
+
+
+def test_expired_session_starts_afresh(make_store):
+    """Test that a turn appended to an expired session does not revive its old messages"""
+    store = make_store(ttl_seconds=60)
+    store.append_turn("a", "q1", "r1")
+    store.set_summary("a", "résumé", 2)
+    # Idle for longer than the TTL
+    if isinstance(store, SQLiteSessionStore):
+        store._db.execute("UPDATE sessions SET last_access = last_access - 120")
+        store._db.commit()
+    else:
+        store._sessions["a"].last_access -= 120
+    store.append_turn("a", "q2", "r2")
+
+    assert store.total_messages("a") == 2
+    assert store.get_summary("a") == ("", 0)
+    assert store.stats()["messages"] == 2
+
+
+def test_sqlite_store_is_shared(tmp_path):
+    """Test that two SQLite stores on the same file (two workers) share history"""
+    path = str(tmp_path / "sessions.sqlite3")
+    SQLiteSessionStore(path, 10, 60, 100).append_turn("s", "q", "r")
+    assert len(SQLiteSessionStore(path, 10, 60, 100).get_messages("s")) == 2
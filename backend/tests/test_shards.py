@@ -0,0 +1,190 @@
+"""Tests for sharded collections and HNSW parameters"""
+import uuid
+
+import chromadb
+import pytest
+from langchain_community.embeddings import FakeEmbeddings
+
+from app.config import settings
+from app.services import rag_service as rag_module
+from app.services.embeddings import collection_name
+from app.services.shards import ShardedCollection, hnsw_metadata, migrate_collection, open_collection
+
+
+def _client():
+    return chromadb.EphemeralClient()
+
+
+def _sharded(client, fields=("source_type",), **kwargs):
+    return ShardedCollection(client, f"test_{uuid.uuid4().hex[:8]}", fields, **kwargs)
+
+
+def _fill(collection):
+    collection.upsert(
+        ids=["v1", "v2", "m1", "m2"],
+        embeddings=[[0.0, 0.0], [3.0, 0.0], [1.0, 0.0], [5.0, 0.0]],
+        metadatas=[
+            {"source_type": "vidal", "category": "medicament", "url": "a"},
+            {"source_type": "vidal", "category": "maladie", "url": "b"},
+            {"source_type": "meddispar", "category": "medicament", "url": "c"},
+            {"source_type": "meddispar", "category": "medicament", "url": "d"},
+        ],
+        documents=["v1", "v2", "m1", "m2"],
+    )
+
+
+def test_writes_are_routed_by_source():
+    sharded = _sharded(_client())
+    _fill(sharded)
+
+    assert list(sharded.shard_counts().values()) == [2, 2]
+    assert sharded.count() == 4
+
+
+def test_query_fans_out_and_merges_by_distance():
+    sharded = _sharded(_client())
+    _fill(sharded)
+
+    result = sharded.query(query_embeddings=[[0.0, 0.0], [5.0, 0.0]], n_results=3)
+
+    assert result["ids"] == [["v1", "m1", "v2"], ["m2", "v2", "m1"]]
+    assert result["distances"][0] == sorted(result["distances"][0])
+
+
+def test_filtered_query_only_searches_matching_shard():
+    sharded = _sharded(_client(), fields=("source_type", "category"))
+    _fill(sharded)
+
+    routed = sharded._route({"$and": [{"source_type": "vidal"}, {"url": "b"}]})
+    assert len(routed) == 2
+    # The shard implies the source, only the remaining condition is sent
+    assert all(where == {"url": "b"} for _, where in routed)
+
+    result = sharded.query(
+        query_embeddings=[[0.0, 0.0]], n_results=5, where={"$and": [{"source_type": "vidal"}, {"url": "b"}]}
+    )
+    assert result["ids"] == [["v2"]]
+
+
+def test_get_paginates_across_shards():
+    sharded = _sharded(_client())
+    _fill(sharded)
+
+    pages = [sharded.get(include=[], limit=3, offset=offset)["ids"] for offset in (0, 3)]
+
+    assert len(pages[0]) == 3 and len(pages[1]) == 1
+    assert sorted(pages[0] + pages[1]) == ["m1", "m2", "v1", "v2"]
+    assert sharded.get(where={"url": "c"}, include=["metadatas"])["ids"] == ["m1"]
+
+
+def test_update_moves_chunk_to_its_new_shard():
+    sharded = _sharded(_client())
+    _fill(sharded)
+
+    sharded.update(ids=["v2"], metadatas=[{"source_type": "meddispar", "category": "maladie", "url": "b"}])
+
+    counts = list(sharded.shard_counts().values())
+    assert counts == [3, 1]
+    moved = sharded.get(ids=["v2"], include=["embeddings", "documents"])
+    assert moved["documents"] == ["v2"]
+    assert list(moved["embeddings"][0]) == [3.0, 0.0]
+
+    sharded.delete(["v2", "m1"])
+    assert sharded.count() == 2
+
+
+def test_copy_from_unsharded_collection():
+    client = _client()
+    base = client.create_collection(f"base_{uuid.uuid4().hex[:8]}")
+    _fill(base)
+    sharded = _sharded(client)
+
+    assert sharded.copy_from(base, batch_size=3) == 4
+    assert sharded.count() == 4
+    assert sharded.get(ids=["m2"], include=["embeddings"])["embeddings"][0][0] == 5.0
+
+
+def test_migration_drops_the_unsharded_collection():
+    client = _client()
+    name = f"base_{uuid.uuid4().hex[:8]}"
+    _fill(client.create_collection(name))
+    sharded = ShardedCollection(client, name, ("source_type",))
+
+    assert migrate_collection(client, name, sharded) == 4
+    assert sharded.count() == 4
+    assert name not in [collection.name for collection in client.list_collections()]
+    # Nothing left to copy on the next start, an empty collection is dropped
+    client.create_collection(name)
+    assert migrate_collection(client, name, sharded) == 0
+    assert name not in [collection.name for collection in client.list_collections()]
+
+
+def test_service_does_not_recreate_the_unsharded_collection(monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical.json.gz"))
+    monkeypatch.setattr(settings, "INTERACTION_INDEX_PATH", str(tmp_path / "interactions.json"))
+    monkeypatch.setattr(rag_module, "build_embeddings", lambda: FakeEmbeddings(size=2))
+    monkeypatch.setattr(settings, "SHARDING", "source")
+
+    service = rag_module.RAGService()
+    _fill(service.collection)
+    names = [collection.name for collection in chromadb.PersistentClient(str(tmp_path / "chroma")).list_collections()]
+    assert collection_name() not in names
+    assert service.retriever.vectorstore.embeddings is service.embeddings
+    service.close()
+
+    # Switching sharding off warns that the shards are not searched
+    monkeypatch.setattr(settings, "SHARDING", "none")
+    rag_module.RAGService().collection
+    assert "not searched" in caplog.text
+
+
+def test_shards_created_elsewhere_are_picked_up():
+    client = _client()
+    server = _sharded(client, refresh_seconds=60)
+    scraper = ShardedCollection(client, server.base_name, server.fields)
+    _fill(scraper)
+
+    # Unfiltered queries wait for the refresh interval
+    assert server.query(query_embeddings=[[0.0, 0.0]], n_results=5)["ids"] == [[]]
+
+    # A filter naming an unknown shard refreshes once the last refresh is a second old
+    server._refreshed_at -= 1
+    result = server.query(query_embeddings=[[0.0, 0.0]], n_results=5, where={"source_type": "vidal"})
+    assert result["ids"] == [["v1", "v2"]]
+    assert server.count() == 4
+
+
+def test_long_shard_names_are_truncated():
+    sharded = _sharded(_client(), fields=("source_type", "category"))
+    sharded.upsert(
+        ids=["x"],
+        embeddings=[[1.0, 1.0]],
+        metadatas=[{"source_type": "vidal", "category": "tres longue catégorie " * 4}],
+        documents=["x"],
+    )
+
+    (name,) = sharded.shard_counts()
+    assert len(name) <= 63
+    # A new instance finds the shard and its values again
+    reopened = ShardedCollection(sharded.client, sharded.base_name, sharded.fields)
+    assert len(reopened._route({"source_type": "vidal"})) == 1
+    assert reopened._route({"source_type": "meddispar"}) == []
+
+
+def test_hnsw_parameters_apply_to_new_collections_only():
+    client = _client()
+    name = f"hnsw_{uuid.uuid4().hex[:8]}"
+    metadata = hnsw_metadata("cosine", 32, 200, 64, overrides={"search_ef": 128})
+
+    created = open_collection(client, name, metadata)
+    assert created.metadata["hnsw:search_ef"] == 128
+    assert created.metadata["hnsw:space"] == "cosine"
+
+    reopened = open_collection(client, name, hnsw_metadata("l2", 16, 100, 10))
+    assert reopened.metadata["hnsw:space"] == "cosine"
+
+    with pytest.raises(ValueError):
+        hnsw_metadata("l2", 16, 100, 10, overrides={"space": "ip"})
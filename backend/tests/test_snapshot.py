@@ -0,0 +1,82 @@
+"""Tests for vector store snapshots"""
+import uuid
+import zipfile
+
+import chromadb
+import pytest
+
+from app.services.snapshot import export_snapshot, import_snapshot, read_manifest
+
+ASPIRINE = {
+    "title": "Aspirine",
+    "content": "## Interactions\n- Méthotrexate: toxicité hématologique majorée",
+    "url": "https://www.vidal.fr/aspirine.html",
+    "source_type": "vidal",
+    "category": "medicament",
+}
+
+
+def _collection():
+    return chromadb.EphemeralClient().create_collection(f"test-{uuid.uuid4().hex[:12]}")
+
+
+def _fill(collection, n=5):
+    collection.upsert(
+        ids=[f"c{i}" for i in range(n)],
+        embeddings=[[float(i), 0.5, -1.0] for i in range(n)],
+        metadatas=[{"title": f"Doc {i}", "source_type": "vidal", "chunk_index": i} for i in range(n)],
+        documents=[f"Texte {i}" for i in range(n)],
+    )
+
+
+def test_export_import_roundtrip(tmp_path):
+    source = _collection()
+    _fill(source)
+    path = tmp_path / "snapshot.zip"
+
+    manifest = export_snapshot(source, str(path), "test-model", batch_size=2)
+
+    assert manifest["count"] == 5
+    assert manifest["dimension"] == 3
+    assert len(manifest["parts"]) == 3
+    assert read_manifest(str(path)) == manifest
+
+    target = _collection()
+    import_snapshot(str(path), target, "test-model")
+    copied = target.get(ids=["c3"], include=["embeddings", "metadatas", "documents"])
+    assert target.count() == 5
+    assert list(copied["embeddings"][0]) == [3.0, 0.5, -1.0]
+    assert copied["metadatas"][0] == {"title": "Doc 3", "source_type": "vidal", "chunk_index": 3}
+    assert copied["documents"] == ["Texte 3"]
+
+
+def test_import_refuses_other_models_and_files(tmp_path):
+    source = _collection()
+    _fill(source)
+    path = tmp_path / "snapshot.zip"
+    export_snapshot(source, str(path), "test-model")
+
+    with pytest.raises(ValueError):
+        import_snapshot(str(path), _collection(), "other-model")
+
+    not_a_snapshot = tmp_path / "other.zip"
+    with zipfile.ZipFile(not_a_snapshot, "w") as archive:
+        archive.writestr("readme.txt", "hello")
+    with pytest.raises(ValueError):
+        read_manifest(str(not_a_snapshot))
+
+
+async def test_service_import_rebuilds_indexes(make_rag_service, tmp_path):
+    source = make_rag_service()
+    await source.aadd_documents([ASPIRINE])
+    path = tmp_path / "snapshot.zip"
+    await source.export_snapshot(str(path))
+
+    # A fresh environment with an empty store and no indexes
+    fresh = make_rag_service()
+    manifest = await fresh.import_snapshot(str(path))
+
+    assert fresh.collection.count() == manifest["count"] > 0
+    assert len(fresh._lexical_index) == manifest["count"]
+    assert fresh._interaction_index.check(["Aspirine", "Méthotrexate"])
+    assert fresh._interaction_index.path.exists()
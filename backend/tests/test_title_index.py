@@ -0,0 +1,82 @@
+"""Tests for drug-name lookups"""
+import asyncio
+
+import pytest
+
+from app.services.lexical_index import LexicalIndex
+from app.services.title_index import TitleIndex, is_document_request, normalize_name
+
+
+@pytest.fixture
+def title_index():
+    index = LexicalIndex()
+    index.add(
+        ["d1", "d2", "e1", "t1"],
+        ["Doliprane 1000 mg...", "...suite", "Efferalgan 500 mg...", "Tramadol..."],
+        [
+            {"title": "Doliprane 1000 mg cp", "url": "https://www.vidal.fr/medicaments/doliprane-1000-mg.html", "source_type": "vidal"},
+            {"title": "Doliprane 1000 mg cp", "url": "https://www.vidal.fr/medicaments/doliprane-1000-mg.html", "source_type": "vidal"},
+            {"title": "Efferalgan (paracétamol)", "url": "", "source_type": "vidal"},
+            {"title": "Tramadol", "url": "", "source_type": "meddispar"},
+        ],
+    )
+    return TitleIndex(index)
+
+
+def test_normalize_name():
+    assert normalize_name("Fiche du Doliprane") == "doliprane"
+    assert normalize_name("Éfferalgan") == "efferalgan"
+
+
+def test_mentions(title_index):
+    assert title_index.mentions("Quelle est la posologie du Doliprane chez l'enfant ?") == ["doliprane"]
+    assert title_index.mentions("Le tramadol et l'efferalgan ?") == ["tramadol", "efferalgan"]
+    assert title_index.mentions("Quelle est la posologie chez l'enfant ?") == []
+
+
+def test_is_document_request():
+    assert is_document_request("Fiche du Doliprane")
+    assert is_document_request("notice tramadol")
+    assert not is_document_request("doliprane enfant ?")
+    assert not is_document_request("fiche")
+
+
+def test_exact_and_alias_matches(title_index):
+    match = title_index.match("doliprane 1000 mg cp")[0]
+    assert (match.kind, match.chunk_ids) == ("exact", ["d1", "d2"])
+
+    assert title_index.match("fiche doliprane")[0].title == "Doliprane 1000 mg cp"
+    assert title_index.match("Efferalgan")[0].kind == "alias"
+
+
+def test_prefix_and_fuzzy_matches(title_index):
+    assert title_index.match("effer")[0].kind == "prefix"
+
+    match = title_index.match("tramadole")[0]
+    assert match.kind == "fuzzy" and match.title == "Tramadol"
+    assert title_index.match("tramadol", where={"source_type": "vidal"}) == []
+
+
+def test_questions_are_not_names(title_index):
+    assert title_index.match("quelle est la posologie du doliprane chez l'enfant ?") == []
+
+
+def test_rebuilds_when_lexical_index_changes(title_index):
+    assert len(title_index) == 3
+    title_index.lexical_index.remove(["t1"])
+    assert title_index.match("tramadol") == []
+    assert title_index.complete("dol") == ["Doliprane 1000 mg cp"]
+
+
+def test_chat_fast_path_answers_without_llm(title_index, make_rag_service, monkeypatch):
+    """Test that "fiche X" chat messages are answered from the indexed document"""
+    monkeypatch.setattr("app.services.rag_service.settings.CHAT_TITLE_FAST_PATH", True)
+    # An LLM without responses fails if it is ever called
+    service = make_rag_service(responses=[], lexical_index=title_index.lexical_index)
+
+    result = asyncio.run(service.generate_response("fiche tramadol", session_id="s"))
+
+    assert result["response"].startswith("**Tramadol** (Meddispar)")
+    assert result["tokens_used"] == 0
+    assert "title_lookup" in result["timings"]
+    assert result["sources"][0]["title"] == "Tramadol"